@@ -0,0 +1,195 @@
+"""Process-wide registry for shared service clients.
+
+Weaviate, embeddings, Gemini and Tavily clients hold network connections and
+HTTP connection pools, so they are created once per process and reused by
+every request instead of being rebuilt on the per-question path.
+"""
+
+import asyncio
+import atexit
+import inspect
+import logging
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _default_close(client: Any):
+    """Close a client if it exposes a close() method."""
+    close = getattr(client, "close", None)
+    if callable(close):
+        close()
+
+
+def _skip_close(client: Any):
+    """Leave loop-bound clients alone; they can only be closed on their own loop."""
+
+
+class ClientRegistry:
+    """
+    Thread-safe registry that creates, health-checks and closes clients.
+
+    Clients are created lazily by name with a factory. If a health check is
+    given and fails, the old client is closed and a new one is created.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, Any] = {}
+        self._closers: Dict[str, Callable[[Any], None]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._created: Dict[str, int] = {}
+        self._reconnects: Dict[str, int] = {}
+        self._loops: Dict[str, weakref.ref] = {}
+
+        # Register cleanup once for the whole process
+        atexit.register(self.close_all)
+
+    def _lock_for(self, name: str) -> threading.Lock:
+        with self._lock:
+            if name not in self._locks:
+                self._locks[name] = threading.Lock()
+            return self._locks[name]
+
+    def get(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        health_check: Optional[Callable[[Any], bool]] = None,
+        close: Callable[[Any], None] = _default_close,
+    ) -> Any:
+        """
+        Get the client registered under ``name``, creating it if needed.
+
+        Args:
+            name: Registry key
+            factory: Callable that builds a new client
+            health_check: Optional callable returning False if the client
+                must be recreated
+            close: Callable used to shut the client down
+        """
+        client = self._clients.get(name)
+        if client is not None and (health_check is None or health_check(client)):
+            return client
+
+        # Only one thread builds a given client; others wait for it
+        with self._lock_for(name):
+            client = self._clients.get(name)
+            if client is not None:
+                if health_check is None or health_check(client):
+                    return client
+                logger.warning("Client %s failed health check, reconnecting", name)
+                self._close_quietly(name, client)
+                self._reconnects[name] = self._reconnects.get(name, 0) + 1
+
+            client = factory()
+            self._clients[name] = client
+            self._closers[name] = close
+            self._created[name] = self._created.get(name, 0) + 1
+            return client
+
+    def get_for_loop(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        close: Callable[[Any], None] = _skip_close,
+    ) -> Any:
+        """
+        Get an async client bound to the running event loop.
+
+        Async clients keep connection pools tied to the loop that opened them,
+        so each loop gets its own instance, registered as ``name:loop-<id>``.
+        Entries for loops that have since closed are dropped when a new one
+        is created.
+
+        Args:
+            name: Registry key prefix
+            factory: Callable that builds a new client
+            close: Callable used when a stale entry is replaced
+        """
+        loop = asyncio.get_running_loop()
+        key = f"{name}:loop-{id(loop)}"
+
+        def create():
+            self._drop_closed_loops()
+            self._loops[key] = weakref.ref(loop)
+            return factory()
+
+        # A new loop can reuse a dead loop's id, so check the loop itself
+        def same_loop(client):
+            owner = self._loops.get(key)
+            return owner is not None and owner() is loop
+
+        return self.get(key, create, health_check=same_loop, close=close)
+
+    def _drop_closed_loops(self):
+        for key, owner in list(self._loops.items()):
+            loop = owner()
+            if loop is None or loop.is_closed():
+                self._loops.pop(key, None)
+                self._clients.pop(key, None)
+
+    async def aclose_loop_clients(self):
+        """Close every client bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        for key, owner in list(self._loops.items()):
+            if owner() is not loop:
+                continue
+            self._loops.pop(key, None)
+            client = self._clients.pop(key, None)
+            close = getattr(client, "close", None)
+            if not callable(close):
+                continue
+            try:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.debug("Error closing client %s: %s", key, e)
+
+    def _close_quietly(self, name: str, client: Any):
+        try:
+            self._closers.get(name, _default_close)(client)
+        except Exception as e:
+            logger.debug("Error closing client %s: %s", name, e)
+
+    def reset(self, name: str):
+        """Close and forget a single client."""
+        with self._lock_for(name):
+            client = self._clients.pop(name, None)
+            if client is not None:
+                self._close_quietly(name, client)
+
+    def close_all(self):
+        """Close every registered client."""
+        for name in list(self._clients):
+            self.reset(name)
+
+    def stats(self) -> dict:
+        """Return how many times each client was created or reconnected."""
+        names = set(self._created) | set(self._reconnects)
+        return {
+            name: {
+                "created": self._created.get(name, 0),
+                "reconnects": self._reconnects.get(name, 0),
+                "active": name in self._clients,
+            }
+            for name in sorted(names)
+        }
+
+
+# Global registry instance
+_registry: Optional[ClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ClientRegistry:
+    """Get or create the process-wide client registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ClientRegistry()
+    return _registry
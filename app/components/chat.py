@@ -1,5 +1,7 @@
 """Chat UI component for Streamlit."""
 
+import itertools
+
 import streamlit as st
 
 
@@ -46,56 +48,73 @@ def render_chat():
         
         # Generate response
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                try:
-                    # Import here to avoid circular imports
-                    from graph.workflow import run_query
-                    
-                    result = run_query(
-                        query=prompt,
-                        messages=st.session_state.conversation_history
-                    )
-                    
-                    response = result.get("response", "No response generated")
-                    sources = result.get("sources", [])
-                    used_web = result.get("used_web_search", False)
-                    
-                    # Update conversation history
-                    st.session_state.conversation_history = result.get("messages", [])
-                    
-                    # Display response
+            try:
+                # Import here to avoid circular imports
+                from graph.workflow import run_query_stream
+                
+                result = {}
+                events = run_query_stream(
+                    query=prompt,
+                    messages=st.session_state.conversation_history
+                )
+                
+                # Routing, retrieval and web search run before the first token
+                with st.spinner("Thinking..."):
+                    first_event = next(events, None)
+                
+                def token_stream():
+                    # Yield answer tokens; keep the final event for the metadata
+                    pending = [first_event] if first_event is not None else []
+                    for event in itertools.chain(pending, events):
+                        if event["type"] == "token":
+                            yield event["content"]
+                        else:
+                            result.update(event)
+                
+                # Display response as it is generated
+                streamed = st.write_stream(token_stream())
+                
+                response = result.get("response") or "No response generated"
+                sources = result.get("sources", [])
+                used_web = result.get("used_web_search", False)
+                
+                # Answers produced without the LLM arrive only in the final event
+                if not streamed:
                     st.markdown(response)
-                    
-                    # Show sources
-                    if sources:
-                        with st.expander("📚 Sources", expanded=False):
-                            for i, source in enumerate(sources, 1):
-                                st.caption(f"**{i}. {source.get('source', 'Unknown')}**")
-                                st.caption(source.get("content", "")[:150] + "...")
-                                if source.get("url"):
-                                    st.caption(f"[Link]({source['url']})")
-                    
-                    # Show web search indicator
-                    if used_web:
-                        st.caption("🌐 *Web search was used for this response*")
-                    
-                    # Save to messages
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": response,
-                        "sources": sources,
-                        "used_web_search": used_web
-                    })
-                    
-                except Exception as e:
-                    import traceback
-                    error_msg = f"Error: {str(e)}"
-                    st.error(error_msg)
-                    st.code(traceback.format_exc())
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": error_msg
-                    })
+                
+                # Update conversation history
+                st.session_state.conversation_history = result.get("messages", [])
+                
+                # Show sources
+                if sources:
+                    with st.expander("📚 Sources", expanded=False):
+                        for i, source in enumerate(sources, 1):
+                            st.caption(f"**{i}. {source.get('source', 'Unknown')}**")
+                            st.caption(source.get("content", "")[:150] + "...")
+                            if source.get("url"):
+                                st.caption(f"[Link]({source['url']})")
+                
+                # Show web search indicator
+                if used_web:
+                    st.caption("🌐 *Web search was used for this response*")
+                
+                # Save to messages
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": response,
+                    "sources": sources,
+                    "used_web_search": used_web
+                })
+                
+            except Exception as e:
+                import traceback
+                error_msg = f"Error: {str(e)}"
+                st.error(error_msg)
+                st.code(traceback.format_exc())
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": error_msg
+                })
 
 
 def clear_chat():
@@ -8,12 +8,16 @@ from app.config import (
     COLLECTION_KNOWLEDGE,
     COLLECTION_POLICIES,
 )
-from data.loader import load_file
+from data.ingest import build_inventory_record_documents, ingest_source
+from data.loader import load_file, load_inventory_records
+from data.manifest import IngestManifest
 from data.processor import process_documents
+from rag.faq_index import delete_faq_index
+from rag.inventory_table import delete_inventory_table, update_inventory_table
 from rag.vectorstore import (
     init_collections,
-    add_documents,
     get_collection_count,
+    get_ids_by_property,
     delete_collection,
 )
 
@@ -63,6 +67,13 @@ def render_data_manager():
             except Exception:
                 st.metric(name, "N/A")
     
+    # Sources already ingested, from the local manifest
+    ingested = IngestManifest().sources.values()
+    if ingested:
+        with st.expander("🗂️ Ingested Sources", expanded=False):
+            for entry in sorted(ingested, key=lambda e: (e["collection"], e["source"])):
+                st.caption(f"**{entry['source']}** → {entry['collection']} ({len(entry['chunks'])} chunks)")
+    
     st.divider()
     
     # File upload section
@@ -88,28 +99,56 @@ def render_data_manager():
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            total_docs = 0
+            manifest = IngestManifest()
+            totals = {"inserted": 0, "updated": 0, "skipped": 0, "deleted": 0, "failed": 0}
             for i, file in enumerate(uploaded_files):
                 status_text.text(f"Processing {file.name}...")
                 
                 try:
-                    # Load file
                     file_bytes = file.read()
-                    docs = load_file(file_bytes=file_bytes, file_name=file.name)
                     
-                    # Process and add
-                    processed = process_documents(docs, collection_name, file.name)
-                    add_documents(collection_name, processed)
-                    total_docs += len(processed)
+                    # Vehicle feeds are parsed into records before anything is
+                    # written, so they get VIN keys and typed filter properties
+                    records = None
+                    if collection_name == COLLECTION_INVENTORY and Path(file.name).suffix.lower() in (".json", ".csv"):
+                        records = load_inventory_records(file_bytes=file_bytes, file_name=file.name)
+                    
+                    # Load, process and upsert only what changed since the last upload
+                    def build_documents(file_bytes, file_name=file.name, records=records):
+                        if records is not None:
+                            return build_inventory_record_documents(records, file_name)
+                        docs = load_file(file_bytes=file_bytes, file_name=file_name)
+                        return process_documents(docs, collection_name, file_name)
+                    
+                    report = ingest_source(
+                        collection_name, file.name, file_bytes, build_documents, manifest
+                    )
+                    if report.get("status") == "unchanged":
+                        st.info(f"{file.name} is unchanged since its last upload")
+                        continue
+                    
+                    # Vehicle feeds also update the table behind structured
+                    # answers, dropping vehicles the upload removed from the store
+                    if records is not None:
+                        update_inventory_table(records, get_ids_by_property(COLLECTION_INVENTORY, "vin"))
+                    for key in totals:
+                        totals[key] += report[key]
                     
                 except Exception as e:
                     st.error(f"Error processing {file.name}: {str(e)}")
                 
-                progress_bar.progress((i + 1) / len(uploaded_files))
+                finally:
+                    progress_bar.progress((i + 1) / len(uploaded_files))
             
             status_text.empty()
             progress_bar.empty()
-            st.success(f"✅ Uploaded {total_docs} document chunks to {category}")
+            st.success(
+                f"✅ {category}: {totals['inserted']} chunks added, "
+                f"{totals['updated']} updated, {totals['skipped']} unchanged, "
+                f"{totals['deleted']} removed"
+            )
+            if totals["failed"]:
+                st.warning(f"{totals['failed']} chunks failed to upload")
             st.rerun()
     
     st.divider()
@@ -135,6 +174,18 @@ def render_data_manager():
             if confirm == delete_category:
                 collection_name = CATEGORY_MAP[delete_category]
                 delete_collection(collection_name)
+                
+                # Forget what was ingested so the next upload starts fresh
+                manifest = IngestManifest()
+                manifest.remove_collection(collection_name)
+                manifest.save()
+                
+                # FAQ answers come from the knowledge base; stop serving them
+                if collection_name == COLLECTION_KNOWLEDGE:
+                    delete_faq_index()
+                # Structured answers come from the inventory table
+                if collection_name == COLLECTION_INVENTORY:
+                    delete_inventory_table()
                 st.success(f"Deleted {delete_category} collection")
                 st.rerun()
             else:
@@ -25,10 +25,42 @@ WEAVIATE_URL = os.getenv("WEAVIATE_URL", "")
 WEAVIATE_API_KEY = os.getenv("WEAVIATE_API_KEY", "")
 USE_EMBEDDED_WEAVIATE = not WEAVIATE_URL
 
+# Vector backend: "weaviate" (cloud, or embedded when WEAVIATE_URL is unset)
+# or "local" (in-process memory-mapped index under CACHE_DIR, no server)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "weaviate")
+
+# Vector quantization: "none", "int8" (4x smaller) or "binary" (32x smaller).
+# The coarse search over codes keeps k * factor candidates, which are then
+# rescored with full-precision vectors. Weaviate applies it to new collections
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none")
+QUANTIZATION_RESCORE_FACTOR = int(os.getenv("QUANTIZATION_RESCORE_FACTOR", "8"))
+
 # Embedding settings
 EMBEDDING_MODEL = "models/text-embedding-004"
 EMBEDDING_DIMENSION = 768
 
+# Embedding cache settings (disk-backed, keyed by model + text hash)
+CACHE_DIR = Path(os.getenv("CACHE_DIR", str(BASE_DIR / ".cache")))
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = CACHE_DIR / "embeddings.sqlite3"
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+
+# Local vector backend files (VECTOR_BACKEND=local)
+LOCAL_INDEX_DIR = CACHE_DIR / "vector_index"
+
+# Dimension reduction of stored and query embeddings: "none", "truncate"
+# (leading dimensions) or "pca" (projection fitted over the corpus at ingest)
+EMBEDDING_REDUCTION = os.getenv("EMBEDDING_REDUCTION", "none")
+REDUCED_DIMENSION = int(os.getenv("REDUCED_DIMENSION", "256"))
+PROJECTION_PATH = LOCAL_INDEX_DIR / "projection.npz"
+
+# Web search result cache (in memory, optionally persisted to SQLite)
+WEB_CACHE_ENABLED = os.getenv("WEB_CACHE_ENABLED", "true").lower() == "true"
+WEB_CACHE_TTL_SECONDS = int(os.getenv("WEB_CACHE_TTL_SECONDS", "3600"))
+WEB_CACHE_MAX_ENTRIES = int(os.getenv("WEB_CACHE_MAX_ENTRIES", "1000"))
+WEB_CACHE_PERSIST = os.getenv("WEB_CACHE_PERSIST", "false").lower() == "true"
+WEB_CACHE_PATH = CACHE_DIR / "web_search.sqlite3"
+
 # LLM settings
 LLM_MODEL = "gemini-2.0-flash"
 LLM_TEMPERATURE = 0.1
@@ -37,10 +69,90 @@ LLM_MAX_TOKENS = 8192
 # RAG settings
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
-TOP_K_RESULTS = 5
+TOP_K_RESULTS = int(os.getenv("TOP_K_RESULTS", "5"))
 RELEVANCE_THRESHOLD = 0.7
 
+# Context assembly: retrieved chunks are merged, deduplicated and packed into
+# this many estimated tokens (0 = no limit) before they reach the LLM
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.9"))
+CONTEXT_CHARS_PER_TOKEN = 4
+
+# Reranking: each collection returns RERANK_FETCH_FACTOR x TOP_K_RESULTS
+# candidates, narrowed to TOP_K_RESULTS by MMR (see RERANK_SETTINGS)
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() == "true"
+RERANK_FETCH_FACTOR = int(os.getenv("RERANK_FETCH_FACTOR", "4"))
+
+# Retrieval mode: "hybrid" (BM25 + vector) or "vector"
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+HYBRID_ALPHA = float(os.getenv("HYBRID_ALPHA", "0.6"))  # 1.0 = pure vector, 0.0 = pure BM25
+HYBRID_FUSION = os.getenv("HYBRID_FUSION", "relative_score")  # or "ranked" (reciprocal rank)
+
+# Routing: below this confidence every collection is searched
+ROUTE_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTE_CONFIDENCE_THRESHOLD", "0.6"))
+ROUTER_PROTOTYPES_PATH = CACHE_DIR / "router_prototypes.npz"
+
+# FAQ fast path: queries this similar to an ingested FAQ question get its
+# stored answer directly, without retrieval or the LLM
+FAQ_MATCH_THRESHOLD = float(os.getenv("FAQ_MATCH_THRESHOLD", "0.92"))
+FAQ_INDEX_PATH = CACHE_DIR / "faq_index.npz"
+
+# Columnar inventory table for counts, min/max and listings answered without
+# retrieval; listings longer than the limit are truncated
+INVENTORY_TABLE_PATH = CACHE_DIR / "inventory_table.npz"
+STRUCTURED_LIST_LIMIT = int(os.getenv("STRUCTURED_LIST_LIMIT", "20"))
+
+# Speculative web search: start Tavily alongside retrieval when routing
+# confidence is below ROUTE_CONFIDENCE_THRESHOLD. The search is cancelled if
+# retrieval confidence reaches RELEVANCE_THRESHOLD and its results are added
+# to the context otherwise. Waiting for any web search result is bounded by
+# WEB_SEARCH_TIMEOUT_SECONDS.
+SPECULATIVE_WEB_SEARCH = os.getenv("SPECULATIVE_WEB_SEARCH", "false").lower() == "true"
+WEB_SEARCH_TIMEOUT_SECONDS = float(os.getenv("WEB_SEARCH_TIMEOUT_SECONDS", "15"))
+
+# Semantic answer cache: reuse an answer when a new query embedding is at
+# least this cosine-similar to a cached one. Answers that used web search
+# expire sooner; the others live until their collections are written to.
+# Every write to a collection, from any process, rewrites its stamp file here
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+ANSWER_CACHE_WEB_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_WEB_TTL_SECONDS", "900"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+WRITE_STAMP_DIR = CACHE_DIR / "write_stamps"
+
+# Retrieval fan-out settings
+RETRIEVAL_MAX_WORKERS = int(os.getenv("RETRIEVAL_MAX_WORKERS", "8"))
+RETRIEVAL_TIMEOUT_SECONDS = float(os.getenv("RETRIEVAL_TIMEOUT_SECONDS", "5.0"))
+# Threads for retrieve_batch(), separate from the interactive pool above
+RETRIEVAL_BATCH_WORKERS = int(os.getenv("RETRIEVAL_BATCH_WORKERS", "16"))
+
+# Ingestion batching (batch size 0 lets Weaviate size batches dynamically)
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "100"))
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "2"))
+INGEST_MANIFEST_PATH = CACHE_DIR / "ingest_manifest.json"
+
+# Inventory fields that change often; updating them never triggers re-embedding
+INVENTORY_VOLATILE_FIELDS = ("price", "status", "mileage")
+
+# HTTP API (server/api.py): concurrent queries per worker and how long a
+# request may wait for a free slot before getting a 503
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "32"))
+API_QUEUE_TIMEOUT_SECONDS = float(os.getenv("API_QUEUE_TIMEOUT_SECONDS", "10"))
+
 # Collection names
 COLLECTION_INVENTORY = "CarInventory"
 COLLECTION_KNOWLEDGE = "DealershipKnowledge"
 COLLECTION_POLICIES = "DealershipPolicies"
+
+# Per-collection MMR settings: mmr_lambda trades relevance (1.0) against
+# diversity, lexical_weight mixes query term overlap into relevance.
+# Collections not listed are not reranked.
+RERANK_SETTINGS = {
+    COLLECTION_INVENTORY: {"mmr_lambda": 0.5, "lexical_weight": 0.3},
+    COLLECTION_KNOWLEDGE: {"mmr_lambda": 0.7, "lexical_weight": 0.2},
+    COLLECTION_POLICIES: {"mmr_lambda": 0.7, "lexical_weight": 0.1},
+}
@@ -9,6 +9,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.components.chat import render_chat, clear_chat
 from app.components.data_manager import render_data_manager
+from app.config import VECTOR_BACKEND
 
 
 # Page configuration
@@ -76,7 +77,7 @@ def main():
         
         # Footer
         st.caption("Powered by LangGraph + Gemini")
-        st.caption("Vector DB: Weaviate")
+        st.caption("Vector DB: " + ("local index" if VECTOR_BACKEND == "local" else "Weaviate"))
     
     # Main content
     if page == "💬 Chat":
@@ -0,0 +1,85 @@
+"""Incremental ingestion of source files into the vector store."""
+
+import json
+from typing import Callable, List
+
+from langchain_core.documents import Document
+
+from app.config import COLLECTION_INVENTORY
+from data.loader import load_inventory_records, inventory_record_to_document
+from data.manifest import IngestManifest, file_hash
+from data.processor import process_documents
+from rag.vectorstore import add_documents, content_hash, delete_documents, document_id
+
+
+def chunk_fingerprint(doc: Document) -> str:
+    """
+    Hash everything written for a chunk: its text and its metadata.
+
+    Inventory chunk IDs stay the same when price, status or mileage change,
+    so the manifest compares fingerprints to notice those updates.
+    """
+    metadata = json.dumps(doc.metadata, sort_keys=True, default=str)
+    return content_hash(f"{doc.page_content}\n{metadata}")
+
+
+def ingest_source(
+    collection_name: str,
+    source_name: str,
+    file_bytes: bytes,
+    build_documents: Callable[[bytes], List[Document]],
+    manifest: IngestManifest,
+    dry_run: bool = False,
+    full: bool = False,
+) -> dict:
+    """
+    Incrementally ingest one source file into a collection.
+
+    Unchanged files are skipped without processing. For changed files only
+    new chunks are embedded and written, chunks whose properties changed are
+    updated, and chunks that no longer exist in the source are deleted.
+
+    Args:
+        collection_name: Target collection
+        source_name: Source name recorded on each chunk
+        file_bytes: Raw file contents
+        build_documents: Callable turning the file bytes into processed chunks
+        manifest: Ingestion manifest to diff against and update
+        dry_run: Only compute the diff, don't write anything
+        full: Reprocess the file even if its hash is unchanged
+
+    Returns:
+        Report dict describing the diff and the writes performed
+    """
+    digest = file_hash(file_bytes)
+    if not full and manifest.is_unchanged(collection_name, source_name, digest):
+        return {"status": "unchanged"}
+
+    # Chunk IDs depend on the source, so pin it to the manifest's source name
+    documents = build_documents(file_bytes)
+    for doc in documents:
+        doc.metadata["source"] = source_name
+    chunks = {document_id(collection_name, doc): chunk_fingerprint(doc) for doc in documents}
+    diff = manifest.diff(collection_name, source_name, chunks)
+
+    if dry_run:
+        return {**diff, "dry_run": True, "embedding_calls": len(diff["added"])}
+
+    report = add_documents(collection_name, documents)
+    report["deleted"] = delete_documents(collection_name, diff["removed"])
+
+    manifest.update(collection_name, source_name, digest, chunks)
+    manifest.save()
+    return {**diff, **report}
+
+
+def build_inventory_documents(file_bytes: bytes, file_name: str = "inventory.json") -> List[Document]:
+    """Build VIN-keyed inventory chunks from a JSON or CSV inventory feed."""
+    records = load_inventory_records(file_bytes=file_bytes, file_name=file_name)
+    return build_inventory_record_documents(records, file_name)
+
+
+def build_inventory_record_documents(records: List[dict], file_name: str) -> List[Document]:
+    """Build VIN-keyed inventory chunks from already loaded inventory records."""
+    docs = [inventory_record_to_document(record) for record in records]
+    return process_documents(docs, COLLECTION_INVENTORY, file_name)
@@ -2,6 +2,7 @@
 
 import json
 import csv
+import hashlib
 from pathlib import Path
 from typing import List
 from io import BytesIO, StringIO
@@ -10,6 +11,14 @@ from langchain_core.documents import Document
 from pypdf import PdfReader
 from docx import Document as DocxDocument
 
+from app.config import INVENTORY_VOLATILE_FIELDS
+
+# Inventory fields parsed as numbers when loaded from CSV
+INVENTORY_NUMERIC_FIELDS = ("price", "year", "mileage")
+
+# Inventory fields stored as typed, filterable properties
+INVENTORY_FILTER_FIELDS = ("make", "year", "type", "fuel_type", "price", "mileage", "status")
+
 
 def load_pdf(file_path: str = None, file_bytes: bytes = None) -> List[Document]:
     """Load text from a PDF file."""
@@ -138,6 +147,82 @@ def format_dict_as_text(data: dict) -> str:
     return "\n".join(lines)
 
 
+def _coerce_inventory_record(record: dict) -> dict:
+    """Normalize an inventory record loaded from JSON or CSV."""
+    record = {key.strip(): value for key, value in record.items() if key}
+    
+    for field in INVENTORY_NUMERIC_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str) and value.strip():
+            number = float(value.replace(",", "").replace("$", "").strip())
+            record[field] = int(number) if number.is_integer() else number
+    
+    # CSV feeds list features as "a; b; c"
+    features = record.get("features")
+    if isinstance(features, str):
+        record["features"] = [f.strip() for f in features.replace("|", ";").split(";") if f.strip()]
+    
+    return record
+
+
+def load_inventory_records(file_path: str = None, file_bytes: bytes = None, file_name: str = None) -> List[dict]:
+    """
+    Load raw inventory records from a JSON or CSV feed.
+    
+    Args:
+        file_path: Path to the feed (for local files)
+        file_bytes: Raw feed bytes (for uploaded files)
+        file_name: Original filename (needed when using file_bytes)
+        
+    Returns:
+        List of vehicle records, each with a ``vin``
+    """
+    extension = Path(file_path or file_name or "").suffix.lower()
+    if file_bytes is None:
+        with open(file_path, "rb") as f:
+            file_bytes = f.read()
+    content = file_bytes.decode("utf-8")
+    
+    if extension == ".csv":
+        records = list(csv.DictReader(StringIO(content)))
+    elif extension == ".json":
+        records = json.loads(content)
+        if isinstance(records, dict):
+            records = records.get("inventory", records.get("vehicles", [records]))
+    else:
+        raise ValueError(f"Unsupported inventory feed format: {extension}")
+    
+    records = [_coerce_inventory_record(r) for r in records if isinstance(r, dict)]
+    missing = [i for i, r in enumerate(records) if not r.get("vin")]
+    if missing:
+        raise ValueError(f"Inventory records without a VIN at rows: {missing[:10]}")
+    return records
+
+
+def inventory_record_to_document(record: dict) -> Document:
+    """
+    Convert an inventory record into a Document keyed by VIN.
+    
+    The content hash only covers descriptive fields, so changes to volatile
+    fields (price, status, mileage) keep the same object ID and vector.
+    """
+    descriptive = {k: v for k, v in record.items() if k not in INVENTORY_VOLATILE_FIELDS}
+    descriptive_text = json.dumps(descriptive, sort_keys=True, default=str)
+    
+    metadata = {
+        "vin": record["vin"],
+        "record_key": record["vin"],
+        "content_hash": hashlib.sha256(descriptive_text.encode("utf-8")).hexdigest(),
+    }
+    for field in INVENTORY_FILTER_FIELDS:
+        if record.get(field) is not None:
+            metadata[field] = record[field]
+    if "price" in metadata:
+        metadata["price"] = float(metadata["price"])
+    
+    return Document(page_content=format_dict_as_text(record), metadata=metadata)
+
+
 def load_file(file_path: str = None, file_bytes: bytes = None, file_name: str = None) -> List[Document]:
     """
     Load documents from a file based on its extension.
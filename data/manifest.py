@@ -0,0 +1,97 @@
+"""Ingestion manifest tracking what each source has written to the vector store."""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.config import INGEST_MANIFEST_PATH
+
+
+def file_hash(file_bytes: bytes) -> str:
+    """Hash raw file contents."""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+class IngestManifest:
+    """
+    Local record of ingested sources.
+
+    Each (collection, source) entry stores the hash of the file it was built
+    from and the object IDs and fingerprints of the chunks it produced, so
+    the next ingest only has to write what changed.
+    """
+
+    def __init__(self, path: Path = INGEST_MANIFEST_PATH):
+        self.path = Path(path)
+        self.sources: Dict[str, dict] = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.sources = json.load(f).get("sources", {})
+
+    @staticmethod
+    def source_key(collection_name: str, source: str) -> str:
+        return f"{collection_name}:{source}"
+
+    def get(self, collection_name: str, source: str) -> Optional[dict]:
+        """Get the manifest entry for a source, if it was ingested before."""
+        return self.sources.get(self.source_key(collection_name, source))
+
+    def is_unchanged(self, collection_name: str, source: str, digest: str) -> bool:
+        """Check whether a source was already ingested from identical file contents."""
+        entry = self.get(collection_name, source)
+        return entry is not None and entry["file_hash"] == digest
+
+    def diff(self, collection_name: str, source: str, chunks: Dict[str, str]) -> dict:
+        """
+        Compare freshly processed chunks with the recorded ones.
+
+        Args:
+            collection_name: Target collection
+            source: Source name
+            chunks: Mapping of object ID to fingerprint for the new chunks
+
+        Returns:
+            Dict with added, changed (same ID, new fingerprint, e.g. a
+            price update), removed and unchanged object ID lists
+        """
+        entry = self.get(collection_name, source)
+        previous = entry["chunks"] if entry else {}
+        return {
+            "added": [chunk_id for chunk_id in chunks if chunk_id not in previous],
+            "changed": [
+                chunk_id for chunk_id, fingerprint in chunks.items()
+                if chunk_id in previous and previous[chunk_id] != fingerprint
+            ],
+            "removed": [chunk_id for chunk_id in previous if chunk_id not in chunks],
+            "unchanged": [
+                chunk_id for chunk_id, fingerprint in chunks.items()
+                if previous.get(chunk_id) == fingerprint
+            ],
+        }
+
+    def update(self, collection_name: str, source: str, digest: str, chunks: Dict[str, str]):
+        """Record the file hash and chunks now stored for a source."""
+        self.sources[self.source_key(collection_name, source)] = {
+            "collection": collection_name,
+            "source": source,
+            "file_hash": digest,
+            "chunks": chunks,
+            "updated_at": time.time(),
+        }
+
+    def remove_collection(self, collection_name: str):
+        """Forget every source stored in a collection."""
+        self.sources = {
+            key: entry for key, entry in self.sources.items()
+            if entry["collection"] != collection_name
+        }
+
+    def save(self):
+        """Write the manifest to disk atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "sources": self.sources}, f, indent=2)
+        tmp_path.replace(self.path)
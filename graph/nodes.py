@@ -1,17 +1,57 @@
 """LangGraph nodes for the RAG workflow."""
 
+import asyncio
+import re
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, AIMessage
 from typing import Literal
 
-from app.config import GOOGLE_API_KEY, LLM_MODEL, LLM_TEMPERATURE, RELEVANCE_THRESHOLD
+from app.clients import get_registry
+from app.config import (
+    ANSWER_CACHE_ENABLED,
+    GOOGLE_API_KEY,
+    LLM_MODEL,
+    LLM_TEMPERATURE,
+    RELEVANCE_THRESHOLD,
+    ROUTE_CONFIDENCE_THRESHOLD,
+    SPECULATIVE_WEB_SEARCH,
+    COLLECTION_INVENTORY,
+    COLLECTION_KNOWLEDGE,
+    COLLECTION_POLICIES,
+)
 from graph.state import ConversationState
-from rag.retriever import retrieve_with_scores, format_retrieved_context
-from tools.web_search import web_search, format_web_results
+from rag.answer_cache import get_answer_cache
+from rag.context import build_context
+from rag.faq_index import get_faq_index
+from rag.inventory_table import (
+    format_structured_answer,
+    format_vehicle,
+    get_inventory_table,
+    parse_inventory_intent,
+)
+from rag.filters import extract_inventory_constraints
+from rag.router import get_router
+from rag.retriever import (
+    aembed_query,
+    aretrieve_with_scores,
+    embed_query,
+    retrieval_confidence,
+    retrieve_with_scores,
+    format_retrieved_context,
+)
+from tools.web_search import (
+    aweb_search,
+    web_search,
+    start_web_search,
+    record_speculative,
+    wait_web_search,
+    await_web_search,
+    format_web_results,
+)
 
 
-def get_llm():
-    """Get the Gemini LLM instance."""
+def _create_llm() -> ChatGoogleGenerativeAI:
+    """Build the Gemini chat model."""
     return ChatGoogleGenerativeAI(
         model=LLM_MODEL,
         google_api_key=GOOGLE_API_KEY,
@@ -19,6 +59,11 @@ def get_llm():
     )
 
 
+def get_llm():
+    """Get the shared Gemini LLM instance."""
+    return get_registry().get("llm", _create_llm)
+
+
 # System prompt for the RAG assistant
 SYSTEM_PROMPT = """You are a helpful car dealership assistant. Your role is to help customers with:
 - Finding vehicles in our inventory
@@ -42,36 +87,396 @@ Web search results (if available):
 """
 
 
+# Fallback keywords per query type (used until router prototypes are built),
+# in priority order for ties
+ROUTE_KEYWORDS = {
+    "inventory": ["car", "vehicle", "suv", "sedan", "truck", "price", "mileage", "inventory", "available"],
+    "knowledge": ["financing", "loan", "payment", "warranty", "trade", "faq"],
+    "policy": ["policy", "return", "refund", "terms", "service"],
+    "web": ["latest", "news", "current", "2024", "2025", "market", "trend"],
+}
+
+# Collections searched for each confidently routed query type
+ROUTE_COLLECTIONS = {
+    "inventory": [COLLECTION_INVENTORY],
+    "knowledge": [COLLECTION_KNOWLEDGE],
+    "policy": [COLLECTION_POLICIES],
+    "web": [],
+}
+
+ALL_COLLECTIONS = [COLLECTION_INVENTORY, COLLECTION_KNOWLEDGE, COLLECTION_POLICIES]
+
+
+def _keyword_route(query: str) -> tuple:
+    """
+    Fallback keyword routing; confidence is the winning share of keyword hits.
+    
+    Returns:
+        (query_type, confidence, share of keyword hits per query type)
+    """
+    hits = {
+        query_type: sum(1 for word in keywords if re.search(rf"\b{word}s?\b", query))
+        for query_type, keywords in ROUTE_KEYWORDS.items()
+    }
+    total = sum(hits.values())
+    if not total:
+        return "general", 0.0, {}
+    shares = {query_type: count / total for query_type, count in hits.items()}
+    query_type = max(hits, key=hits.get)
+    return query_type, shares[query_type], shares
+
+
+def _should_speculate(route_confidence: float) -> bool:
+    """
+    Start web search during retrieval when the router is unsure of the query.
+    
+    Low routing confidence means the query is time-sensitive (web queries
+    not confident enough to skip retrieval) or may not be covered by any one
+    collection. Confidently routed queries either search the web directly
+    or are likely answered locally.
+    """
+    return SPECULATIVE_WEB_SEARCH and route_confidence < ROUTE_CONFIDENCE_THRESHOLD
+
+
+def _needs_web_results(state: ConversationState) -> bool:
+    """Whether retrieval left the query to web search: web queries and unconfident local results."""
+    return state["query_type"] == "web" or state["retrieval_confidence"] < RELEVANCE_THRESHOLD
+
+
+def check_answer_cache(state: ConversationState) -> ConversationState:
+    """Answer from the semantic cache if a near-identical question was answered before."""
+    if not ANSWER_CACHE_ENABLED:
+        return state
+    
+    # The embedding is needed for the lookup; routing and retrieval reuse it
+    query_embedding = state.get("query_embedding") or embed_query(state["query"])
+    return _apply_cache_lookup(state, query_embedding)
+
+
+async def acheck_answer_cache(state: ConversationState) -> ConversationState:
+    """Async check_answer_cache()."""
+    if not ANSWER_CACHE_ENABLED:
+        return state
+    
+    query_embedding = state.get("query_embedding") or await aembed_query(state["query"])
+    return _apply_cache_lookup(state, query_embedding)
+
+
+def _apply_cache_lookup(state: ConversationState, query_embedding: list) -> ConversationState:
+    """Fill in the cached answer on a hit; otherwise just keep the embedding."""
+    # Constraints aren't extracted yet at this point; paraphrases with other
+    # prices or years must not share an answer
+    hit = get_answer_cache().lookup(query_embedding, extract_inventory_constraints(state["query"]))
+    state = {**state, "query_embedding": query_embedding}
+    
+    if hit is None:
+        return {**state, "trace": {**state.get("trace", {}), "answer_cache": {"hit": False}}}
+    
+    state = _response_update(state, hit["response"])
+    return {
+        **state,
+        "query_type": hit["query_type"],
+        "sources": hit["sources"],
+        "used_web_search": hit["used_web_search"],
+        "trace": {
+            **state.get("trace", {}),
+            "answer_cache": {"hit": True, "similarity": round(hit["similarity"], 4)},
+        },
+    }
+
+
+def route_after_cache(state: ConversationState) -> Literal["route", "end"]:
+    """Finish early on an answer cache hit."""
+    if state.get("trace", {}).get("answer_cache", {}).get("hit"):
+        return "end"
+    return "route"
+
+
+def cache_answer(state: ConversationState) -> ConversationState:
+    """Store the generated answer in the semantic cache."""
+    if not ANSWER_CACHE_ENABLED or state.get("query_embedding") is None:
+        return state
+    
+    # Don't keep answers built on failed web searches or incomplete retrieval
+    trace = state.get("trace", {})
+    retrieval = trace.get("retrieval", {})
+    if any(source.get("source") == "error" for source in state.get("sources", [])):
+        return state
+    if any(status.get("status") != "ok" for status in retrieval.values()):
+        return state
+    
+    answer = {
+        "response": state["response"],
+        "sources": state.get("sources", []),
+        "used_web_search": state.get("used_web_search", False),
+        "query_type": state.get("query_type", ""),
+    }
+    get_answer_cache().store(
+        state["query_embedding"],
+        answer,
+        collections=list(retrieval),
+        constraints=extract_inventory_constraints(state["query"]),
+    )
+    return state
+
+
 def route_query(state: ConversationState) -> ConversationState:
     """Classify the query to determine routing."""
-    query = state["query"].lower()
+    router = get_router()
+    faq_index = get_faq_index()
+    query_embedding = state.get("query_embedding")
     
-    # Simple keyword-based routing
-    if any(word in query for word in ["car", "vehicle", "suv", "sedan", "truck", "price", "mileage", "inventory", "available"]):
-        query_type = "inventory"
-    elif any(word in query for word in ["financing", "loan", "payment", "warranty", "trade", "faq"]):
-        query_type = "knowledge"
-    elif any(word in query for word in ["policy", "return", "refund", "terms", "service"]):
-        query_type = "policy"
-    elif any(word in query for word in ["latest", "news", "current", "2024", "2025", "market", "trend"]):
-        query_type = "web"
+    # Compare the query embedding with per-type prototypes and FAQ questions;
+    # retrieval reuses the vector
+    if (router is not None or faq_index is not None) and query_embedding is None:
+        query_embedding = embed_query(state["query"])
+    
+    return _apply_route(state, router, faq_index, query_embedding)
+
+
+async def aroute_query(state: ConversationState) -> ConversationState:
+    """Async route_query()."""
+    router = get_router()
+    faq_index = get_faq_index()
+    query_embedding = state.get("query_embedding")
+    
+    if (router is not None or faq_index is not None) and query_embedding is None:
+        query_embedding = await aembed_query(state["query"])
+    
+    return _apply_route(state, router, faq_index, query_embedding)
+
+
+def _apply_route(state: ConversationState, router, faq_index, query_embedding) -> ConversationState:
+    """Classify with the router (or keywords), match FAQs and extract inventory constraints."""
+    faq_match = faq_index.match(query_embedding) if faq_index is not None else None
+    
+    if router is not None:
+        query_type, route_confidence, scores = router.classify(query_embedding)
+        method = "prototype"
     else:
-        query_type = "general"
+        query_type, route_confidence, scores = _keyword_route(state["query"].lower())
+        method = "keyword"
+    
+    # Price, year and mileage phrases become where-filters on the inventory
+    constraints = extract_inventory_constraints(state["query"])
+    if constraints and query_type == "general":
+        query_type = "inventory"
+        route_confidence = 1.0
+    search_filters = {COLLECTION_INVENTORY: constraints} if constraints else {}
     
-    return {**state, "query_type": query_type}
+    # Counts, superlatives and listings are answered from the whole inventory
+    table = get_inventory_table()
+    inventory_intent = (
+        parse_inventory_intent(state["query"], table.makes, table.models) if table is not None else None
+    )
+    if inventory_intent:
+        query_type = "inventory"
+    speculative_web = _should_speculate(route_confidence) and not (inventory_intent or faq_match)
+    
+    state = {
+        **state,
+        "query_type": query_type,
+        "route_confidence": route_confidence,
+        "search_filters": search_filters,
+        "query_embedding": query_embedding,
+        "speculative_web": speculative_web,
+        "faq_match": faq_match,
+        "inventory_intent": inventory_intent,
+    }
+    route_trace = {
+        "query_type": query_type,
+        "confidence": round(route_confidence, 3),
+        "method": method,
+        "collections": select_collections(state),
+        "speculative_web": speculative_web,
+    }
+    if faq_match:
+        route_trace["faq_similarity"] = round(faq_match["similarity"], 4)
+    if inventory_intent:
+        route_trace["inventory_intent"] = inventory_intent["op"]
+    return {**state, "trace": {**state.get("trace", {}), "route": route_trace}}
+
+
+def select_collections(state: ConversationState) -> list:
+    """Pick the collections to search from the routed query type and confidence."""
+    if state.get("route_confidence", 0.0) < ROUTE_CONFIDENCE_THRESHOLD:
+        return ALL_COLLECTIONS
+    return ROUTE_COLLECTIONS.get(state["query_type"], ALL_COLLECTIONS)
+
+
+def route_after_classify(
+    state: ConversationState,
+) -> Literal["faq_answer", "structured_answer", "retrieve", "web_search"]:
+    """Answer matched FAQs and inventory aggregates directly; send confidently web-bound queries straight to web search."""
+    if state.get("faq_match"):
+        return "faq_answer"
+    if state.get("inventory_intent"):
+        return "structured_answer"
+    if state["query_type"] == "web" and not select_collections(state):
+        return "web_search"
+    return "retrieve"
+
+
+def faq_answer(state: ConversationState) -> ConversationState:
+    """Answer with the stored FAQ answer, without retrieval or the LLM."""
+    faq = state["faq_match"]
+    state = _response_update(state, faq["answer"])
+    
+    return {
+        **state,
+        "query_type": "knowledge",
+        "sources": [
+            {
+                "content": f"Q: {faq['question']}\nA: {faq['answer']}"[:200] + "...",
+                "source": faq["source"],
+                "category": COLLECTION_KNOWLEDGE
+            }
+        ],
+        "trace": {
+            **state.get("trace", {}),
+            "fast_path": "faq",
+            "faq": {"question": faq["question"], "similarity": round(faq["similarity"], 4)},
+        },
+    }
+
+
+def structured_answer(state: ConversationState) -> ConversationState:
+    """Answer count, min/max and listing questions from the inventory table, without the LLM."""
+    intent = state["inventory_intent"]
+    result = get_inventory_table().run(intent)
+    state = _response_update(state, format_structured_answer(intent, result))
+    
+    return {
+        **state,
+        "sources": [
+            {
+                "content": format_vehicle(row),
+                "source": "inventory",
+                "category": COLLECTION_INVENTORY
+            }
+            for row in result["rows"][:5]
+        ],
+        "trace": {
+            **state.get("trace", {}),
+            "fast_path": "structured",
+            "structured": {"op": intent["op"], "filters": intent["filters"], "matches": result["count"]},
+        },
+    }
 
 
 def retrieve_documents(state: ConversationState) -> ConversationState:
     """Retrieve documents from vector store."""
     query = state["query"]
     
-    # Get documents with scores
-    results = retrieve_with_scores(query)
+    # Embed the query once and reuse the vector for every collection
+    query_embedding = state.get("query_embedding") or embed_query(query)
+    
+    # Likely fallbacks start web search now instead of after retrieval
+    web_future = None
+    if state.get("speculative_web"):
+        web_future = start_web_search(query)
+        record_speculative("launched")
+    
+    # Search only the routed collections, recording per-collection status
+    collections = select_collections(state) or ALL_COLLECTIONS
+    collection_trace = {}
+    results = retrieve_with_scores(
+        query,
+        collections=collections,
+        query_vector=query_embedding,
+        trace=collection_trace,
+        filters=state.get("search_filters"),
+    )
+    
+    # Fall back to the remaining collections if the routed ones had nothing
+    remaining = [name for name in ALL_COLLECTIONS if name not in collections]
+    if not results and remaining:
+        results = retrieve_with_scores(
+            query,
+            collections=remaining,
+            query_vector=query_embedding,
+            trace=collection_trace,
+            filters=state.get("search_filters"),
+        )
+    
+    update = _retrieval_update(state, results, query_embedding, collection_trace)
+    if web_future is None:
+        return update
+    
+    # Keep the web results unless the local ones came back confident
+    if _needs_web_results(update):
+        return _settle_speculation(update, wait_web_search(web_future))
+    web_future.cancel()
+    return _settle_speculation(update, None)
+
+
+async def aretrieve_documents(state: ConversationState) -> ConversationState:
+    """Async retrieve_documents() using async embeddings and Weaviate clients."""
+    query = state["query"]
+    query_embedding = state.get("query_embedding") or await aembed_query(query)
+    
+    web_task = None
+    if state.get("speculative_web"):
+        web_task = asyncio.create_task(aweb_search(query))
+        record_speculative("launched")
+    
+    collections = select_collections(state) or ALL_COLLECTIONS
+    collection_trace = {}
+    results = await aretrieve_with_scores(
+        query,
+        collections=collections,
+        query_vector=query_embedding,
+        trace=collection_trace,
+        filters=state.get("search_filters"),
+    )
+    
+    remaining = [name for name in ALL_COLLECTIONS if name not in collections]
+    if not results and remaining:
+        results = await aretrieve_with_scores(
+            query,
+            collections=remaining,
+            query_vector=query_embedding,
+            trace=collection_trace,
+            filters=state.get("search_filters"),
+        )
+    
+    update = _retrieval_update(state, results, query_embedding, collection_trace)
+    if web_task is None:
+        return update
+    
+    if _needs_web_results(update):
+        return _settle_speculation(update, await await_web_search(web_task))
+    web_task.cancel()
+    return _settle_speculation(update, None)
+
+
+def _settle_speculation(state: ConversationState, web_results) -> ConversationState:
+    """Record whether a speculative web search was used (results given) or wasted."""
+    outcome = "wasted" if web_results is None else "used"
+    record_speculative(outcome)
+    return {
+        **state,
+        "web_results": web_results,
+        "trace": {**state["trace"], "speculative_web": outcome},
+    }
+
+
+def _retrieval_update(
+    state: ConversationState,
+    results: list,
+    query_embedding: list,
+    collection_trace: dict,
+) -> ConversationState:
+    """Build the state update for retrieved (Document, score) results."""
+    trace = {**state.get("trace", {}), "retrieval": collection_trace}
     
     if results:
-        # Calculate average confidence
-        avg_score = sum(score for _, score in results) / len(results)
-        docs = [doc for doc, _ in results]
+        # Confidence from vector similarity, comparable across collections
+        avg_score = retrieval_confidence(results)
+        
+        # Merge neighbouring chunks, drop duplicates and fit the token budget
+        docs, context_stats = build_context(results)
+        trace["context"] = context_stats
         
         # Format sources
         sources = [
@@ -90,11 +495,15 @@ def retrieve_documents(state: ConversationState) -> ConversationState:
             "retrieved_docs": [{"content": d.page_content, "metadata": d.metadata} for d in docs],
             "context": context,
             "retrieval_confidence": avg_score,
-            "sources": sources
+            "sources": sources,
+            "query_embedding": query_embedding,
+            "trace": trace
         }
     
     return {
         **state,
+        "query_embedding": query_embedding,
+        "trace": trace,
         "retrieved_docs": [],
         "context": "",
         "retrieval_confidence": 0.0,
@@ -108,6 +517,10 @@ def check_relevance(state: ConversationState) -> Literal["generate", "web_search
     if state["query_type"] == "web":
         return "web_search"
     
+    # A speculative search kept after retrieval adds its results to the context
+    if state.get("web_results") is not None:
+        return "web_search"
+    
     if state["retrieval_confidence"] < RELEVANCE_THRESHOLD and not state["retrieved_docs"]:
         return "web_search"
     
@@ -116,9 +529,23 @@ def check_relevance(state: ConversationState) -> Literal["generate", "web_search
 
 def perform_web_search(state: ConversationState) -> ConversationState:
     """Perform web search for additional context."""
-    query = state["query"]
-    
-    results = web_search(query)
+    # Reuse results from a speculative search started during retrieval
+    results = state.get("web_results")
+    if results is None:
+        results = web_search(state["query"])
+    return _web_search_update(state, results)
+
+
+async def aperform_web_search(state: ConversationState) -> ConversationState:
+    """Async perform_web_search() using the async Tavily client."""
+    results = state.get("web_results")
+    if results is None:
+        results = await aweb_search(state["query"])
+    return _web_search_update(state, results)
+
+
+def _web_search_update(state: ConversationState, results: list) -> ConversationState:
+    """Merge web search results into the context and sources."""
     web_context = format_web_results(results)
     
     # Add web sources
@@ -139,10 +566,8 @@ def perform_web_search(state: ConversationState) -> ConversationState:
     }
 
 
-def generate_response(state: ConversationState) -> ConversationState:
-    """Generate response using the LLM."""
-    llm = get_llm()
-    
+def _build_prompt(state: ConversationState) -> str:
+    """Build the full LLM prompt from the retrieved context and the question."""
     context = state.get("context", "No relevant information found.")
     web_context = "Web search was used for this query." if state.get("used_web_search") else "No web search performed."
     
@@ -152,20 +577,46 @@ def generate_response(state: ConversationState) -> ConversationState:
         web_context=web_context
     )
     
-    # Get conversation history
-    messages = state.get("messages", [])
-    
     # Create prompt with system context
-    full_prompt = f"{system_message}\n\nUser question: {state['query']}"
-    
-    # Generate response
-    response = llm.invoke(full_prompt)
+    return f"{system_message}\n\nUser question: {state['query']}"
+
+
+def _response_update(state: ConversationState, content: str) -> ConversationState:
+    """Record the generated answer and extend the conversation history."""
+    messages = state.get("messages", [])
     
     return {
         **state,
-        "response": response.content,
+        "response": content,
         "messages": messages + [
             HumanMessage(content=state["query"]),
-            AIMessage(content=response.content)
+            AIMessage(content=content)
         ]
     }
+
+
+def generate_response(state: ConversationState) -> ConversationState:
+    """Generate response using the LLM."""
+    llm = get_llm()
+    full_prompt = _build_prompt(state)
+    
+    # Generate response; streaming lets LangGraph forward tokens as they arrive
+    response = None
+    for chunk in llm.stream(full_prompt):
+        response = chunk if response is None else response + chunk
+    content = response.content if response is not None else ""
+    
+    return _response_update(state, content)
+
+
+async def agenerate_response(state: ConversationState) -> ConversationState:
+    """Async generate_response() streaming from the LLM without blocking the loop."""
+    llm = get_llm()
+    full_prompt = _build_prompt(state)
+    
+    response = None
+    async for chunk in llm.astream(full_prompt):
+        response = chunk if response is None else response + chunk
+    content = response.content if response is not None else ""
+    
+    return _response_update(state, content)
@@ -1,6 +1,7 @@
 """Conversation state definition for LangGraph."""
 
 from typing import TypedDict, Annotated, List, Optional
+from langchain_core.documents import Document
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
 
@@ -16,6 +17,19 @@ class ConversationState(TypedDict):
     
     # Query classification
     query_type: str  # 'inventory', 'knowledge', 'policy', 'web', 'general'
+    route_confidence: float
+    
+    # FAQ whose question matches the query closely enough to answer directly
+    faq_match: Optional[dict]
+    
+    # Count, min/max or listing question answered from the inventory table
+    inventory_intent: Optional[dict]
+    
+    # Structured where-filters per collection, extracted from the query
+    search_filters: dict
+    
+    # Query embedding, computed once and reused by later stages
+    query_embedding: Optional[List[float]]
     
     # Retrieved context
     retrieved_docs: List[dict]
@@ -27,8 +41,16 @@ class ConversationState(TypedDict):
     # Whether web search was used
     used_web_search: bool
     
+    # Speculative web search: whether to start it alongside retrieval, and
+    # its results when retrieval wasn't confident enough to discard them
+    speculative_web: bool
+    web_results: Optional[List[Document]]
+    
     # Final response
     response: str
     
     # Sources for citations
     sources: List[dict]
+    
+    # Per-stage diagnostics (timings, collection status, fast paths)
+    trace: dict
@@ -1,13 +1,27 @@
 """LangGraph workflow definition."""
 
+from typing import AsyncIterator, Iterator, Optional
+from langchain_core.messages import AIMessageChunk
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 from graph.state import ConversationState
 from graph.nodes import (
+    check_answer_cache,
+    acheck_answer_cache,
+    route_after_cache,
+    cache_answer,
     route_query,
+    aroute_query,
+    route_after_classify,
+    faq_answer,
+    structured_answer,
     retrieve_documents,
+    aretrieve_documents,
     check_relevance,
     perform_web_search,
+    aperform_web_search,
     generate_response,
+    agenerate_response,
 )
 
 
@@ -17,17 +31,46 @@ def create_rag_workflow():
     # Initialize the graph
     workflow = StateGraph(ConversationState)
     
-    # Add nodes
-    workflow.add_node("route", route_query)
-    workflow.add_node("retrieve", retrieve_documents)
-    workflow.add_node("web_search", perform_web_search)
-    workflow.add_node("generate", generate_response)
+    # Add nodes; each has a sync and an async implementation so the same
+    # compiled graph serves invoke/stream and ainvoke/astream
+    workflow.add_node("check_cache", RunnableLambda(check_answer_cache, afunc=acheck_answer_cache))
+    workflow.add_node("route", RunnableLambda(route_query, afunc=aroute_query))
+    workflow.add_node("faq_answer", faq_answer)
+    workflow.add_node("structured_answer", structured_answer)
+    workflow.add_node("retrieve", RunnableLambda(retrieve_documents, afunc=aretrieve_documents))
+    workflow.add_node("web_search", RunnableLambda(perform_web_search, afunc=aperform_web_search))
+    workflow.add_node("generate", RunnableLambda(generate_response, afunc=agenerate_response))
+    workflow.add_node("cache_answer", cache_answer)
     
     # Define edges
-    workflow.set_entry_point("route")
+    workflow.set_entry_point("check_cache")
     
-    # Route -> Retrieve (always try local first unless explicitly web)
-    workflow.add_edge("route", "retrieve")
+    # Cached answer -> End, otherwise run the full pipeline
+    workflow.add_conditional_edges(
+        "check_cache",
+        route_after_cache,
+        {
+            "route": "route",
+            "end": END
+        }
+    )
+    
+    # Route -> FAQ answer for matched FAQs, Structured answer for inventory
+    # aggregates, Retrieve, or straight to web search for confident web queries
+    workflow.add_conditional_edges(
+        "route",
+        route_after_classify,
+        {
+            "faq_answer": "faq_answer",
+            "structured_answer": "structured_answer",
+            "retrieve": "retrieve",
+            "web_search": "web_search"
+        }
+    )
+    
+    # FAQ answer, Structured answer -> End
+    workflow.add_edge("faq_answer", END)
+    workflow.add_edge("structured_answer", END)
     
     # Retrieve -> Check relevance (conditional)
     workflow.add_conditional_edges(
@@ -42,8 +85,9 @@ def create_rag_workflow():
     # Web search -> Generate
     workflow.add_edge("web_search", "generate")
     
-    # Generate -> End
-    workflow.add_edge("generate", END)
+    # Generate -> Cache the answer -> End
+    workflow.add_edge("generate", "cache_answer")
+    workflow.add_edge("cache_answer", END)
     
     # Compile the graph
     return workflow.compile()
@@ -61,39 +105,126 @@ def get_workflow():
     return _workflow
 
 
-def run_query(query: str, messages: list = None) -> dict:
-    """
-    Run a query through the RAG workflow.
-    
-    Args:
-        query: User's question
-        messages: Optional conversation history
-        
-    Returns:
-        Dictionary with response, sources, and metadata
-    """
-    workflow = get_workflow()
-    
-    # Initialize state
-    initial_state = {
+def _initial_state(query: str, messages: list = None) -> dict:
+    """Build the initial workflow state for a query."""
+    return {
         "messages": messages or [],
         "query": query,
         "query_type": "",
+        "route_confidence": 0.0,
+        "faq_match": None,
+        "inventory_intent": None,
+        "search_filters": {},
+        "query_embedding": None,
         "retrieved_docs": [],
         "context": "",
         "retrieval_confidence": 0.0,
         "used_web_search": False,
+        "speculative_web": False,
+        "web_results": None,
         "response": "",
-        "sources": []
+        "sources": [],
+        "trace": {}
     }
-    
-    # Run the workflow
-    result = workflow.invoke(initial_state)
-    
+
+
+def _format_result(result: dict) -> dict:
+    """Pick the fields returned to callers from the final workflow state."""
     return {
         "response": result["response"],
         "sources": result["sources"],
         "used_web_search": result["used_web_search"],
         "query_type": result["query_type"],
-        "messages": result["messages"]
+        "messages": result["messages"],
+        "trace": result.get("trace", {})
     }
+
+
+def run_query(query: str, messages: list = None) -> dict:
+    """
+    Run a query through the RAG workflow.
+    
+    Args:
+        query: User's question
+        messages: Optional conversation history
+        
+    Returns:
+        Dictionary with response, sources, and metadata
+    """
+    workflow = get_workflow()
+    
+    # Run the workflow
+    result = workflow.invoke(_initial_state(query, messages))
+    
+    return _format_result(result)
+
+
+def run_query_stream(query: str, messages: list = None) -> Iterator[dict]:
+    """
+    Run a query through the RAG workflow, streaming the answer.
+    
+    Args:
+        query: User's question
+        messages: Optional conversation history
+        
+    Yields:
+        {"type": "token", "content": str} for each generated token, then one
+        {"type": "final", ...} event with the same fields as run_query()
+    """
+    workflow = get_workflow()
+    final_state = None
+    
+    for mode, payload in workflow.stream(
+        _initial_state(query, messages),
+        stream_mode=["messages", "values"],
+    ):
+        if mode == "messages":
+            event = _token_event(*payload)
+            if event:
+                yield event
+        else:
+            final_state = payload
+    
+    yield {"type": "final", **_format_result(final_state)}
+
+
+def _token_event(chunk, metadata: dict) -> Optional[dict]:
+    """Turn a streamed message into a token event if it is part of the answer."""
+    # Only forward answer tokens, not other LLM calls or state message updates
+    if (
+        metadata.get("langgraph_node") == "generate"
+        and isinstance(chunk, AIMessageChunk)
+        and isinstance(chunk.content, str)
+        and chunk.content
+    ):
+        return {"type": "token", "content": chunk.content}
+    return None
+
+
+async def arun_query(query: str, messages: list = None) -> dict:
+    """
+    Async run_query(): runs the workflow with ainvoke so many queries can
+    share one event loop.
+    """
+    workflow = get_workflow()
+    result = await workflow.ainvoke(_initial_state(query, messages))
+    return _format_result(result)
+
+
+async def arun_query_stream(query: str, messages: list = None) -> AsyncIterator[dict]:
+    """Async run_query_stream() built on astream; yields the same events."""
+    workflow = get_workflow()
+    final_state = None
+    
+    async for mode, payload in workflow.astream(
+        _initial_state(query, messages),
+        stream_mode=["messages", "values"],
+    ):
+        if mode == "messages":
+            event = _token_event(*payload)
+            if event:
+                yield event
+        else:
+            final_state = payload
+    
+    yield {"type": "final", **_format_result(final_state)}
@@ -0,0 +1,207 @@
+"""Semantic cache of generated answers keyed by query embedding.
+
+Paraphrases of the same question ("what's your return policy", "can I
+return a car") embed close together, so a new query whose embedding is
+within ``threshold`` cosine similarity of a cached one reuses that answer
+instead of running retrieval and generation again. Paraphrases can differ in
+the numbers that matter ("SUVs under $30,000" vs "under $40,000"), so an
+entry only matches queries with exactly the same extracted search
+constraints. Entries are dropped when a collection they drew from is
+written to: at once for writes in this process, and through the collection's
+write stamp (see rag.vectorstore.read_write_stamp) for writes made elsewhere.
+"""
+
+import json
+import threading
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from app.config import (
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_TTL_SECONDS,
+    ANSWER_CACHE_WEB_TTL_SECONDS,
+    ANSWER_CACHE_MAX_ENTRIES,
+)
+from rag.vectorstore import add_write_listener, read_write_stamp
+
+
+class SemanticAnswerCache:
+    """In-memory nearest-neighbour cache of answers over normalized query vectors."""
+
+    def __init__(
+        self,
+        threshold: float,
+        ttl_seconds: int,
+        web_ttl_seconds: int,
+        max_entries: int,
+        write_stamp: Optional[Callable[[str], Optional[str]]] = None,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.web_ttl_seconds = web_ttl_seconds
+        self.max_entries = max_entries
+        self.write_stamp = write_stamp
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: List[dict] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    @staticmethod
+    def _constraints_key(constraints: Optional[dict]) -> str:
+        return json.dumps(constraints or {}, sort_keys=True)
+
+    def lookup(self, query_vector: List[float], constraints: dict = None) -> Optional[dict]:
+        """
+        Find the cached answer closest to a query embedding.
+
+        Args:
+            query_vector: Query embedding
+            constraints: Search constraints extracted from the query (see
+                rag.filters); only entries with identical constraints match
+
+        Returns:
+            The cached entry plus its ``similarity``, or None if nothing
+            unexpired is above the threshold
+        """
+        query = self._normalize(query_vector)
+        key = self._constraints_key(constraints)
+        now = time.time()
+        with self._lock:
+            self._drop(lambda entry: entry["expires_at"] <= now)
+            self.invalidations += self._drop(self._stale_checker())
+            if self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+
+            similarities = self._vectors @ query
+            similarities[[entry["constraints"] != key for entry in self._entries]] = -np.inf
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            entry = self._entries[best]
+            entry["last_used"] = now
+            return {**entry["answer"], "similarity": float(similarities[best])}
+
+    def store(
+        self,
+        query_vector: List[float],
+        answer: dict,
+        collections: List[str],
+        constraints: dict = None,
+    ):
+        """
+        Cache an answer.
+
+        Args:
+            query_vector: Embedding of the query that produced the answer
+            answer: Fields to return on a hit (response, sources, ...)
+            collections: Collections the answer drew from
+            constraints: Search constraints extracted from the query
+        """
+        ttl = self.web_ttl_seconds if answer.get("used_web_search") else self.ttl_seconds
+        now = time.time()
+        entry = {
+            "answer": answer,
+            "collections": set(collections),
+            "constraints": self._constraints_key(constraints),
+            "stamps": self._stamps(collections),
+            "expires_at": now + ttl,
+            "last_used": now,
+        }
+        vector = self._normalize(query_vector)[np.newaxis, :]
+        with self._lock:
+            if self._vectors is not None and self._vectors.shape[1] != vector.shape[1]:
+                self._entries, self._vectors = [], None
+            self._entries.append(entry)
+            self._vectors = vector if self._vectors is None else np.vstack([self._vectors, vector])
+
+            # Evict the least recently used entries past the bound
+            if len(self._entries) > self.max_entries:
+                recency = np.argsort([entry["last_used"] for entry in self._entries])
+                self._keep(sorted(recency[-self.max_entries:].tolist()))
+
+    def _stamps(self, collections: List[str]) -> dict:
+        """Current write stamp of each collection, if stamps are tracked."""
+        if self.write_stamp is None:
+            return {}
+        return {name: self.write_stamp(name) for name in collections}
+
+    def _stale_checker(self) -> Callable[[dict], bool]:
+        """Predicate for entries whose collections were written to since they were stored."""
+        current = {}
+
+        def stale(entry: dict) -> bool:
+            for name, stamp in entry["stamps"].items():
+                if name not in current:
+                    current[name] = self.write_stamp(name)
+                if current[name] != stamp:
+                    return True
+            return False
+
+        return stale
+
+    def invalidate_collection(self, collection_name: str):
+        """Drop every answer that drew from a collection."""
+        with self._lock:
+            self.invalidations += self._drop(lambda entry: collection_name in entry["collections"])
+
+    def _drop(self, predicate) -> int:
+        """Remove entries matching ``predicate``; the lock must be held."""
+        keep = [i for i, entry in enumerate(self._entries) if not predicate(entry)]
+        removed = len(self._entries) - len(keep)
+        if removed:
+            self._keep(keep)
+        return removed
+
+    def _keep(self, indices: List[int]):
+        """Keep only the entries at ``indices``; the lock must be held."""
+        self._entries = [self._entries[i] for i in indices]
+        self._vectors = self._vectors[indices] if indices else None
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the number of cached answers."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+            }
+
+    def clear(self):
+        """Remove all cached answers."""
+        with self._lock:
+            self._entries, self._vectors = [], None
+
+
+# Global cache instance
+_cache: Optional[SemanticAnswerCache] = None
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """Get or create the process-wide answer cache, subscribed to vector store writes."""
+    global _cache
+    if _cache is None:
+        _cache = SemanticAnswerCache(
+            threshold=ANSWER_CACHE_THRESHOLD,
+            ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+            web_ttl_seconds=ANSWER_CACHE_WEB_TTL_SECONDS,
+            max_entries=ANSWER_CACHE_MAX_ENTRIES,
+            write_stamp=read_write_stamp,
+        )
+        add_write_listener(_cache.invalidate_collection)
+    return _cache
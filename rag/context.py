@@ -0,0 +1,168 @@
+"""Token-budgeted context assembly for retrieved chunks.
+
+Retrieval often returns neighbouring chunks of the same document, which
+repeat up to CHUNK_OVERLAP characters, and near-identical chunks from
+different sources. The context builder stitches neighbours back together,
+drops near-duplicates and packs the best-scoring passages into a token
+budget before they are sent to the LLM.
+"""
+
+import math
+import re
+from typing import List, Tuple
+
+from langchain_core.documents import Document
+
+from app.config import (
+    CHUNK_OVERLAP,
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_DEDUP_THRESHOLD,
+    CONTEXT_CHARS_PER_TOKEN,
+)
+
+# Metadata that must match for two chunks to come from the same document
+_DOCUMENT_KEYS = ("category", "source", "record_key", "page", "index", "row")
+
+# Shorter suffix/prefix matches are treated as coincidence, not chunk overlap
+_MIN_OVERLAP = 20
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the token count of a text from its length."""
+    return math.ceil(len(text) / CONTEXT_CHARS_PER_TOKEN)
+
+
+def _document_key(doc: Document) -> tuple:
+    return tuple(doc.metadata.get(key) for key in _DOCUMENT_KEYS)
+
+
+def _chunk_index(doc: Document):
+    index = doc.metadata.get("chunk_index")
+    return int(index) if isinstance(index, (int, float)) else None
+
+
+def _overlap(left: str, right: str, limit: int = CHUNK_OVERLAP) -> int:
+    """Length of the longest suffix of ``left`` that is a prefix of ``right``."""
+    for size in range(min(len(left), len(right), limit), _MIN_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def merge_adjacent(results: List[Tuple[Document, float]]) -> Tuple[List[Tuple[Document, float]], int]:
+    """
+    Stitch consecutive chunks of the same document into one passage.
+
+    Chunks are merged only when their overlapping text is found, since
+    unrelated documents can share a source and chunk numbering. A merged
+    passage keeps the best score of its chunks.
+
+    Returns:
+        (passages, number of chunks merged into a neighbour)
+    """
+    groups = {}
+    for doc, score in results:
+        groups.setdefault(_document_key(doc), []).append((doc, score))
+
+    passages, merged = [], 0
+    for group in groups.values():
+        group.sort(key=lambda item: (_chunk_index(item[0]) is None, _chunk_index(item[0]) or 0))
+        current = None
+        for doc, score in group:
+            index = _chunk_index(doc)
+            if current is not None and index is not None and index == current["last"] + 1:
+                size = _overlap(current["text"], doc.page_content)
+                if size:
+                    current["text"] += doc.page_content[size:]
+                    current["last"] = index
+                    current["score"] = max(current["score"], score)
+                    merged += 1
+                    continue
+            if current is not None:
+                passages.append(current)
+            current = {"doc": doc, "text": doc.page_content, "last": index, "score": score}
+        passages.append(current)
+
+    return [
+        (Document(page_content=p["text"], metadata=p["doc"].metadata), p["score"])
+        for p in passages
+    ], merged
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _is_near_duplicate(shingles: set, kept: List[set], threshold: float) -> bool:
+    """True if most of a passage's word trigrams already appear in a kept passage."""
+    for other in kept:
+        common = len(shingles & other)
+        # Containment, so a chunk repeated inside a longer passage also counts
+        if common / max(min(len(shingles), len(other)), 1) >= threshold:
+            return True
+    return False
+
+
+def build_context(
+    results: List[Tuple[Document, float]],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    dedup_threshold: float = CONTEXT_DEDUP_THRESHOLD,
+) -> Tuple[List[Document], dict]:
+    """
+    Merge, deduplicate and pack retrieved chunks into a token budget.
+
+    Args:
+        results: (Document, score) tuples from retrieval, higher is better
+        token_budget: Maximum estimated tokens of passage text; 0 disables the budget
+        dedup_threshold: Trigram containment above which a passage is a near-duplicate
+
+    Returns:
+        (passages best first, stats) where stats reports the chunk counts
+        and estimated tokens before and after
+    """
+    tokens_before = sum(estimate_tokens(doc.page_content) for doc, _ in results)
+    passages, merged = merge_adjacent(results)
+    passages.sort(key=lambda item: item[1], reverse=True)
+
+    packed, kept_shingles = [], []
+    duplicates = dropped = truncated = 0
+    tokens_after = 0
+    for doc, _ in passages:
+        shingles = _shingles(doc.page_content)
+        if _is_near_duplicate(shingles, kept_shingles, dedup_threshold):
+            duplicates += 1
+            continue
+
+        tokens = estimate_tokens(doc.page_content)
+        remaining = token_budget - tokens_after if token_budget else tokens
+        if tokens > remaining:
+            # Always keep some of the best passage; skip others that don't fit
+            if packed:
+                dropped += 1
+                continue
+            doc = Document(
+                page_content=doc.page_content[:int(remaining * CONTEXT_CHARS_PER_TOKEN)],
+                metadata=doc.metadata,
+            )
+            tokens = estimate_tokens(doc.page_content)
+            truncated += 1
+
+        packed.append(doc)
+        kept_shingles.append(shingles)
+        tokens_after += tokens
+
+    stats = {
+        "chunks": len(results),
+        "passages": len(packed),
+        "merged": merged,
+        "duplicates": duplicates,
+        "dropped": dropped,
+        "truncated": truncated,
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+    }
+    return packed, stats
@@ -1,15 +1,311 @@
 """Google embeddings integration using text-embedding-004."""
 
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from app.config import GOOGLE_API_KEY, EMBEDDING_MODEL
 
+from app.clients import get_registry
+from app.config import (
+    GOOGLE_API_KEY,
+    EMBEDDING_MODEL,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MAX_MB,
+    EMBEDDING_REDUCTION,
+)
+from rag.projection import get_projection
 
-def get_embeddings() -> GoogleGenerativeAIEmbeddings:
-    """Get the Google embeddings instance."""
-    if not GOOGLE_API_KEY:
-        raise ValueError("GOOGLE_API_KEY not set in environment variables")
-    
-    return GoogleGenerativeAIEmbeddings(
+# SQLite limits the number of bound parameters per statement
+_SQL_BATCH = 500
+
+
+class EmbeddingCache:
+    """
+    Disk-backed embedding store keyed by model name and text hash.
+
+    Vectors are stored as float32 blobs in SQLite. When the store grows past
+    ``max_bytes`` the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, "
+            "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, kind: str, text: str) -> str:
+        """Build the cache key for a text embedded by ``model`` as ``kind``."""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{model}:{kind}:{digest}"
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Look up cached vectors, updating hit/miss counters and recency."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _SQL_BATCH):
+                batch = keys[start:start + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """Store vectors and evict old entries if the size bound is exceeded."""
+        if not items:
+            return
+
+        now = time.time()
+        rows = []
+        for key, vector in items.items():
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            rows.append((key, blob, len(blob), now))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._total_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM embeddings"
+            ).fetchone()[0]
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the store is at 90% of its bound."""
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute(
+            "SELECT key, size FROM embeddings ORDER BY last_used ASC"
+        )
+        to_delete = []
+        remaining = self._total_bytes
+        for key, size in rows:
+            if remaining <= target:
+                break
+            to_delete.append((key,))
+            remaining -= size
+
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", to_delete)
+        self._conn.commit()
+        self.evictions += len(to_delete)
+        self._total_bytes = remaining
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and store size."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "size_bytes": self._total_bytes,
+            }
+
+    def clear(self):
+        """Remove all cached vectors."""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._total_bytes = 0
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from an EmbeddingCache."""
+
+    def __init__(self, embeddings: Embeddings, model: str, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, only calling the model for texts not in the cache."""
+        keys = [EmbeddingCache.make_key(self.model, "document", text) for text in texts]
+        cached = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        # Embed each uncached text once, even if it appears several times
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_items = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(new_items)
+            cached.update(new_items)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, using the cache when the same query was seen before."""
+        key = EmbeddingCache.make_key(self.model, "query", text)
+        cached = self.cache.get_many([key])
+        if key in cached:
+            return cached[key]
+
+        vector = self.embeddings.embed_query(text)
+        self.cache.put_many({key: vector})
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async embed_query; cache lookups are local and stay synchronous."""
+        key = EmbeddingCache.make_key(self.model, "query", text)
+        cached = self.cache.get_many([key])
+        if key in cached:
+            return cached[key]
+
+        vector = await self.embeddings.aembed_query(text)
+        self.cache.put_many({key: vector})
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries, batching the ones not in the cache."""
+        keys = [EmbeddingCache.make_key(self.model, "query", text) for text in texts]
+        cached = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = embed_queries(self.embeddings, list(missing.values()))
+            new_items = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(new_items)
+            cached.update(new_items)
+
+        return [cached[key] for key in keys]
+
+
+class ReducedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that applies the configured dimension reduction.
+
+    It wraps the (cached) model, so the disk cache keeps full vectors and a
+    refitted projection needs no new embedding calls.
+    """
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+
+    @staticmethod
+    def _reduce(vectors: List[List[float]]) -> List[List[float]]:
+        projection = get_projection()
+        if projection is None or not vectors:
+            return vectors
+        return projection.apply(vectors).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._reduce(self.embeddings.embed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._reduce([self.embeddings.embed_query(text)])[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self._reduce([await self.embeddings.aembed_query(text)])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self._reduce(embed_queries(self.embeddings, texts))
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    Embed several queries with as few requests as the backend allows.
+
+    Google embeddings take a task type, so queries are sent in batches as
+    RETRIEVAL_QUERY. Other backends fall back to one call per query.
+    """
+    if isinstance(embeddings, (CachedEmbeddings, ReducedEmbeddings)):
+        return embeddings.embed_queries(texts)
+    if isinstance(embeddings, GoogleGenerativeAIEmbeddings):
+        return embeddings.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+    return [embeddings.embed_query(text) for text in texts]
+
+
+# Global cache instance
+_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get or create the process-wide embedding cache."""
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache(
+            EMBEDDING_CACHE_PATH,
+            max_bytes=EMBEDDING_CACHE_MAX_MB * 1024 * 1024,
+        )
+    return _cache
+
+
+def _create_embeddings() -> Embeddings:
+    """Build the Google embeddings client, wrapped in the disk cache and reduction if enabled."""
+    embeddings = GoogleGenerativeAIEmbeddings(
         model=EMBEDDING_MODEL,
         google_api_key=GOOGLE_API_KEY
     )
+
+    if EMBEDDING_CACHE_ENABLED:
+        embeddings = CachedEmbeddings(embeddings, EMBEDDING_MODEL, get_embedding_cache())
+
+    if EMBEDDING_REDUCTION != "none":
+        embeddings = ReducedEmbeddings(embeddings)
+    return embeddings
+
+
+def get_embeddings() -> Embeddings:
+    """Get the shared Google embeddings instance."""
+    if not GOOGLE_API_KEY:
+        raise ValueError("GOOGLE_API_KEY not set in environment variables")
+
+    return get_registry().get("embeddings", _create_embeddings)
+
+
+def get_full_embeddings() -> Embeddings:
+    """Get the shared embeddings without dimension reduction (for fitting and evaluation)."""
+    embeddings = get_embeddings()
+    return embeddings.embeddings if isinstance(embeddings, ReducedEmbeddings) else embeddings
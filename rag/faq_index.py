@@ -0,0 +1,132 @@
+"""FAQ question index for the direct-answer fast path.
+
+FAQ questions are embedded at ingest time and saved next to the other local
+caches. A query that is nearly identical to an FAQ question is answered with
+the stored answer, skipping retrieval and generation.
+"""
+
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.config import FAQ_INDEX_PATH, FAQ_MATCH_THRESHOLD
+from rag.embeddings import embed_queries
+from rag.projection import embedding_signature
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class FaqIndex:
+    """Normalized FAQ question embeddings with their answers."""
+
+    def __init__(self, questions: List[str], answers: List[str], vectors: np.ndarray, model: str, source: str):
+        self.questions = list(questions)
+        self.answers = list(answers)
+        self.vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        self.model = model
+        self.source = source
+
+    @classmethod
+    def build(cls, faqs: List[dict], embeddings: Embeddings, source: str) -> "FaqIndex":
+        """Embed FAQ questions the same way queries are embedded."""
+        questions = [faq["question"] for faq in faqs]
+        answers = [faq["answer"] for faq in faqs]
+        vectors = np.asarray(embed_queries(embeddings, questions), dtype=np.float32)
+        return cls(questions, answers, vectors, embedding_signature(), source)
+
+    def match(self, query_vector: List[float], threshold: float = FAQ_MATCH_THRESHOLD) -> Optional[dict]:
+        """
+        Find the FAQ whose question best matches a query embedding.
+
+        Returns:
+            Dict with question, answer, source and similarity, or None if no
+            question reaches ``threshold``
+        """
+        if not self.questions:
+            return None
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        similarities = self.vectors @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] < threshold:
+            return None
+        return {
+            "question": self.questions[best],
+            "answer": self.answers[best],
+            "source": self.source,
+            "similarity": float(similarities[best]),
+        }
+
+    def save(self, path: Path = None):
+        """Save the index to an .npz file."""
+        path = Path(path or FAQ_INDEX_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                questions=np.array(self.questions),
+                answers=np.array(self.answers),
+                vectors=self.vectors,
+                model=np.array(self.model),
+                source=np.array(self.source),
+            )
+
+    @classmethod
+    def load(cls, path: Path = None) -> "FaqIndex":
+        """Load an index saved by save()."""
+        with np.load(path or FAQ_INDEX_PATH) as data:
+            return cls(
+                questions=[str(q) for q in data["questions"]],
+                answers=[str(a) for a in data["answers"]],
+                vectors=data["vectors"],
+                model=str(data["model"]),
+                source=str(data["source"]),
+            )
+
+
+# Loaded index and the file mtime it was loaded from
+_index: Optional[FaqIndex] = None
+_index_mtime: Optional[float] = None
+
+
+def get_faq_index() -> Optional[FaqIndex]:
+    """
+    Get the FAQ index, reloading it when ingestion rebuilt the file.
+
+    Returns None if no index was built yet or it was built with a different
+    embedding model or projection.
+    """
+    global _index, _index_mtime
+    path = Path(FAQ_INDEX_PATH)
+    if not path.exists():
+        return None
+
+    mtime = path.stat().st_mtime
+    if _index is None or mtime != _index_mtime:
+        try:
+            index = FaqIndex.load(path)
+        except Exception as e:
+            logger.warning("Could not load FAQ index: %s", e)
+            return None
+        _index = index
+        _index_mtime = mtime
+    return _index if _index.model == embedding_signature() else None
+
+
+def build_faq_index(faqs: List[dict], embeddings: Embeddings, source: str) -> FaqIndex:
+    """Build and save the FAQ index from question/answer pairs."""
+    index = FaqIndex.build(faqs, embeddings, source)
+    index.save()
+    return index
+
+
+def delete_faq_index():
+    """Remove the saved FAQ index so the fast path stops answering."""
+    Path(FAQ_INDEX_PATH).unlink(missing_ok=True)
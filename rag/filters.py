@@ -0,0 +1,158 @@
+"""Structured constraint extraction for inventory queries.
+
+Constraints are plain dicts of ``{field: {op: value}}`` with ops ``eq``,
+``contains`` (case-insensitive substring), ``lt``, ``lte``, ``gt`` and
+``gte``, e.g. ``{"price": {"lte": 40000}}``.
+The vector store translates them into where-filters applied during search.
+"""
+
+import re
+from typing import Optional
+
+# Vocabulary mapped to stored inventory values (matched case-insensitively)
+VEHICLE_TYPES = {
+    "suv": "SUV",
+    "suvs": "SUV",
+    "sedan": "Sedan",
+    "sedans": "Sedan",
+    "truck": "Truck",
+    "trucks": "Truck",
+    "pickup": "Truck",
+    "coupe": "Coupe",
+    "minivan": "Minivan",
+    "hatchback": "Hatchback",
+    "convertible": "Convertible",
+    "wagon": "Wagon",
+}
+
+FUEL_TYPES = {
+    "electric": "Electric",
+    "ev": "Electric",
+    "evs": "Electric",
+    "hybrid": "Hybrid",
+    "hybrids": "Hybrid",
+    "diesel": "Diesel",
+    "gasoline": "Gasoline",
+    "gas": "Gasoline",
+}
+
+_NUMBER = r"\$?\s*(\d[\d,]*(?:\.\d+)?)\s*(?:(k|K|thousand)\b)?"
+_UPPER = r"(?:under|below|less than|up to|at most|no more than|max(?:imum)?|cheaper than|budget of)"
+_LOWER = r"(?:over|above|more than|at least|min(?:imum)?|starting at)"
+_MILES = r"\s*(?:miles|mi\b|mile)"
+_YEAR = r"((?:19|20)\d{2})"
+
+# Without "$" or a "k" suffix, a number is only a price if the query talks about price
+_PRICE_WORDS = r"\b(?:price[ds]?|pricing|costs?|budget|afford\w*|cheaper|spend|pay|dollars|bucks)\b"
+
+# Fuel words that don't name a fuel type here ("gas mileage", "electric windows")
+_NOT_FUEL = (
+    r"\bgas (?:mileage|station|prices?|tank|pedal|cap|money)\b"
+    r"|\belectric (?:windows?|seats?|mirrors?|locks?|steering)\b"
+)
+
+
+def parse_number(digits: str, suffix: Optional[str] = None) -> float:
+    """Parse '40,000' / '40' + 'k' into a number."""
+    value = float(digits.replace(",", ""))
+    if suffix:
+        value *= 1000
+    return int(value) if float(value).is_integer() else value
+
+
+def _is_price(text: str, digits: str, suffix: Optional[str], query: str) -> bool:
+    """Whether a matched '<comparator> <number>' is a price rather than a year, count or spec."""
+    if "$" in text or suffix:
+        return True
+    if re.fullmatch(_YEAR, digits.replace(",", "")):
+        return False
+    return bool(re.search(_PRICE_WORDS, query))
+
+
+def _extract_range(query: str, field: str, unit: str = "", price: bool = False) -> dict:
+    """
+    Extract upper/lower bounds written as '<comparator> <number><unit>'.
+
+    With ``price`` set, bounds are only taken from amounts that read as
+    prices (see _is_price).
+    """
+    def accept(match, group):
+        return not price or _is_price(match.group(0), match.group(group), match.group(group + 1), query)
+
+    constraint = {}
+
+    between = re.search(rf"between\s+{_NUMBER}{unit}\s+and\s+{_NUMBER}{unit}", query)
+    if between and accept(between, 1) and accept(between, 3):
+        constraint["gte"] = parse_number(between.group(1), between.group(2))
+        constraint["lte"] = parse_number(between.group(3), between.group(4))
+        return {field: constraint}
+
+    upper = next((m for m in re.finditer(rf"{_UPPER}\s+{_NUMBER}{unit}", query) if accept(m, 1)), None)
+    if upper:
+        constraint["lte"] = parse_number(upper.group(1), upper.group(2))
+    lower = next((m for m in re.finditer(rf"{_LOWER}\s+{_NUMBER}{unit}", query) if accept(m, 1)), None)
+    if lower:
+        constraint["gte"] = parse_number(lower.group(1), lower.group(2))
+
+    return {field: constraint} if constraint else {}
+
+
+def _extract_year(query: str) -> dict:
+    """Extract model-year bounds such as '2023 or newer', 'over 2020' or 'before 2020'."""
+    constraint = {}
+
+    newer = (
+        re.search(rf"{_YEAR}\s+(?:or|and)\s+(?:newer|later|up|above)", query)
+        or re.search(rf"(?:newer than|after|over|above|since|from)\s+{_YEAR}\b", query)
+    )
+    if newer:
+        bound = int(newer.group(1))
+        exclusive = newer.group(0).startswith(("newer than", "after", "over", "above"))
+        constraint["gte"] = bound + 1 if exclusive else bound
+
+    older = (
+        re.search(rf"{_YEAR}\s+(?:or|and)\s+(?:older|earlier|below)", query)
+        or re.search(rf"(?:older than|before|under|below)\s+{_YEAR}\b", query)
+    )
+    if older:
+        bound = int(older.group(1))
+        exclusive = older.group(0).startswith(("older than", "before", "under", "below"))
+        constraint["lte"] = bound - 1 if exclusive else bound
+
+    return {"year": constraint} if constraint else {}
+
+
+def _extract_term(query: str, field: str, vocabulary: dict, op: str = "eq") -> dict:
+    """Constrain a categorical field if exactly one known value is mentioned."""
+    words = set(re.findall(r"[a-z]+", query))
+    values = {vocabulary[word] for word in words if word in vocabulary}
+    if len(values) == 1:
+        return {field: {op: values.pop()}}
+    return {}
+
+
+def extract_inventory_constraints(query: str) -> dict:
+    """
+    Turn price, year, mileage, type and fuel phrases into search constraints.
+
+    Examples:
+        "SUVs under $40,000" -> {"price": {"lte": 40000}, "type": {"contains": "SUV"}}
+        "2023 or newer, under 30k miles" -> {"year": {"gte": 2023}, "mileage": {"lte": 30000}}
+    """
+    text = query.lower()
+    constraints = {}
+
+    # Mileage first, then strip it so "under 30k miles" isn't read as a price
+    constraints.update(_extract_range(text, "mileage", unit=_MILES))
+    price_text = re.sub(rf"{_NUMBER}{_MILES}", " ", text)
+    constraints.update(_extract_range(price_text, "price", price=True))
+
+    constraints.update(_extract_year(text))
+    # Types like "Luxury SUV" should still match "SUV"
+    constraints.update(_extract_term(text, "type", VEHICLE_TYPES, op="contains"))
+    constraints.update(_extract_term(re.sub(_NOT_FUEL, " ", text), "fuel_type", FUEL_TYPES))
+
+    if re.search(r"\b(available|in stock|for sale)\b", text):
+        constraints["status"] = {"eq": "Available"}
+
+    return constraints
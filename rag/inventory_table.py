@@ -0,0 +1,422 @@
+"""Columnar inventory table for structured questions.
+
+Counts, cheapest/newest and "list all" questions span the whole inventory,
+so they are answered from NumPy arrays built from the inventory records
+instead of from the top-k retrieved chunks. Every inventory write (the
+ingest and sync scripts, UI uploads) updates the saved table to match the
+vehicles left in the vector store.
+"""
+
+import logging
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.config import INVENTORY_TABLE_PATH, STRUCTURED_LIST_LIMIT
+from rag.filters import FUEL_TYPES, VEHICLE_TYPES, extract_inventory_constraints
+
+logger = logging.getLogger(__name__)
+
+TEXT_FIELDS = ("vin", "make", "model", "type", "fuel_type", "color", "status")
+NUMERIC_FIELDS = ("year", "price", "mileage")
+
+# Superlatives mapped to (operation, field, wording)
+_SUPERLATIVES = [
+    (r"\b(?:cheapest|least expensive|lowest[- ]priced|most affordable)\b", "min", "price", "cheapest"),
+    (r"\b(?:most expensive|priciest|highest[- ]priced)\b", "max", "price", "most expensive"),
+    (r"\b(?:newest|latest model)\b", "max", "year", "newest"),
+    (r"\boldest\b", "min", "year", "oldest"),
+    (r"\b(?:lowest mileage|fewest miles|least miles)\b", "min", "mileage", "lowest-mileage"),
+    (r"\b(?:highest mileage|most miles)\b", "max", "mileage", "highest-mileage"),
+]
+_LIST = r"\b(?:list|show (?:me )?all|all (?:of )?(?:your|the))\b"
+
+# Words allowed between "how many" and the vehicle noun, besides makes, types and fuels
+_COUNT_ADJECTIVES = ["available", "new", "used", "certified", "pre-owned"]
+# A count question has to ask about stock, e.g. "how many SUVs do you have"
+_IN_STOCK = (
+    r"\b(?:do you (?:have|carry|stock)|(?:are|is) there|you have|have you got"
+    r"|in stock|available|for sale|on (?:the|your) lot)\b"
+)
+
+# Questions about a vehicle's attributes need the LLM, not a min/max or listing
+_ATTRIBUTES = (
+    r"\b(?:seats?|seating|speed|horsepower|hp|torque|engine|acceleration|0-60|mpg|fuel economy|range"
+    r"|towing|cargo|trunk|features?|safety|colou?rs?|dimensions|weight|interior)\b"
+)
+
+# Questions about these are for the knowledge base, even if they mention cars
+# ("leas" is spelled out so "least expensive" still counts as a superlative)
+_NOT_INVENTORY = (
+    r"\b(?:financ\w*|loans?|leas(?:e[sd]?|ing)|warrant\w*|insur\w*|payments?|monthly|apr|rates?"
+    r"|interest|credit|polic\w+|return\w*|refund\w*|trade\w*|registr\w*)\b"
+)
+
+# Makes a customer may ask about; naming one that isn't in stock means the
+# table can't answer ("the latest model Tesla" isn't our newest Honda)
+KNOWN_MAKES = [
+    "acura", "alfa romeo", "aston martin", "audi", "bentley", "bmw", "buick", "cadillac", "chevrolet",
+    "chevy", "chrysler", "dodge", "ferrari", "fiat", "ford", "genesis", "gmc", "honda", "hyundai",
+    "infiniti", "jaguar", "jeep", "kia", "lamborghini", "land rover", "lexus", "lincoln", "lucid",
+    "maserati", "mazda", "mclaren", "mercedes", "mercedes-benz", "mitsubishi", "nissan", "polestar",
+    "porsche", "ram", "rivian", "rolls-royce", "subaru", "tesla", "toyota", "volkswagen", "vw", "volvo",
+]
+
+_VEHICLE_NOUNS = ["cars?", "vehicles?", "autos?", "models?"] + sorted(VEHICLE_TYPES) + sorted(FUEL_TYPES)
+
+
+class InventoryTable:
+    """Inventory records stored as one NumPy array per field."""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        self._lower = {field: np.char.lower(columns[field]) for field in TEXT_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.columns["vin"])
+
+    @classmethod
+    def from_records(cls, records: List[dict]) -> "InventoryTable":
+        """Build the table from inventory records (see data.loader)."""
+        columns = {}
+        for field in TEXT_FIELDS:
+            columns[field] = np.array([str(r.get(field) or "") for r in records], dtype=str)
+        for field in NUMERIC_FIELDS:
+            columns[field] = np.array(
+                [_to_float(r.get(field)) for r in records], dtype=np.float64
+            )
+        return cls(columns)
+
+    def to_records(self) -> List[dict]:
+        """Convert the table back into inventory records."""
+        return [self.row(i) for i in range(len(self))]
+
+    def row(self, i: int) -> dict:
+        record = {field: str(self.columns[field][i]) for field in TEXT_FIELDS}
+        for field in NUMERIC_FIELDS:
+            value = self.columns[field][i]
+            record[field] = None if np.isnan(value) else (int(value) if value.is_integer() else float(value))
+        return record
+
+    @property
+    def makes(self) -> List[str]:
+        return sorted({str(make) for make in self.columns["make"] if make})
+
+    @property
+    def models(self) -> List[str]:
+        return sorted({str(model) for model in self.columns["model"] if model})
+
+    def mask(self, constraints: dict) -> np.ndarray:
+        """Boolean row mask for a constraint dict (see rag.filters)."""
+        mask = np.ones(len(self), dtype=bool)
+        for field, ops in constraints.items():
+            if field not in self.columns:
+                continue
+            for op, value in ops.items():
+                if field in TEXT_FIELDS:
+                    column = self._lower[field]
+                    value = str(value).lower()
+                    if op == "eq":
+                        mask &= column == value
+                    elif op == "contains":
+                        mask &= np.char.find(column, value) >= 0
+                    else:
+                        raise ValueError(f"Unsupported operator for text field {field}: {op}")
+                else:
+                    column = self.columns[field]
+                    if op == "eq":
+                        mask &= column == value
+                    elif op == "lt":
+                        mask &= column < value
+                    elif op == "lte":
+                        mask &= column <= value
+                    elif op == "gt":
+                        mask &= column > value
+                    elif op == "gte":
+                        mask &= column >= value
+                    else:
+                        raise ValueError(f"Unsupported operator for numeric field {field}: {op}")
+        return mask
+
+    def run(self, intent: dict) -> dict:
+        """
+        Answer a parsed intent (see parse_inventory_intent).
+
+        Returns:
+            Dict with the number of matching vehicles and the rows that
+            answer the question (all matches for count/list, the best one
+            for min/max), in price order for listings
+        """
+        mask = self.mask(intent["filters"])
+        # Sold vehicles only count if the question asked about them
+        if "status" not in intent["filters"]:
+            mask &= self._lower["status"] != "sold"
+        indices = np.flatnonzero(mask)
+
+        if intent["op"] in ("min", "max") and len(indices):
+            values = self.columns[intent["field"]][indices]
+            valid = ~np.isnan(values)
+            indices, values = indices[valid], values[valid]
+            if len(indices):
+                best = np.argmin(values) if intent["op"] == "min" else np.argmax(values)
+                indices = indices[[best]]
+        else:
+            indices = indices[np.argsort(self.columns["price"][indices], kind="stable")]
+
+        return {"count": int(mask.sum()), "rows": [self.row(i) for i in indices]}
+
+    def upsert(self, records: List[dict]) -> "InventoryTable":
+        """Return a new table with records added or replaced by VIN."""
+        merged = {record["vin"]: record for record in self.to_records()}
+        merged.update({record["vin"]: record for record in records})
+        return InventoryTable.from_records(list(merged.values()))
+
+    def retain(self, vins: Iterable[str]) -> "InventoryTable":
+        """Return a new table with only the vehicles whose VIN is in ``vins``."""
+        keep = np.isin(self.columns["vin"], np.array(list(vins), dtype=str))
+        return InventoryTable({field: column[keep] for field, column in self.columns.items()})
+
+    def save(self, path: Path = None):
+        """Save the table to an .npz file."""
+        path = Path(path or INVENTORY_TABLE_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, **self.columns)
+
+    @classmethod
+    def load(cls, path: Path = None) -> "InventoryTable":
+        """Load a table saved by save()."""
+        with np.load(path or INVENTORY_TABLE_PATH) as data:
+            return cls({field: data[field] for field in TEXT_FIELDS + NUMERIC_FIELDS})
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _make_patterns(make: str) -> List[str]:
+    """Patterns for a make and its plural, including the short form of "Mercedes-Benz"."""
+    names = {make.lower(), make.lower().split("-")[0]}
+    return [rf"{re.escape(name)}s?" for name in sorted(names)]
+
+
+def _detect_make(text: str, makes: List[str]) -> dict:
+    """Constrain the make if exactly one known make is mentioned ("Toyotas", "Mercedes")."""
+    found = set()
+    for make in makes:
+        if any(re.search(rf"\b{pattern}\b", text) for pattern in _make_patterns(make)):
+            found.add(make)
+    if len(found) == 1:
+        return {"make": {"eq": found.pop()}}
+    return {}
+
+
+def _detect_model(text: str, models: List[str]) -> dict:
+    """Constrain the model if exactly one stocked model is mentioned ("Accords", "RAV4")."""
+    found = {model for model in models if re.search(rf"\b{re.escape(model.lower())}s?\b", text)}
+    if len(found) == 1:
+        return {"model": {"eq": found.pop()}}
+    return {}
+
+
+def _names_unstocked_vehicle(query: str, makes: List[str], models: List[str]) -> bool:
+    """
+    Whether the query names a make or model we don't stock.
+
+    Makes are checked against KNOWN_MAKES. Models can't be listed, so any
+    capitalized word other than the first of a sentence that isn't a stocked
+    make or model, vehicle type or fuel is taken as an unknown model name
+    ("cheapest Civic").
+    """
+    text = query.lower()
+    stocked = {name.lower() for name in makes} | {make.lower().split("-")[0] for make in makes}
+    for make in KNOWN_MAKES:
+        if make not in stocked and re.search(rf"\b{re.escape(make)}s?\b", text):
+            return True
+
+    known = stocked | set(VEHICLE_TYPES) | set(FUEL_TYPES) | {"i"}
+    known |= {word.lower() for model in models for word in re.findall(r"[\w-]+", model)}
+    for sentence in re.split(r"[.?!]\s+", query.strip()):
+        for word in re.findall(r"[\w-]+", sentence)[1:]:
+            if word[0].isupper() and word.lower() not in known and word.lower().rstrip("s") not in known:
+                return True
+    return False
+
+
+def parse_inventory_intent(query: str, makes: List[str], models: List[str] = ()) -> Optional[dict]:
+    """
+    Recognize count, min/max and listing questions about the inventory.
+
+    Examples:
+        "How many EVs do you have?" -> count, fuel_type = Electric
+        "Cheapest SUV" -> min price, type contains SUV
+        "List all available Toyotas" -> list, make = Toyota, status = Available
+        "Newest Tesla" -> None when no Teslas are in stock
+
+    Returns:
+        Dict with op ("count", "min", "max" or "list"), field, label and
+        filters, or None if the query isn't a structured inventory question
+    """
+    text = query.lower()
+    if re.search(_NOT_INVENTORY, text) or _names_unstocked_vehicle(query, makes, models):
+        return None
+
+    names = [pattern for make in makes for pattern in _make_patterns(make)]
+    names += [rf"{re.escape(model.lower())}s?" for model in models]
+    nouns = "|".join(_VEHICLE_NOUNS + names)
+    if not re.search(rf"\b(?:{nouns})\b", text):
+        return None
+
+    filters = {**extract_inventory_constraints(query), **_detect_make(text, makes), **_detect_model(text, models)}
+
+    # "how many <known adjectives> <vehicle noun> ... do you have", so "how many
+    # seats does the Honda Pilot have" isn't a count of Hondas
+    adjectives = "|".join(_COUNT_ADJECTIVES + _VEHICLE_NOUNS + names)
+    count = re.search(rf"\b(?:how many|number of)\s+(?:(?:{adjectives})\s+){{0,3}}(?:{nouns})\b", text)
+    if count and re.search(_IN_STOCK, text[count.end():]):
+        return {"op": "count", "field": None, "label": None, "filters": filters}
+
+    if re.search(_ATTRIBUTES, text):
+        return None
+
+    for pattern, op, field, label in _SUPERLATIVES:
+        if re.search(pattern, text):
+            return {"op": op, "field": field, "label": label, "filters": filters}
+
+    if re.search(_LIST, text):
+        return {"op": "list", "field": None, "label": None, "filters": filters}
+
+    return None
+
+
+def _describe(filters: dict, plural: bool) -> str:
+    """Describe the filtered vehicles, e.g. 'available electric SUVs under $45,000'."""
+    words = []
+    if "status" in filters:
+        words.append(str(filters["status"].get("eq", "")).lower())
+    year = filters.get("year", {})
+    if "make" in filters:
+        words.append(filters["make"]["eq"])
+    if "model" in filters:
+        words.append(filters["model"]["eq"])
+    if "fuel_type" in filters:
+        words.append(filters["fuel_type"]["eq"].lower())
+
+    noun = "vehicle"
+    if "type" in filters:
+        value = next(iter(filters["type"].values()))
+        noun = value if value.isupper() else value.lower()
+    words.append(noun + ("s" if plural else ""))
+
+    price = filters.get("price", {})
+    if "gte" in price and "lte" in price:
+        words.append(f"priced ${price['gte']:,} to ${price['lte']:,}")
+    elif "lte" in price:
+        words.append(f"under ${price['lte']:,}")
+    elif "gte" in price:
+        words.append(f"over ${price['gte']:,}")
+
+    mileage = filters.get("mileage", {})
+    if "lte" in mileage:
+        words.append(f"with under {mileage['lte']:,} miles")
+    elif "gte" in mileage:
+        words.append(f"with over {mileage['gte']:,} miles")
+
+    if "gte" in year and "lte" in year:
+        words.append(f"from {year['gte']} to {year['lte']}")
+    elif "gte" in year:
+        words.append(f"from {year['gte']} or newer")
+    elif "lte" in year:
+        words.append(f"from {year['lte']} or older")
+
+    return " ".join(word for word in words if word)
+
+
+def format_vehicle(row: dict) -> str:
+    """One-line vehicle summary."""
+    details = ", ".join(part for part in (row["type"], row["fuel_type"]) if part)
+    price = f"${row['price']:,}" if row["price"] is not None else "price on request"
+    mileage = f"{row['mileage']:,} miles" if row["mileage"] is not None else "mileage unknown"
+    name = " ".join(str(part) for part in (row["year"], row["make"], row["model"]) if part)
+    return f"{name} ({details}) - {price}, {mileage}, {row['status']}"
+
+
+def format_structured_answer(intent: dict, result: dict) -> str:
+    """Phrase a structured result deterministically."""
+    count, rows = result["count"], result["rows"]
+    plural = _describe(intent["filters"], plural=True)
+
+    if not rows:
+        return f"We don't currently have any {plural} in our inventory."
+
+    if intent["op"] in ("min", "max"):
+        answer = f"Our {intent['label']} {_describe(intent['filters'], plural=False)} is the {format_vehicle(rows[0])}."
+    else:
+        singular = _describe(intent["filters"], plural=False)
+        if intent["op"] == "count":
+            answer = f"We have {count} {plural if count != 1 else singular} in our inventory"
+        elif count == 1:
+            answer = f"Here is the one {singular} in our inventory"
+        else:
+            answer = f"Here are the {count} {plural} in our inventory"
+        shown = rows[:STRUCTURED_LIST_LIMIT]
+        answer += ":\n\n" + "\n".join(f"- {format_vehicle(row)}" for row in shown)
+        if count > len(shown):
+            answer += f"\n- ...and {count - len(shown)} more"
+
+    return answer + "\n\nPrices and availability may change, so please contact us for current details."
+
+
+# Loaded table and the file mtime it was loaded from
+_table: Optional[InventoryTable] = None
+_table_mtime: Optional[float] = None
+
+
+def get_inventory_table() -> Optional[InventoryTable]:
+    """Get the inventory table, reloading it when ingestion rebuilt the file."""
+    global _table, _table_mtime
+    path = Path(INVENTORY_TABLE_PATH)
+    if not path.exists():
+        return None
+
+    mtime = path.stat().st_mtime
+    if _table is None or mtime != _table_mtime:
+        try:
+            _table = InventoryTable.load(path)
+        except Exception as e:
+            logger.warning("Could not load inventory table: %s", e)
+            return None
+        _table_mtime = mtime
+    return _table
+
+
+def update_inventory_table(records: List[dict], stored_vins: Iterable[str]) -> InventoryTable:
+    """
+    Apply an inventory write to the saved table.
+
+    Args:
+        records: Vehicles just written; added or replaced by VIN
+        stored_vins: VINs in the inventory collection after the write; other
+            vehicles (deleted from the store) are dropped from the table
+
+    Returns:
+        The saved table
+    """
+    global _table, _table_mtime
+    current = get_inventory_table()
+    table = current.upsert(records) if current is not None else InventoryTable.from_records(records)
+    table = table.retain(stored_vins)
+    table.save()
+    # Don't rely on the mtime changing for this process to see its own write
+    _table, _table_mtime = table, Path(INVENTORY_TABLE_PATH).stat().st_mtime
+    return table
+
+
+def delete_inventory_table():
+    """Remove the saved table so structured answers stop."""
+    Path(INVENTORY_TABLE_PATH).unlink(missing_ok=True)
@@ -0,0 +1,532 @@
+"""In-process vector index backed by memory-mapped NumPy files.
+
+An alternative to embedded Weaviate for small corpora (VECTOR_BACKEND=local).
+Each collection is a directory holding a float32 matrix of normalized
+vectors, opened read-only with ``mmap_mode="r"`` so several worker processes
+share the same pages, and a JSON sidecar with the object IDs and properties.
+
+Writes build a new vectors file and then atomically replace the sidecar that
+names it, so readers see either the old or the new index, never a partial
+one. Readers reload when the sidecar changes into a new immutable snapshot
+that is swapped in with one assignment. The previous version's files are
+kept for readers that are just opening them. There should be a single
+writer at a time (the ingest or sync script, or the Streamlit app).
+
+With VECTOR_QUANTIZATION set, compressed int8 or binary codes are also kept
+in memory. Searches scan the codes for ``k * QUANTIZATION_RESCORE_FACTOR``
+candidates and rescore only those with the full-precision vectors, so most
+of the float32 file never has to be paged in.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.config import LOCAL_INDEX_DIR, VECTOR_QUANTIZATION, QUANTIZATION_RESCORE_FACTOR
+from rag.quantization import get_quantizer, load_quantizer
+
+logger = logging.getLogger(__name__)
+
+_SIDECAR = "index.json"
+
+# Metadata key holding a result's stored vector when a search asks for it
+VECTOR_METADATA_KEY = "_vector"
+
+# Metadata key holding a hybrid result's cosine similarity to the query. Fused
+# hybrid scores only rank results; this one is comparable across collections.
+SIMILARITY_METADATA_KEY = "vector_similarity"
+
+# BM25 parameters (Weaviate's defaults)
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+# Reciprocal rank fusion constant
+_RRF_K = 60
+
+# Sidecar reads retried when a concurrent write removes the files it names
+_LOAD_ATTEMPTS = 3
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _tokenize(text: str) -> List[str]:
+    return re.findall(r"\w+", (text or "").lower())
+
+
+def _minmax(scores: np.ndarray) -> np.ndarray:
+    """Scale scores to 0-1; a constant score maps to 1."""
+    if not len(scores):
+        return scores
+    low, high = scores.min(), scores.max()
+    if high - low < 1e-12:
+        return np.ones_like(scores)
+    return (scores - low) / (high - low)
+
+
+def _ranks(scores: np.ndarray) -> np.ndarray:
+    """1-based rank of each score, best first."""
+    ranks = np.empty(len(scores))
+    ranks[np.argsort(-scores, kind="stable")] = np.arange(1, len(scores) + 1)
+    return ranks
+
+
+def _top_k(scores: np.ndarray, candidates: np.ndarray, k: int) -> np.ndarray:
+    """Indices into ``candidates`` of the k best scores, best first."""
+    if len(candidates) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(len(candidates))
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class _Snapshot:
+    """
+    One loaded version of a collection's index.
+
+    Never modified after loading (apart from lazily built caches), so a
+    search that holds a snapshot pairs row indices with the right IDs and
+    properties even if another thread swaps in a newer one meanwhile.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        properties: List[dict],
+        vectors: Optional[np.ndarray],
+        codes: Optional[np.ndarray] = None,
+        quantizer=None,
+        files: Tuple[str, ...] = (),
+    ):
+        self.ids = ids
+        self.properties = properties
+        self.vectors = vectors
+        self.codes = codes
+        self.quantizer = quantizer
+        self.files = files
+        self.positions = {object_id: i for i, object_id in enumerate(ids)}
+        self._columns: Dict[str, np.ndarray] = {}
+        self._lexical = None
+
+    def column(self, field: str) -> np.ndarray:
+        """Property values as an array (lowercased text or float with NaN)."""
+        if field not in self._columns:
+            values = [properties.get(field) for properties in self.properties]
+            if any(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+                column = np.array([v if isinstance(v, (int, float)) else np.nan for v in values], dtype=np.float64)
+            else:
+                column = np.array([str(v).lower() if v is not None else "" for v in values], dtype=object)
+            self._columns[field] = column
+        return self._columns[field]
+
+    def mask(self, constraints: Optional[dict]) -> np.ndarray:
+        """Rows matching a constraint dict (see rag.filters)."""
+        mask = np.ones(len(self.ids), dtype=bool)
+        for field, ops in (constraints or {}).items():
+            column = self.column(field)
+            numeric = column.dtype == np.float64
+            for op, value in ops.items():
+                if op == "eq":
+                    mask &= column == (value if numeric else str(value).lower())
+                elif op == "contains":
+                    needle = str(value).lower()
+                    mask &= np.array([needle in str(v) for v in column], dtype=bool)
+                elif op == "lt":
+                    mask &= column < value
+                elif op == "lte":
+                    mask &= column <= value
+                elif op == "gt":
+                    mask &= column > value
+                elif op == "gte":
+                    mask &= column >= value
+                else:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+        return mask
+
+    def document(self, i: int, include_vector: bool = False) -> Document:
+        properties = dict(self.properties[i])
+        content = properties.pop("content", "") or ""
+        if include_vector:
+            properties[VECTOR_METADATA_KEY] = np.array(self.vectors[i])
+        return Document(page_content=content, metadata=properties)
+
+    def vector_search(
+        self, vector: List[float], candidates: np.ndarray, limit: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact cosine similarities for the rows worth scoring.
+
+        Without quantization every candidate is scored. With it, the codes
+        pick the ``limit`` most promising candidates and only those are
+        rescored with the full-precision vectors.
+
+        Returns:
+            (rows, similarities)
+        """
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+        if self.codes is not None and len(candidates) > limit:
+            coarse = self.quantizer.scores(self.codes[candidates], query)
+            # Sorted rows read the memory-mapped file front to back
+            candidates = np.sort(candidates[_top_k(coarse, candidates, limit)])
+        return candidates, np.asarray(self.vectors[candidates] @ query, dtype=np.float64)
+
+    def bm25(self, query: str, candidates: np.ndarray) -> np.ndarray:
+        """BM25 scores of the candidate rows' content for a query."""
+        if self._lexical is None:
+            counts = [Counter(_tokenize(p.get("content", ""))) for p in self.properties]
+            lengths = np.array([sum(c.values()) for c in counts], dtype=np.float64)
+            postings = {}
+            for i, counter in enumerate(counts):
+                for term, tf in counter.items():
+                    postings.setdefault(term, []).append((i, tf))
+            self._lexical = (postings, lengths, max(lengths.mean(), 1.0))
+        postings, lengths, average = self._lexical
+
+        scores = np.zeros(len(self.ids), dtype=np.float64)
+        n = len(self.ids)
+        for term in set(_tokenize(query)):
+            rows = postings.get(term)
+            if not rows:
+                continue
+            idf = math.log(1 + (n - len(rows) + 0.5) / (len(rows) + 0.5))
+            index, tf = (np.array(column) for column in zip(*rows))
+            norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * lengths[index] / average)
+            scores[index] += idf * tf * (_BM25_K1 + 1) / (tf + norm)
+        return scores[candidates]
+
+
+_EMPTY = _Snapshot([], [], None)
+
+
+class LocalCollection:
+    """One collection: memory-mapped vectors plus IDs and properties."""
+
+    def __init__(
+        self,
+        directory: Path,
+        quantization: str = VECTOR_QUANTIZATION,
+        rescore_factor: int = QUANTIZATION_RESCORE_FACTOR,
+    ):
+        self.directory = Path(directory)
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self._snapshot = _EMPTY
+        self._mtime: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def _sidecar(self) -> Path:
+        return self.directory / _SIDECAR
+
+    def exists(self) -> bool:
+        return self._sidecar.exists()
+
+    def _current(self) -> _Snapshot:
+        """
+        The latest snapshot, reloaded if another process (or this one)
+        rewrote the index. Callers use the returned snapshot throughout.
+        """
+        try:
+            mtime = self._sidecar.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._snapshot, self._mtime = _EMPTY, None
+            return self._snapshot
+        if mtime == self._mtime:
+            return self._snapshot
+
+        with self._lock:
+            if mtime != self._mtime:
+                self._snapshot, self._mtime = self._load()
+            return self._snapshot
+
+    def _load(self) -> Tuple[_Snapshot, Optional[int]]:
+        """Read the sidecar and the files it names into a new snapshot."""
+        # A writer may replace the sidecar and remove its files between our
+        # reading the sidecar and opening them; read the new sidecar then
+        error = None
+        for _ in range(_LOAD_ATTEMPTS):
+            try:
+                mtime = self._sidecar.stat().st_mtime_ns
+                with open(self._sidecar, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                return self._snapshot_from(meta), mtime
+            except FileNotFoundError as e:
+                if not self._sidecar.exists():
+                    return _EMPTY, None
+                error = e
+        raise error
+
+    def _snapshot_from(self, meta: dict) -> _Snapshot:
+        if not meta["ids"]:
+            return _Snapshot([], [], None)
+        vectors = np.load(self.directory / meta["vectors"], mmap_mode="r")
+        files = (meta["vectors"],) + ((meta["codes"],) if meta.get("codes") else ())
+
+        codes, quantizer = None, None
+        quantizer_class = get_quantizer(self.quantization)
+        if quantizer_class is not None:
+            if meta.get("quantization") == self.quantization and meta.get("codes"):
+                with np.load(self.directory / meta["codes"]) as data:
+                    quantizer = load_quantizer(self.quantization, data)
+                    codes = data["codes"]
+            else:
+                # Saved with another setting: encode in memory
+                logger.info("Encoding %s vectors as %s codes in memory", self.directory.name, self.quantization)
+                quantizer = quantizer_class().fit(vectors)
+                codes = quantizer.encode(vectors)
+
+        return _Snapshot(meta["ids"], meta["properties"], vectors, codes, quantizer, files)
+
+    def count(self) -> int:
+        return len(self._current().ids)
+
+    def get(self, ids: List[str], include_vector: bool = False) -> Dict[str, dict]:
+        """Stored objects by ID as {id: {"properties": ..., "vector": ...}}."""
+        snapshot = self._current()
+        found = {}
+        for object_id in ids:
+            i = snapshot.positions.get(object_id)
+            if i is not None:
+                found[object_id] = {
+                    "properties": snapshot.properties[i],
+                    "vector": np.array(snapshot.vectors[i]) if include_vector else None,
+                }
+        return found
+
+    def all_vectors(self) -> Tuple[List[str], np.ndarray]:
+        """All IDs and a full-precision copy of their normalized vectors."""
+        snapshot = self._current()
+        if snapshot.vectors is None:
+            return [], np.zeros((0, 0), dtype=np.float32)
+        return list(snapshot.ids), np.array(snapshot.vectors)
+
+    def all_documents(self) -> List[Document]:
+        """Every stored object as a Document."""
+        snapshot = self._current()
+        return [snapshot.document(i) for i in range(len(snapshot.ids))]
+
+    def ids_by_property(self, property_name: str) -> Dict[str, List[str]]:
+        snapshot = self._current()
+        ids = {}
+        for object_id, properties in zip(snapshot.ids, snapshot.properties):
+            value = properties.get(property_name)
+            if value is not None:
+                ids.setdefault(value, []).append(object_id)
+        return ids
+
+    def mask(self, constraints: Optional[dict]) -> np.ndarray:
+        """Rows matching a constraint dict (see rag.filters)."""
+        return self._current().mask(constraints)
+
+    # Writes
+
+    def upsert(self, objects: List[Tuple[str, dict, Optional[List[float]]]]):
+        """
+        Insert or replace objects.
+
+        Args:
+            objects: (id, properties, vector) tuples; a None vector keeps the
+                stored vector of an existing object
+        """
+        if not objects:
+            return
+        snapshot = self._current()
+        ids = list(snapshot.ids)
+        properties = list(snapshot.properties)
+        positions = dict(snapshot.positions)
+
+        new_rows, new_vectors = [], []
+        for object_id, props, vector in objects:
+            i = positions.get(object_id)
+            if i is None:
+                if vector is None:
+                    raise ValueError(f"New object {object_id} needs a vector")
+                positions[object_id] = len(ids)
+                ids.append(object_id)
+                properties.append(props)
+                new_rows.append(object_id)
+                new_vectors.append(vector)
+            else:
+                properties[i] = props
+                if vector is not None:
+                    new_rows.append(object_id)
+                    new_vectors.append(vector)
+
+        # Copy out of the memory map before the file is replaced
+        dim = len(new_vectors[0]) if new_vectors else snapshot.vectors.shape[1]
+        matrix = np.zeros((len(ids), dim), dtype=np.float32)
+        if snapshot.vectors is not None:
+            if snapshot.vectors.shape[1] != dim:
+                raise ValueError(
+                    f"Vector dimension {dim} doesn't match index dimension {snapshot.vectors.shape[1]}"
+                )
+            matrix[:len(snapshot.ids)] = snapshot.vectors
+        if new_vectors:
+            rows = [positions[object_id] for object_id in new_rows]
+            matrix[rows] = _normalize(np.asarray(new_vectors, dtype=np.float32))
+
+        self._write(ids, properties, matrix, previous=snapshot)
+
+    def delete(self, ids: List[str]) -> int:
+        """Delete objects by ID, returning how many were removed."""
+        snapshot = self._current()
+        remove = {object_id for object_id in ids if object_id in snapshot.positions}
+        if not remove:
+            return 0
+        keep = [i for i, object_id in enumerate(snapshot.ids) if object_id not in remove]
+        self._write(
+            [snapshot.ids[i] for i in keep],
+            [snapshot.properties[i] for i in keep],
+            np.array(snapshot.vectors[keep]),
+            previous=snapshot,
+        )
+        return len(remove)
+
+    def create(self):
+        """Create an empty collection if it doesn't exist."""
+        if not self.exists():
+            self._write([], [], None, previous=_EMPTY)
+
+    def drop(self):
+        """Delete the collection directory."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self._current()
+
+    def _write(self, ids: List[str], properties: List[dict], matrix: Optional[np.ndarray], previous: _Snapshot):
+        """
+        Write a new vectors file and swap the sidecar to it.
+
+        The files of the ``previous`` version are kept, so a process that
+        read the old sidecar just before the swap can still open them; only
+        older generations are removed.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        version = uuid.uuid4().hex
+        meta = {"vectors": f"vectors-{version}.npy", "ids": ids, "properties": properties}
+        if ids:
+            np.save(self.directory / meta["vectors"], matrix)
+
+            quantizer_class = get_quantizer(self.quantization)
+            if quantizer_class is not None:
+                quantizer = quantizer_class().fit(matrix)
+                meta["quantization"] = self.quantization
+                meta["codes"] = f"codes-{version}.npz"
+                np.savez(self.directory / meta["codes"], codes=quantizer.encode(matrix), **quantizer.params())
+
+        snapshot = self._snapshot_from(meta)
+        tmp = self.directory / f"{_SIDECAR}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._sidecar)
+
+        # Install the new version directly: with coarse mtimes the sidecar
+        # may look unchanged, and this process must see its own write
+        with self._lock:
+            self._snapshot, self._mtime = snapshot, self._sidecar.stat().st_mtime_ns
+
+        # Readers that still map an older file keep their pages until they reload
+        keep = set(previous.files)
+        for old in [*self.directory.glob("vectors-*.npy"), *self.directory.glob("codes-*.npz")]:
+            if version not in old.name and old.name not in keep:
+                old.unlink(missing_ok=True)
+
+    # Search
+
+    def search(
+        self,
+        vector: List[float],
+        k: int,
+        filters: dict = None,
+        include_vector: bool = False,
+    ) -> List[Tuple[Document, float]]:
+        """Top-k rows by cosine similarity (higher is better)."""
+        snapshot = self._current()
+        if not snapshot.ids:
+            return []
+        candidates = np.flatnonzero(snapshot.mask(filters))
+        if not len(candidates):
+            return []
+
+        rows, scores = snapshot.vector_search(vector, candidates, k * self.rescore_factor)
+        best = _top_k(scores, rows, k)
+        return [(snapshot.document(int(rows[i]), include_vector), float(scores[i])) for i in best]
+
+    def search_hybrid(
+        self,
+        query: str,
+        vector: List[float],
+        k: int,
+        alpha: float,
+        fusion: str,
+        filters: dict = None,
+        include_vector: bool = False,
+    ) -> List[Tuple[Document, float]]:
+        """
+        Fuse BM25 and vector scores like Weaviate's hybrid query.
+
+        ``relative_score`` min-max scales both score sets and weights them by
+        ``alpha``; ``ranked`` sums weighted reciprocal ranks. The fused score
+        is returned as is, and each result's cosine similarity to the query
+        is stored under SIMILARITY_METADATA_KEY.
+        """
+        snapshot = self._current()
+        if not snapshot.ids:
+            return []
+        candidates = np.flatnonzero(snapshot.mask(filters))
+        if not len(candidates):
+            return []
+
+        # With quantization only the rescored rows take part on the vector side
+        rows, scores = snapshot.vector_search(vector, candidates, k * self.rescore_factor)
+        scored = np.isin(candidates, rows)
+        vector_scores = np.zeros(len(candidates))
+        vector_scores[scored] = scores
+        lexical_scores = snapshot.bm25(query, candidates)
+
+        matched = lexical_scores > 0
+        fused = np.zeros(len(candidates))
+        if fusion == "ranked":
+            # Rows only count in the rankings they appear in
+            fused[scored] += alpha / (_RRF_K + _ranks(vector_scores[scored]))
+            fused[matched] += (1 - alpha) / (_RRF_K + _ranks(lexical_scores[matched]))
+        else:
+            fused[scored] += alpha * _minmax(vector_scores[scored])
+            fused[matched] += (1 - alpha) * _minmax(lexical_scores[matched])
+
+        best = _top_k(fused, candidates, k)
+        # Exact similarities, also for BM25-only hits outside the rescored rows
+        query_vector = _normalize(np.asarray(vector, dtype=np.float32))
+        similarities = snapshot.vectors[candidates[best]] @ query_vector
+
+        results = []
+        for i, similarity in zip(best, similarities):
+            doc = snapshot.document(int(candidates[i]), include_vector)
+            doc.metadata[SIMILARITY_METADATA_KEY] = float(similarity)
+            results.append((doc, float(fused[i])))
+        return results
+
+
+# Open collections by name
+_collections: Dict[str, LocalCollection] = {}
+_collections_lock = threading.Lock()
+
+
+def get_local_collection(collection_name: str) -> LocalCollection:
+    """Get the process-wide handle for a local collection."""
+    with _collections_lock:
+        if collection_name not in _collections:
+            _collections[collection_name] = LocalCollection(Path(LOCAL_INDEX_DIR) / collection_name)
+        return _collections[collection_name]
@@ -0,0 +1,143 @@
+"""Dimension reduction for stored and query embeddings.
+
+With EMBEDDING_REDUCTION set, every vector leaving get_embeddings() is cut
+to REDUCED_DIMENSION: "truncate" keeps the leading dimensions (text-embedding-004
+is trained so that prefixes remain usable), "pca" projects onto principal
+components fitted over the ingested corpus. Both renormalize the result.
+
+The PCA projection is saved next to the local indexes with a version derived
+from its contents. Stored chunks carry the version they were embedded with
+(``embedding_version``), so ingestion can tell which collections must be
+re-embedded after the projection changes.
+"""
+
+import hashlib
+import logging
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.config import EMBEDDING_MODEL, EMBEDDING_REDUCTION, REDUCED_DIMENSION, PROJECTION_PATH
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class Projection:
+    """Maps full embeddings to ``dimension`` renormalized components."""
+
+    def __init__(self, kind: str, dimension: int, mean: np.ndarray = None, components: np.ndarray = None):
+        self.kind = kind
+        self.dimension = dimension
+        self.mean = mean
+        self.components = components
+
+    @classmethod
+    def truncate(cls, dimension: int) -> "Projection":
+        return cls("truncate", dimension)
+
+    @classmethod
+    def fit_pca(cls, vectors: np.ndarray, dimension: int) -> "Projection":
+        """
+        Fit a PCA projection over (normalized) corpus embeddings.
+
+        Raises:
+            ValueError: If there are fewer vectors than output dimensions
+        """
+        vectors = _normalize(np.asarray(vectors, dtype=np.float64))
+        if len(vectors) < dimension:
+            raise ValueError(
+                f"PCA to {dimension} dimensions needs at least {dimension} chunks, got {len(vectors)}"
+            )
+        mean = vectors.mean(axis=0)
+        # Right singular vectors of the centered data are the principal axes
+        _, _, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+        return cls("pca", dimension, mean.astype(np.float32), vt[:dimension].astype(np.float32))
+
+    @property
+    def version(self) -> str:
+        """Identifies the projection; stored with every chunk embedded through it."""
+        if self.kind == "truncate":
+            return f"truncate-{self.dimension}"
+        digest = hashlib.sha256(self.components.tobytes() + self.mean.tobytes()).hexdigest()[:12]
+        return f"pca-{self.dimension}-{digest}"
+
+    def apply(self, vectors) -> np.ndarray:
+        """Project a vector or a matrix of vectors and renormalize."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.kind == "truncate":
+            reduced = vectors[..., :self.dimension]
+        else:
+            reduced = (_normalize(vectors) - self.mean) @ self.components.T
+        return _normalize(reduced)
+
+    def save(self, path: Path = None):
+        """Save a fitted PCA projection to an .npz file."""
+        path = Path(path or PROJECTION_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                kind=np.array(self.kind),
+                dimension=np.array(self.dimension),
+                mean=self.mean,
+                components=self.components,
+                model=np.array(EMBEDDING_MODEL),
+            )
+
+    @classmethod
+    def load(cls, path: Path = None) -> "Projection":
+        with np.load(path or PROJECTION_PATH) as data:
+            if str(data["model"]) != EMBEDDING_MODEL:
+                raise ValueError(f"Projection was fitted for {data['model']}")
+            return cls(str(data["kind"]), int(data["dimension"]), data["mean"], data["components"])
+
+
+# Loaded PCA projection and the file mtime it was loaded from
+_pca: Optional[Projection] = None
+_pca_mtime: Optional[float] = None
+
+
+def get_projection() -> Optional[Projection]:
+    """
+    Get the configured projection, or None to keep full embeddings.
+
+    PCA is only used once a projection has been fitted (see
+    scripts/ingest.py); until then embeddings stay at full dimension.
+    """
+    global _pca, _pca_mtime
+    if EMBEDDING_REDUCTION == "truncate":
+        return Projection.truncate(REDUCED_DIMENSION)
+    if EMBEDDING_REDUCTION != "pca":
+        return None
+
+    path = Path(PROJECTION_PATH)
+    if not path.exists():
+        return None
+    mtime = path.stat().st_mtime
+    if mtime != _pca_mtime:
+        try:
+            projection = Projection.load(path)
+        except Exception as e:
+            logger.warning("Could not load embedding projection: %s", e)
+            projection = None
+        _pca = projection if projection is not None and projection.dimension == REDUCED_DIMENSION else None
+        _pca_mtime = mtime
+    return _pca
+
+
+def embedding_version() -> str:
+    """Version of the vectors get_embeddings() currently produces."""
+    projection = get_projection()
+    return projection.version if projection is not None else "full"
+
+
+def embedding_signature() -> str:
+    """Model plus projection version, for caches of query embeddings built offline."""
+    version = embedding_version()
+    return EMBEDDING_MODEL if version == "full" else f"{EMBEDDING_MODEL}|{version}"
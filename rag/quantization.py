@@ -0,0 +1,80 @@
+"""Compressed vector codes for the coarse stage of local vector search.
+
+Codes are compared with the query to pick a candidate set, which is then
+rescored with the full-precision vectors (see LocalCollection). Both
+quantizers work on normalized vectors and estimate cosine similarity.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+# Set bits per byte value, for Hamming distances over packed codes
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+
+class Int8Quantizer:
+    """Scalar quantization: each dimension scaled to -127..127 (4x smaller)."""
+
+    name = "int8"
+
+    def __init__(self, scale: np.ndarray = None):
+        self.scale = scale
+
+    def fit(self, vectors: np.ndarray) -> "Int8Quantizer":
+        """Pick per-dimension scales from the largest absolute values."""
+        self.scale = np.maximum(np.abs(vectors).max(axis=0), 1e-12).astype(np.float32) / 127
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(vectors / self.scale), -127, 127).astype(np.int8)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Approximate dot products of a normalized query with the coded vectors."""
+        return codes @ (query * self.scale)
+
+    def params(self) -> dict:
+        return {"scale": self.scale}
+
+
+class BinaryQuantizer:
+    """1-bit quantization: the sign of each dimension, packed 8 per byte (32x smaller)."""
+
+    name = "binary"
+
+    def __init__(self, dimension: int = None):
+        self.dimension = dimension
+
+    def fit(self, vectors: np.ndarray) -> "BinaryQuantizer":
+        self.dimension = vectors.shape[1]
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.packbits(vectors > 0, axis=-1)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Cosine estimated from the Hamming distance between sign codes."""
+        distance = _POPCOUNT[np.bitwise_xor(codes, self.encode(query))].sum(axis=-1)
+        return np.cos(np.pi * distance / self.dimension)
+
+    def params(self) -> dict:
+        return {"dimension": np.array(self.dimension)}
+
+
+QUANTIZERS = {"int8": Int8Quantizer, "binary": BinaryQuantizer}
+
+
+def get_quantizer(name: str) -> Optional[type]:
+    """Map a VECTOR_QUANTIZATION setting to its quantizer class (None for "none")."""
+    if name in (None, "", "none"):
+        return None
+    if name not in QUANTIZERS:
+        raise ValueError(f"Unknown vector quantization: {name}")
+    return QUANTIZERS[name]
+
+
+def load_quantizer(name: str, params: dict):
+    """Rebuild a fitted quantizer from saved parameters."""
+    if name == "int8":
+        return Int8Quantizer(scale=params["scale"])
+    return BinaryQuantizer(dimension=int(params["dimension"]))
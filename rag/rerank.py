@@ -0,0 +1,108 @@
+"""Local reranking of retrieved candidates.
+
+Retrieval over-fetches candidates per collection; maximal marginal
+relevance (MMR) then picks results that are relevant to the query but not
+near-copies of results already picked, so five chunks of the same vehicle
+don't fill the whole window. Relevance can be boosted by lexical overlap with
+the query. Everything runs on the candidates' stored vectors, without
+network calls.
+"""
+
+import re
+from typing import List, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from rag.local_index import VECTOR_METADATA_KEY
+
+# Words that carry no signal for lexical overlap
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "have", "how", "i", "in", "is", "it", "me", "my", "of", "on", "or",
+    "the", "to", "what", "when", "which", "with", "you", "your",
+}
+
+
+def _terms(text: str) -> set:
+    return {term for term in re.findall(r"\w+", text.lower()) if term not in _STOPWORDS}
+
+
+def lexical_overlap(query: str, documents: List[Document]) -> np.ndarray:
+    """Fraction of the query's terms that appear in each document."""
+    query_terms = sorted(_terms(query))
+    if not query_terms:
+        return np.zeros(len(documents))
+    # Documents x query terms incidence matrix
+    incidence = np.array(
+        [[term in doc_terms for term in query_terms] for doc_terms in (_terms(d.page_content) for d in documents)],
+        dtype=np.float64,
+    )
+    return incidence.mean(axis=1)
+
+
+def mmr_rerank(
+    query: str,
+    query_vector: List[float],
+    results: List[Tuple[Document, float]],
+    k: int,
+    mmr_lambda: float,
+    lexical_weight: float = 0.0,
+) -> List[Tuple[Document, float]]:
+    """
+    Select ``k`` results by maximal marginal relevance.
+
+    Relevance is the cosine similarity to the query, mixed with lexical
+    overlap by ``lexical_weight``. Each step picks the candidate maximizing
+    ``mmr_lambda * relevance - (1 - mmr_lambda) * max similarity to the
+    picked results``, so 1.0 keeps the relevance order and lower values
+    favour diversity. Candidates without a stored vector keep their order
+    after the reranked ones.
+
+    Args:
+        query: Query text, for lexical overlap
+        query_vector: Query embedding
+        results: Over-fetched (Document, score) candidates whose metadata
+            carries the stored vector under VECTOR_METADATA_KEY
+        k: Number of results to keep
+
+    Returns:
+        Up to ``k`` (Document, score) tuples in MMR order, with their
+        original retrieval scores and the vectors removed from metadata
+    """
+    vectors, with_vector, without_vector = [], [], []
+    for doc, score in results:
+        vector = doc.metadata.pop(VECTOR_METADATA_KEY, None)
+        if vector is None:
+            without_vector.append((doc, score))
+        else:
+            vectors.append(vector)
+            with_vector.append((doc, score))
+    if not with_vector:
+        return without_vector[:k]
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    query_vector = np.asarray(query_vector, dtype=np.float32)
+    query_vector /= max(float(np.linalg.norm(query_vector)), 1e-12)
+
+    relevance = matrix @ query_vector
+    if lexical_weight:
+        overlap = lexical_overlap(query, [doc for doc, _ in with_vector])
+        relevance = (1 - lexical_weight) * relevance + lexical_weight * overlap
+    similarity = matrix @ matrix.T
+
+    selected = []
+    max_similarity = np.full(len(with_vector), -np.inf)
+    available = np.ones(len(with_vector), dtype=bool)
+    for _ in range(min(k, len(with_vector))):
+        redundancy = np.where(np.isinf(max_similarity), 0.0, max_similarity)
+        marginal = mmr_lambda * relevance - (1 - mmr_lambda) * redundancy
+        marginal[~available] = -np.inf
+        best = int(np.argmax(marginal))
+        selected.append(best)
+        available[best] = False
+        max_similarity = np.maximum(max_similarity, similarity[best])
+
+    reranked = [with_vector[i] for i in selected]
+    return (reranked + without_vector)[:k]
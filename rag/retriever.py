@@ -1,29 +1,116 @@
 """Hybrid retriever with reranking for RAG."""
 
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
 from langchain_core.documents import Document
-from typing import List
+from langchain_core.retrievers import BaseRetriever
+from typing import List, Optional
 
 from app.config import (
     TOP_K_RESULTS,
+    RETRIEVAL_MODE,
+    HYBRID_ALPHA,
+    HYBRID_FUSION,
+    RETRIEVAL_MAX_WORKERS,
+    RETRIEVAL_BATCH_WORKERS,
+    RETRIEVAL_TIMEOUT_SECONDS,
     COLLECTION_INVENTORY,
     COLLECTION_KNOWLEDGE,
     COLLECTION_POLICIES,
+    RERANK_ENABLED,
+    RERANK_FETCH_FACTOR,
+    RERANK_SETTINGS,
+    VECTOR_BACKEND,
 )
-from rag.vectorstore import get_vectorstore
+from rag.embeddings import embed_queries, get_embeddings
+from rag.rerank import mmr_rerank
+from rag.vectorstore import (
+    SIMILARITY_METADATA_KEY,
+    asearch_by_vector,
+    asearch_hybrid,
+    get_fusion_type,
+    get_vectorstore,
+    search_by_vector,
+    search_hybrid,
+)
+
+logger = logging.getLogger(__name__)
+
+# Shared pool for per-collection searches
+_executor: Optional[ThreadPoolExecutor] = None
+# Separate pool for offline batches
+_batch_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get or create the thread pool used for collection fan-out."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=RETRIEVAL_MAX_WORKERS,
+            thread_name_prefix="retrieval",
+        )
+    return _executor
+
+
+def _get_batch_executor() -> ThreadPoolExecutor:
+    """Get or create the pool for retrieve_batch(), kept apart from live traffic."""
+    global _batch_executor
+    if _batch_executor is None:
+        _batch_executor = ThreadPoolExecutor(
+            max_workers=RETRIEVAL_BATCH_WORKERS,
+            thread_name_prefix="retrieval-batch",
+        )
+    return _batch_executor
+
+
+def _search_kwargs(mode: str) -> dict:
+    """Build LangChain search kwargs for the given retrieval mode."""
+    # WeaviateVectorStore passes these straight to Weaviate's hybrid query
+    kwargs = {"k": TOP_K_RESULTS, "query_properties": ["content"]}
+    if mode == "hybrid":
+        kwargs["alpha"] = HYBRID_ALPHA
+        kwargs["fusion_type"] = get_fusion_type(HYBRID_FUSION)
+    else:
+        kwargs["alpha"] = 1.0
+    return kwargs
+
+
+class CollectionRetriever(BaseRetriever):
+    """LangChain retriever over retrieve_with_scores(), for backends without a LangChain store."""
+    
+    collections: Optional[List[str]] = None
+    mode: str = RETRIEVAL_MODE
+    
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        results = retrieve_with_scores(query, collections=self.collections, mode=self.mode)
+        return [doc for doc, _ in results]
 
 
-def get_retriever(collection_name: str = None):
+def get_retriever(collection_name: str = None, mode: str = RETRIEVAL_MODE):
     """
     Get a retriever for the specified collection or all collections.
     
+    With VECTOR_BACKEND=local there is no LangChain vector store, so the
+    retriever searches the local index through retrieve_with_scores().
+    
     Args:
         collection_name: Specific collection to search, or None for all
+        mode: "hybrid" (BM25 + vector) or "vector"
     """
+    if VECTOR_BACKEND == "local":
+        collections = [collection_name] if collection_name else None
+        return CollectionRetriever(collections=collections, mode=mode)
+    
     if collection_name:
         vectorstore = get_vectorstore(collection_name)
         return vectorstore.as_retriever(
             search_type="similarity",
-            search_kwargs={"k": TOP_K_RESULTS}
+            search_kwargs=_search_kwargs(mode)
         )
     
     # For all collections, return the first available
@@ -32,7 +119,7 @@ def get_retriever(collection_name: str = None):
             vs = get_vectorstore(name)
             return vs.as_retriever(
                 search_type="similarity",
-                search_kwargs={"k": TOP_K_RESULTS}
+                search_kwargs=_search_kwargs(mode)
             )
         except Exception:
             continue
@@ -40,30 +127,396 @@ def get_retriever(collection_name: str = None):
     raise ValueError("No collections available for retrieval")
 
 
-def retrieve_with_scores(query: str, collection_name: str = None) -> List[tuple]:
+def embed_query(query: str) -> List[float]:
+    """Embed a user query once so it can be reused across collections."""
+    return get_embeddings().embed_query(query)
+
+
+async def aembed_query(query: str) -> List[float]:
+    """Async embed_query()."""
+    return await get_embeddings().aembed_query(query)
+
+
+def _rerank_settings(name: str) -> Optional[dict]:
+    """MMR settings for a collection, or None when it is not reranked."""
+    if not RERANK_ENABLED or RERANK_FETCH_FACTOR <= 1:
+        return None
+    return RERANK_SETTINGS.get(name)
+
+
+def _rerank(name: str, query: str, query_vector: List[float], results: List[tuple], k: int) -> tuple:
+    """Narrow over-fetched candidates to k with MMR; returns (results, elapsed_ms)."""
+    start = time.perf_counter()
+    results = mmr_rerank(query, query_vector, results, k, **RERANK_SETTINGS[name])
+    return results, (time.perf_counter() - start) * 1000
+
+
+def _timed_search(
+    name: str,
+    query: str,
+    query_vector: List[float],
+    k: int,
+    mode: str,
+    filters: dict = None,
+) -> tuple:
+    """
+    Search one collection and return its results with timings.
+    
+    Reranked collections fetch ``RERANK_FETCH_FACTOR * k`` candidates with
+    their vectors and keep ``k`` of them by MMR.
+    
+    Returns:
+        (results, search_ms, rerank_ms, candidates); rerank_ms is None when
+        the collection is not reranked
+    """
+    rerank = _rerank_settings(name) is not None
+    fetch_k = k * RERANK_FETCH_FACTOR if rerank else k
+    start = time.perf_counter()
+    if mode == "hybrid":
+        results = search_hybrid(name, query, query_vector, k=fetch_k, filters=filters, include_vector=rerank)
+    else:
+        results = search_by_vector(name, query_vector, k=fetch_k, filters=filters, include_vector=rerank)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    candidates = len(results)
+    
+    rerank_ms = None
+    if rerank:
+        results, rerank_ms = _rerank(name, query, query_vector, results, k)
+    return results, elapsed_ms, rerank_ms, candidates
+
+
+async def _atimed_search(
+    name: str,
+    query: str,
+    query_vector: List[float],
+    k: int,
+    mode: str,
+    filters: dict = None,
+) -> tuple:
+    """Async _timed_search()."""
+    rerank = _rerank_settings(name) is not None
+    fetch_k = k * RERANK_FETCH_FACTOR if rerank else k
+    start = time.perf_counter()
+    if mode == "hybrid":
+        results = await asearch_hybrid(
+            name, query, query_vector, k=fetch_k, filters=filters, include_vector=rerank
+        )
+    else:
+        results = await asearch_by_vector(name, query_vector, k=fetch_k, filters=filters, include_vector=rerank)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    candidates = len(results)
+    
+    rerank_ms = None
+    if rerank:
+        results, rerank_ms = _rerank(name, query, query_vector, results, k)
+    return results, elapsed_ms, rerank_ms, candidates
+
+
+def _search_status(outcome: tuple, filters: dict = None) -> dict:
+    """Trace entry for a successful collection search."""
+    docs_with_scores, elapsed_ms, rerank_ms, candidates = outcome
+    status = {"status": "ok", "hits": len(docs_with_scores), "ms": round(elapsed_ms, 1)}
+    if rerank_ms is not None:
+        status["candidates"] = candidates
+        status["rerank_ms"] = round(rerank_ms, 2)
+    if filters:
+        status["filters"] = filters
+    return status
+
+
+def _future_outcome(future, name: str, timed_out: bool, timeout: float, filters: dict = None) -> tuple:
+    """
+    Results and trace entry of a collection search submitted to an executor.
+    
+    A search that timed out is only reported; its thread can't be stopped
+    and finishes in the background with its result discarded.
+    """
+    if timed_out:
+        logger.warning("Search in %s timed out after %.1fs", name, timeout)
+        return [], {"status": "timeout"}
+    if future.exception() is not None:
+        logger.warning("Search in %s failed: %s", name, future.exception())
+        return [], {"status": "error", "error": str(future.exception())}
+    outcome = future.result()
+    return outcome[0], _search_status(outcome, filters)
+
+
+def search_collections(
+    collections: List[str],
+    query: str,
+    query_vector: List[float],
+    k: int = TOP_K_RESULTS,
+    mode: str = RETRIEVAL_MODE,
+    timeout: float = RETRIEVAL_TIMEOUT_SECONDS,
+    trace: dict = None,
+    filters: dict = None,
+) -> List[tuple]:
+    """
+    Search several collections concurrently with the same query vector.
+    
+    Each collection gets ``timeout`` seconds. Collections that time out or
+    fail are left out of the result and logged instead of blocking the rest.
+    
+    Args:
+        collections: Collection names to search
+        query: Query text (used by the BM25 side of hybrid search)
+        query_vector: Precomputed query embedding
+        k: Results to fetch per collection
+        mode: "hybrid" (BM25 + vector) or "vector"
+        timeout: Per-collection timeout in seconds
+        trace: Optional dict that receives per-collection status and timings
+        filters: Optional {collection: constraints} where-filters (see rag.filters)
+        
+    Returns:
+        Unsorted list of (Document, score) tuples from all collections
+    """
+    filters = filters or {}
+    executor = _get_executor()
+    futures = {
+        executor.submit(_timed_search, name, query, query_vector, k, mode, filters.get(name)): name
+        for name in collections
+    }
+    done, not_done = wait(futures, timeout=timeout)
+    # Only stops searches still queued behind busy workers
+    for future in not_done:
+        future.cancel()
+    
+    results = []
+    for future, name in futures.items():
+        docs_with_scores, status = _future_outcome(
+            future, name, future in not_done, timeout, filters.get(name)
+        )
+        results.extend(docs_with_scores)
+        
+        if trace is not None:
+            trace[name] = status
+    
+    return results
+
+
+async def asearch_collections(
+    collections: List[str],
+    query: str,
+    query_vector: List[float],
+    k: int = TOP_K_RESULTS,
+    mode: str = RETRIEVAL_MODE,
+    timeout: float = RETRIEVAL_TIMEOUT_SECONDS,
+    trace: dict = None,
+    filters: dict = None,
+) -> List[tuple]:
+    """
+    Async search_collections(): searches run as concurrent tasks on the
+    event loop instead of in the thread pool, with the same per-collection
+    timeout, logging and trace entries.
+    """
+    filters = filters or {}
+    outcomes = await asyncio.gather(
+        *(
+            asyncio.wait_for(
+                _atimed_search(name, query, query_vector, k, mode, filters.get(name)),
+                timeout,
+            )
+            for name in collections
+        ),
+        return_exceptions=True,
+    )
+    
+    results = []
+    for name, outcome in zip(collections, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            logger.warning("Search in %s timed out after %.1fs", name, timeout)
+            status = {"status": "timeout"}
+        elif isinstance(outcome, BaseException):
+            logger.warning("Search in %s failed: %s", name, outcome)
+            status = {"status": "error", "error": str(outcome)}
+        else:
+            results.extend(outcome[0])
+            status = _search_status(outcome, filters.get(name))
+        
+        if trace is not None:
+            trace[name] = status
+    
+    return results
+
+
+def _similarity(result: tuple) -> float:
+    """
+    Cosine similarity of a (Document, score) result to the query.
+    
+    Hybrid searches carry the similarity in metadata, since their fused
+    scores are relative to the query and collection; vector search scores
+    already are similarities.
+    """
+    doc, score = result
+    return doc.metadata.get(SIMILARITY_METADATA_KEY, score)
+
+
+def retrieval_confidence(results: List[tuple]) -> float:
+    """Mean cosine similarity of results to the query."""
+    if not results:
+        return 0.0
+    return sum(_similarity(result) for result in results) / len(results)
+
+
+def merge_results(results: List[tuple], k: int = TOP_K_RESULTS) -> List[tuple]:
+    """
+    Merge results from several collections into the overall top ``k``.
+    
+    Fused hybrid scores can't be compared across collections, so each
+    result is scored by its cosine similarity to the query instead.
+    
+    Returns:
+        (Document, similarity) tuples, most similar first
+    """
+    merged = [(doc, _similarity((doc, score))) for doc, score in results]
+    return sorted(merged, key=lambda x: x[1], reverse=True)[:k]
+
+
+def retrieve_with_scores(
+    query: str,
+    collection_name: str = None,
+    query_vector: List[float] = None,
+    trace: dict = None,
+    mode: str = RETRIEVAL_MODE,
+    filters: dict = None,
+    collections: List[str] = None,
+) -> List[tuple]:
     """
     Retrieve documents with relevance scores from all collections.
     
+    The query is embedded once (or ``query_vector`` is used if given) and
+    the same vector is used for concurrent searches in every collection.
+    In hybrid mode each search also runs BM25 over the chunk text, so exact
+    terms like VINs and trim names are matched lexically. ``filters`` maps
+    collection names to constraints applied as where-filters during search.
+    ``collections`` restricts the search to several named collections.
+    
+    Returns:
+        List of (Document, cosine similarity) tuples, best match first (see
+        merge_results), so scores are comparable across collections
+    """
+    if collection_name:
+        collections = [collection_name]
+    elif not collections:
+        collections = [COLLECTION_INVENTORY, COLLECTION_KNOWLEDGE, COLLECTION_POLICIES]
+    
+    if query_vector is None:
+        query_vector = embed_query(query)
+    
+    results = search_collections(
+        collections, query, query_vector, k=TOP_K_RESULTS, mode=mode, trace=trace, filters=filters
+    )
+    return merge_results(results)
+
+
+async def aretrieve_with_scores(
+    query: str,
+    collection_name: str = None,
+    query_vector: List[float] = None,
+    trace: dict = None,
+    mode: str = RETRIEVAL_MODE,
+    filters: dict = None,
+    collections: List[str] = None,
+) -> List[tuple]:
+    """Async retrieve_with_scores() using async embeddings and Weaviate clients."""
+    if collection_name:
+        collections = [collection_name]
+    elif not collections:
+        collections = [COLLECTION_INVENTORY, COLLECTION_KNOWLEDGE, COLLECTION_POLICIES]
+    
+    if query_vector is None:
+        query_vector = await aembed_query(query)
+    
+    results = await asearch_collections(
+        collections, query, query_vector, k=TOP_K_RESULTS, mode=mode, trace=trace, filters=filters
+    )
+    return merge_results(results)
+
+
+def retrieve_batch(
+    queries: List[str],
+    collections: List[str] = None,
+    mode: str = RETRIEVAL_MODE,
+    filters: dict = None,
+    timeout: float = RETRIEVAL_TIMEOUT_SECONDS,
+) -> List[dict]:
+    """
+    Retrieve documents for many queries, for evaluation and bulk jobs.
+    
+    All queries are embedded up front with batched embedding calls (and the
+    embedding cache). The per-collection searches then run on a dedicated
+    pool of RETRIEVAL_BATCH_WORKERS threads, so a long batch doesn't hold up
+    interactive retrieval. Only as many searches as there are free threads
+    are in flight, and each gets ``timeout`` seconds from its start. A timed
+    out search keeps its thread until it returns, so it also keeps its slot.
+    
+    Args:
+        queries: Query texts
+        collections: Collections to search (default: all)
+        mode: "hybrid" (BM25 + vector) or "vector"
+        filters: Optional {collection: constraints} applied to every query
+        timeout: Per-search timeout in seconds
+        
     Returns:
-        List of (Document, score) tuples
+        One dict per query, in input order, with ``query``, ``results``
+        (as from retrieve_with_scores), ``trace`` (per-collection status)
+        and ``timings``: ``embed_ms`` (the query's share of the batched
+        embedding time) and ``search_ms`` (its slowest collection search)
     """
-    collections = [collection_name] if collection_name else [
-        COLLECTION_INVENTORY, COLLECTION_KNOWLEDGE, COLLECTION_POLICIES
+    collections = collections or [COLLECTION_INVENTORY, COLLECTION_KNOWLEDGE, COLLECTION_POLICIES]
+    filters = filters or {}
+    if not queries:
+        return []
+    
+    start = time.perf_counter()
+    query_vectors = embed_queries(get_embeddings(), list(queries))
+    embed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    
+    batch = [
+        {"query": query, "results": [], "trace": {}, "timings": {"embed_ms": round(embed_ms, 1)}}
+        for query in queries
     ]
+    pending = deque((i, name) for i in range(len(queries)) for name in collections)
+    executor = _get_batch_executor()
+    running = {}  # future -> (query index, collection, deadline)
+    abandoned = set()  # timed-out searches still holding a thread
     
-    results = []
-    for name in collections:
-        try:
-            vs = get_vectorstore(name)
-            docs_with_scores = vs.similarity_search_with_score(query, k=TOP_K_RESULTS)
-            results.extend(docs_with_scores)
-        except Exception:
-            continue
+    while pending or running:
+        abandoned = {future for future in abandoned if not future.done()}
+        while pending and len(running) + len(abandoned) < RETRIEVAL_BATCH_WORKERS:
+            i, name = pending.popleft()
+            future = executor.submit(
+                _timed_search, name, queries[i], query_vectors[i], TOP_K_RESULTS, mode, filters.get(name)
+            )
+            running[future] = (i, name, time.monotonic() + timeout)
+        
+        # Wake up for the first finished search or the first deadline
+        next_deadline = min((deadline for _, _, deadline in running.values()), default=None)
+        wait_timeout = None if next_deadline is None else max(0.0, next_deadline - time.monotonic())
+        wait(set(running) | abandoned, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+        
+        now = time.monotonic()
+        for future, (i, name, deadline) in list(running.items()):
+            timed_out = not future.done() and now >= deadline
+            if not (future.done() or timed_out):
+                continue
+            del running[future]
+            if timed_out:
+                abandoned.add(future)
+            docs_with_scores, status = _future_outcome(future, name, timed_out, timeout, filters.get(name))
+            batch[i]["results"].extend(docs_with_scores)
+            batch[i]["trace"][name] = status
+    
+    for entry in batch:
+        entry["results"] = merge_results(entry["results"])
+        elapsed = [
+            status["ms"] + status.get("rerank_ms", 0)
+            for status in entry["trace"].values()
+            if status["status"] == "ok"
+        ]
+        entry["timings"]["search_ms"] = round(max(elapsed), 1) if elapsed else None
     
-    # Sort by score (lower distance = better match for many vector stores)
-    # Weaviate returns distance, so lower is better
-    results.sort(key=lambda x: x[1])
-    return results[:TOP_K_RESULTS]
+    return batch
 
 
 def format_retrieved_context(documents: List[Document]) -> str:
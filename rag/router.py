@@ -0,0 +1,204 @@
+"""Embedding-prototype query router.
+
+Each query type is represented by a prototype vector: the normalized mean
+embedding of example texts for that type (FAQ questions, policy titles,
+inventory records and a few seed questions). Prototypes are built at ingest
+time and saved next to the other local caches. Routing a query is a single
+matrix product against the prototype matrix, reusing the query embedding
+that retrieval needs anyway.
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.config import ROUTER_PROTOTYPES_PATH
+from rag.embeddings import embed_queries
+from rag.projection import embedding_signature
+
+logger = logging.getLogger(__name__)
+
+# Seed questions so every query type has examples, including ones with no corpus
+ROUTER_SEED_QUERIES = {
+    "inventory": [
+        "What SUVs do you have in stock?",
+        "Do you have any electric vehicles?",
+        "Show me used trucks under $40,000",
+        "Is the 2024 Honda Accord still available?",
+        "Which cars have the lowest mileage?",
+    ],
+    "knowledge": [
+        "What financing options do you offer?",
+        "How does the trade-in process work?",
+        "What warranty comes with a certified pre-owned car?",
+        "Can I get a loan with bad credit?",
+        "What are your business hours?",
+    ],
+    "policy": [
+        "What is your return policy?",
+        "Can I return a car after buying it?",
+        "What are the terms of your price guarantee?",
+        "Do you charge a deposit to hold a vehicle?",
+    ],
+    "web": [
+        "What is the latest news about the car market?",
+        "What is the current federal EV tax credit?",
+        "What are this year's auto industry trends?",
+        "When is the new model being released?",
+        "How are interest rates affecting car prices right now?",
+    ],
+    "general": [
+        "Hello",
+        "Who are you?",
+        "Thanks for your help",
+        "Can you tell me a joke?",
+    ],
+}
+
+# Temperatures tried when calibrating the softmax over prototype similarities
+_TEMPERATURE_GRID = (0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.2)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class PrototypeRouter:
+    """Classify query embeddings by cosine similarity to per-type prototypes."""
+
+    def __init__(self, categories: List[str], prototypes: np.ndarray, temperature: float, model: str):
+        self.categories = list(categories)
+        self.prototypes = _normalize(np.asarray(prototypes, dtype=np.float32))
+        self.temperature = float(temperature)
+        self.model = model
+
+    @classmethod
+    def build(cls, examples: Dict[str, List[str]], embeddings: Embeddings) -> "PrototypeRouter":
+        """
+        Build prototypes from example texts per query type.
+
+        The softmax temperature is calibrated with leave-one-out: each example
+        is scored against prototypes built without it, and the temperature
+        that minimizes the negative log-likelihood of its true type is kept.
+        """
+        categories = [name for name, texts in examples.items() if texts]
+        texts = [text for name in categories for text in examples[name]]
+        labels = np.array([i for i, name in enumerate(categories) for _ in examples[name]])
+
+        vectors = _normalize(np.asarray(embed_queries(embeddings, texts), dtype=np.float32))
+        sums = np.stack([vectors[labels == i].sum(axis=0) for i in range(len(categories))])
+        counts = np.bincount(labels, minlength=len(categories))
+        prototypes = _normalize(sums)
+
+        # Leave-one-out similarities: swap in each example's own type without it
+        similarities = vectors @ prototypes.T
+        held_out = _normalize(sums[labels] - vectors)
+        rows = np.arange(len(labels))
+        similarities[rows, labels] = np.einsum("ij,ij->i", held_out, vectors)
+        usable = counts[labels] > 1
+
+        best_temperature, best_nll = _TEMPERATURE_GRID[-1], float("inf")
+        if usable.any():
+            for temperature in _TEMPERATURE_GRID:
+                probs = _softmax(similarities[usable] / temperature)
+                nll = -np.log(probs[np.arange(usable.sum()), labels[usable]] + 1e-12).mean()
+                if nll < best_nll:
+                    best_temperature, best_nll = temperature, nll
+
+        return cls(categories, prototypes, best_temperature, embedding_signature())
+
+    def classify(self, query_vector: List[float]) -> Tuple[str, float, Dict[str, float]]:
+        """
+        Route a query embedding.
+
+        Returns:
+            (query_type, confidence, probability per query type)
+        """
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        probs = _softmax((self.prototypes @ query) / self.temperature)
+        best = int(np.argmax(probs))
+        return (
+            self.categories[best],
+            float(probs[best]),
+            {name: float(p) for name, p in zip(self.categories, probs)},
+        )
+
+    def save(self, path: Path = None):
+        """Save prototypes to an .npz file."""
+        path = Path(path or ROUTER_PROTOTYPES_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                categories=np.array(self.categories),
+                prototypes=self.prototypes,
+                temperature=np.float32(self.temperature),
+                model=np.array(self.model),
+            )
+
+    @classmethod
+    def load(cls, path: Path = None) -> "PrototypeRouter":
+        """Load prototypes saved by save()."""
+        with np.load(path or ROUTER_PROTOTYPES_PATH) as data:
+            return cls(
+                categories=[str(c) for c in data["categories"]],
+                prototypes=data["prototypes"],
+                temperature=float(data["temperature"]),
+                model=str(data["model"]),
+            )
+
+
+# Loaded router and the file mtime it was loaded from
+_router: Optional[PrototypeRouter] = None
+_router_mtime: Optional[float] = None
+
+
+def get_router() -> Optional[PrototypeRouter]:
+    """
+    Get the prototype router, reloading it when ingestion rebuilt the file.
+
+    Returns None if no prototypes were built yet or they were built with a
+    different embedding model or projection.
+    """
+    global _router, _router_mtime
+    path = Path(ROUTER_PROTOTYPES_PATH)
+    if not path.exists():
+        return None
+
+    mtime = path.stat().st_mtime
+    if _router is None or mtime != _router_mtime:
+        try:
+            router = PrototypeRouter.load(path)
+        except Exception as e:
+            logger.warning("Could not load router prototypes: %s", e)
+            return None
+        _router = router
+        _router_mtime = mtime
+    return _router if _router.model == embedding_signature() else None
+
+
+def build_router(
+    inventory_texts: List[str],
+    faq_questions: List[str],
+    policy_titles: List[str],
+    embeddings: Embeddings,
+) -> PrototypeRouter:
+    """Build and save router prototypes from the ingested corpus."""
+    examples = {name: list(seeds) for name, seeds in ROUTER_SEED_QUERIES.items()}
+    examples["inventory"] += inventory_texts
+    examples["knowledge"] += faq_questions
+    examples["policy"] += policy_titles
+
+    router = PrototypeRouter.build(examples, embeddings)
+    router.save()
+    return router
@@ -1,11 +1,24 @@
-"""Weaviate vector store operations."""
+"""Vector store operations.
 
+Weaviate is the default backend. With VECTOR_BACKEND=local the same
+functions use the in-process memory-mapped index in rag.local_index.
+"""
+
+import asyncio
+import datetime
+import hashlib
+import logging
+import uuid
 import weaviate
 from weaviate.classes.init import Auth
 from weaviate.classes.config import Configure, Property, DataType
+from weaviate.classes.query import Filter, HybridFusion, MetadataQuery
+from weaviate.util import generate_uuid5
+from langchain_core.documents import Document
 from langchain_weaviate import WeaviateVectorStore
-from typing import Optional
-import atexit
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
 
 from app.config import (
     WEAVIATE_URL,
@@ -15,93 +28,706 @@ from app.config import (
     COLLECTION_KNOWLEDGE,
     COLLECTION_POLICIES,
     EMBEDDING_DIMENSION,
+    INGEST_BATCH_SIZE,
+    INGEST_CONCURRENCY,
+    HYBRID_ALPHA,
+    HYBRID_FUSION,
+    EMBEDDING_CACHE_ENABLED,
+    VECTOR_BACKEND,
+    VECTOR_QUANTIZATION,
+    QUANTIZATION_RESCORE_FACTOR,
+    TOP_K_RESULTS,
+    WRITE_STAMP_DIR,
 )
+from app.clients import get_registry
 from rag.embeddings import get_embeddings
+from rag.local_index import SIMILARITY_METADATA_KEY, VECTOR_METADATA_KEY, get_local_collection
+from rag.projection import embedding_version
 
-# Global client instance
-_client: Optional[weaviate.WeaviateClient] = None
+logger = logging.getLogger(__name__)
 
+# Max object IDs per existence lookup
+_FETCH_BATCH = 500
 
-def get_weaviate_client() -> weaviate.WeaviateClient:
-    """Get or create Weaviate client instance."""
-    global _client
-    
-    if _client is not None and _client.is_connected():
-        return _client
+# Callbacks notified with the collection name after its data changes
+_write_listeners: List[Callable[[str], None]] = []
+
+
+def add_write_listener(listener: Callable[[str], None]):
+    """Register a callback run with the collection name after every write."""
+    if listener not in _write_listeners:
+        _write_listeners.append(listener)
+
+
+def read_write_stamp(collection_name: str) -> Optional[str]:
+    """
+    Token of the last write to a collection by any process, or None if there was none.
     
+    Listeners only hear about writes made in this process; comparing stamps
+    also catches writes from scripts, the Streamlit app and other workers.
+    """
+    try:
+        return (WRITE_STAMP_DIR / f"{collection_name}.stamp").read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+
+
+def _touch_write_stamp(collection_name: str):
+    """Give a collection a new write stamp (a fresh token, so coarse mtimes don't matter)."""
+    path = WRITE_STAMP_DIR / f"{collection_name}.stamp"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    token = uuid.uuid4().hex
+    tmp_path = path.with_name(f"{path.name}.{token}.tmp")
+    tmp_path.write_text(token, encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def _notify_write(collection_name: str):
+    try:
+        _touch_write_stamp(collection_name)
+    except OSError as e:
+        logger.warning("Could not update the write stamp for %s: %s", collection_name, e)
+    for listener in list(_write_listeners):
+        try:
+            listener(collection_name)
+        except Exception as e:
+            logger.warning("Write listener failed for %s: %s", collection_name, e)
+
+
+def _connect_weaviate() -> weaviate.WeaviateClient:
+    """Open a new Weaviate connection (embedded or cloud)."""
     if USE_EMBEDDED_WEAVIATE:
-        _client = weaviate.connect_to_embedded()
-    else:
-        _client = weaviate.connect_to_weaviate_cloud(
-            cluster_url=WEAVIATE_URL,
-            auth_credentials=Auth.api_key(WEAVIATE_API_KEY)
-        )
-    
-    # Register cleanup
-    atexit.register(lambda: _client.close() if _client else None)
-    
-    return _client
+        return weaviate.connect_to_embedded()
+    return weaviate.connect_to_weaviate_cloud(
+        cluster_url=WEAVIATE_URL,
+        auth_credentials=Auth.api_key(WEAVIATE_API_KEY)
+    )
+
+
+def get_weaviate_client() -> weaviate.WeaviateClient:
+    """Get the shared Weaviate client, reconnecting if the connection dropped."""
+    return get_registry().get(
+        "weaviate",
+        _connect_weaviate,
+        health_check=lambda client: client.is_connected(),
+    )
+
+
+def _create_async_weaviate() -> weaviate.WeaviateAsyncClient:
+    """Build an async Weaviate client; it connects on first use."""
+    if USE_EMBEDDED_WEAVIATE:
+        # The sync client starts the embedded server; attach to its default ports
+        get_weaviate_client()
+        return weaviate.use_async_with_local(port=8079, grpc_port=50050)
+    return weaviate.use_async_with_weaviate_cloud(
+        cluster_url=WEAVIATE_URL,
+        auth_credentials=Auth.api_key(WEAVIATE_API_KEY)
+    )
+
+
+async def aget_weaviate_client() -> weaviate.WeaviateAsyncClient:
+    """Get the async Weaviate client for the running event loop, connecting if needed."""
+    registry = get_registry()
+    client = registry.get_for_loop("weaviate_async", _create_async_weaviate)
+    if not client.is_connected():
+        async with registry.get_for_loop("weaviate_async_connect", asyncio.Lock):
+            if not client.is_connected():
+                await client.connect()
+    return client
+
+
+# Typed, filterable properties for vehicle records
+INVENTORY_PROPERTIES = [
+    Property(name="vin", data_type=DataType.TEXT),
+    Property(name="make", data_type=DataType.TEXT),
+    Property(name="year", data_type=DataType.INT),
+    Property(name="type", data_type=DataType.TEXT),
+    Property(name="fuel_type", data_type=DataType.TEXT),
+    Property(name="price", data_type=DataType.NUMBER),
+    Property(name="mileage", data_type=DataType.INT),
+    Property(name="status", data_type=DataType.TEXT),
+]
+
+
+def _vector_index_config():
+    """HNSW config with Weaviate's quantizer matching VECTOR_QUANTIZATION, or None."""
+    rescore_limit = TOP_K_RESULTS * QUANTIZATION_RESCORE_FACTOR
+    if VECTOR_QUANTIZATION == "int8":
+        return Configure.VectorIndex.hnsw(quantizer=Configure.VectorIndex.Quantizer.sq(rescore_limit=rescore_limit))
+    if VECTOR_QUANTIZATION == "binary":
+        return Configure.VectorIndex.hnsw(quantizer=Configure.VectorIndex.Quantizer.bq(rescore_limit=rescore_limit))
+    return None
 
 
 def init_collections():
     """Initialize all required collections if they don't exist."""
-    client = get_weaviate_client()
-    
     collections = [
-        (COLLECTION_INVENTORY, "Car inventory items with vehicle details"),
-        (COLLECTION_KNOWLEDGE, "Dealership FAQs and general knowledge"),
-        (COLLECTION_POLICIES, "Dealership policies and terms"),
+        (COLLECTION_INVENTORY, "Car inventory items with vehicle details", INVENTORY_PROPERTIES),
+        (COLLECTION_KNOWLEDGE, "Dealership FAQs and general knowledge", []),
+        (COLLECTION_POLICIES, "Dealership policies and terms", []),
     ]
     
-    for name, description in collections:
+    if VECTOR_BACKEND == "local":
+        for name, _, _ in collections:
+            get_local_collection(name).create()
+        return
+    
+    client = get_weaviate_client()
+    for name, description, extra_properties in collections:
         if not client.collections.exists(name):
             client.collections.create(
                 name=name,
                 description=description,
                 vectorizer_config=Configure.Vectorizer.none(),
+                vector_index_config=_vector_index_config(),
                 properties=[
                     Property(name="content", data_type=DataType.TEXT),
                     Property(name="source", data_type=DataType.TEXT),
                     Property(name="category", data_type=DataType.TEXT),
                     Property(name="metadata", data_type=DataType.TEXT),
+                    *extra_properties,
                 ]
             )
 
 
 def get_vectorstore(collection_name: str) -> WeaviateVectorStore:
-    """Get a LangChain vector store for the given collection."""
+    """Get the shared LangChain vector store for the given collection (Weaviate backend only)."""
+    if VECTOR_BACKEND == "local":
+        raise ValueError("LangChain vector stores need the Weaviate backend; use search_by_vector()")
+    
+    def create() -> WeaviateVectorStore:
+        return WeaviateVectorStore(
+            client=get_weaviate_client(),
+            index_name=collection_name,
+            text_key="content",
+            embedding=get_embeddings(),
+        )
+    
+    # Rebuild the store if the Weaviate client it wraps was replaced
+    return get_registry().get(
+        f"vectorstore:{collection_name}",
+        create,
+        health_check=lambda vs: vs._client is get_weaviate_client(),
+    )
+
+
+def _object_to_document(obj) -> Document:
+    """Convert a Weaviate object into a LangChain Document."""
+    properties = dict(obj.properties)
+    content = properties.pop("content", "") or ""
+    if obj.vector:
+        properties[VECTOR_METADATA_KEY] = obj.vector.get("default")
+    return Document(page_content=content, metadata=properties)
+
+
+def build_filter(constraints: Optional[dict]):
+    """
+    Translate a constraint dict (see rag.filters) into a Weaviate filter.
+    
+    Returns:
+        A Weaviate filter, or None if there are no constraints
+    """
+    conditions = []
+    for field, ops in (constraints or {}).items():
+        prop = Filter.by_property(field)
+        for op, value in ops.items():
+            if op == "eq":
+                conditions.append(prop.equal(value))
+            elif op == "contains":
+                conditions.append(prop.like(f"*{value}*"))
+            elif op == "lt":
+                conditions.append(prop.less_than(value))
+            elif op == "lte":
+                conditions.append(prop.less_or_equal(value))
+            elif op == "gt":
+                conditions.append(prop.greater_than(value))
+            elif op == "gte":
+                conditions.append(prop.greater_or_equal(value))
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+    
+    if not conditions:
+        return None
+    return Filter.all_of(conditions) if len(conditions) > 1 else conditions[0]
+
+
+def search_by_vector(
+    collection_name: str,
+    vector: List[float],
+    k: int,
+    filters: dict = None,
+    include_vector: bool = False,
+) -> List[Tuple[Document, float]]:
+    """
+    Run a near-vector search against a collection with a precomputed embedding.
+    
+    Args:
+        collection_name: Collection to search
+        vector: Precomputed query embedding
+        k: Number of results
+        filters: Optional constraint dict applied as a where-filter
+        include_vector: Put each result's stored vector in its metadata
+            under VECTOR_METADATA_KEY (for reranking)
+        
+    Returns:
+        List of (Document, similarity) tuples, where similarity is
+        1 - cosine distance (higher is better)
+    """
+    if VECTOR_BACKEND == "local":
+        return get_local_collection(collection_name).search(vector, k, filters, include_vector)
+    
     client = get_weaviate_client()
-    embeddings = get_embeddings()
+    collection = client.collections.get(collection_name)
     
-    return WeaviateVectorStore(
-        client=client,
-        index_name=collection_name,
-        text_key="content",
-        embedding=embeddings,
+    response = collection.query.near_vector(
+        near_vector=vector,
+        limit=k,
+        filters=build_filter(filters),
+        include_vector=include_vector,
+        return_metadata=MetadataQuery(distance=True),
     )
+    
+    return _near_vector_results(response)
 
 
-def add_documents(collection_name: str, documents: list, source: str = "upload"):
-    """Add documents to a collection."""
-    vectorstore = get_vectorstore(collection_name)
+async def asearch_by_vector(
+    collection_name: str,
+    vector: List[float],
+    k: int,
+    filters: dict = None,
+    include_vector: bool = False,
+) -> List[Tuple[Document, float]]:
+    """Async search_by_vector() using the event loop's Weaviate client."""
+    if VECTOR_BACKEND == "local":
+        # In-process NumPy search; fast enough to run on the event loop
+        return get_local_collection(collection_name).search(vector, k, filters, include_vector)
+    
+    client = await aget_weaviate_client()
+    collection = client.collections.get(collection_name)
+    
+    response = await collection.query.near_vector(
+        near_vector=vector,
+        limit=k,
+        filters=build_filter(filters),
+        include_vector=include_vector,
+        return_metadata=MetadataQuery(distance=True),
+    )
     
-    # Add source metadata
+    return _near_vector_results(response)
+
+
+def _near_vector_results(response) -> List[Tuple[Document, float]]:
+    """Convert near-vector hits to (Document, 1 - cosine distance) tuples."""
+    return [
+        (_object_to_document(obj), 1.0 - obj.metadata.distance)
+        for obj in response.objects
+    ]
+
+
+def content_hash(text: str) -> str:
+    """Hash chunk text for change detection and deterministic IDs."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def document_id(collection_name: str, doc: Document) -> str:
+    """
+    Build a deterministic object ID for a chunk.
+    
+    The ID is derived from (collection, source, chunk_index, content hash), so
+    re-ingesting the same chunk always maps to the same Weaviate object.
+    Records with a stable key (e.g. a VIN in ``record_key``) use it in place
+    of the source, and may supply their own ``content_hash``.
+    """
+    metadata = doc.metadata
+    key = metadata.get("record_key") or metadata.get("source", "")
+    digest = metadata.get("content_hash") or content_hash(doc.page_content)
+    return generate_uuid5(
+        f"{collection_name}|{key}|{metadata.get('chunk_index', 0)}|{digest}"
+    )
+
+
+def _json_value(value):
+    """Make a metadata value storable as a Weaviate property."""
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def _document_properties(doc: Document) -> dict:
+    """Build the Weaviate properties stored for a chunk."""
+    properties = {key: _json_value(value) for key, value in doc.metadata.items()}
+    properties.setdefault("content_hash", content_hash(doc.page_content))
+    properties["embedding_version"] = embedding_version()
+    properties["content"] = doc.page_content
+    return properties
+
+
+def _fetch_existing(collection, ids: List[str], include_vector: bool = False) -> dict:
+    """Fetch stored objects by ID, returning {id: object}."""
+    existing = {}
+    for start in range(0, len(ids), _FETCH_BATCH):
+        batch = ids[start:start + _FETCH_BATCH]
+        response = collection.query.fetch_objects(
+            filters=Filter.by_id().contains_any(batch),
+            limit=len(batch),
+            include_vector=include_vector,
+        )
+        for obj in response.objects:
+            existing[str(obj.uuid)] = obj
+    return existing
+
+
+def _batch_context(collection, batch_size: int, concurrency: int):
+    """Open a Weaviate batch, fixed-size if a batch size is configured."""
+    if batch_size:
+        return collection.batch.fixed_size(
+            batch_size=batch_size,
+            concurrent_requests=concurrency,
+        )
+    return collection.batch.dynamic()
+
+
+def get_fusion_type(fusion: str) -> HybridFusion:
+    """Map a fusion setting name to Weaviate's fusion type."""
+    if fusion == "ranked":
+        return HybridFusion.RANKED
+    if fusion == "relative_score":
+        return HybridFusion.RELATIVE_SCORE
+    raise ValueError(f"Unknown hybrid fusion type: {fusion}")
+
+
+def search_hybrid(
+    collection_name: str,
+    query: str,
+    vector: List[float],
+    k: int,
+    alpha: float = HYBRID_ALPHA,
+    fusion: str = HYBRID_FUSION,
+    filters: dict = None,
+    include_vector: bool = False,
+) -> List[Tuple[Document, float]]:
+    """
+    Run a hybrid BM25 + vector search over the ``content`` property.
+    
+    Args:
+        collection_name: Collection to search
+        query: Query text for the BM25 side
+        vector: Precomputed query embedding for the vector side
+        k: Number of results
+        alpha: Vector weight (1.0 = pure vector, 0.0 = pure BM25)
+        fusion: "relative_score" or "ranked" (reciprocal rank fusion)
+        filters: Optional constraint dict applied as a where-filter
+        include_vector: Put each result's stored vector in its metadata
+        
+    Returns:
+        List of (Document, score) tuples, best first. Scores are the fused
+        hybrid scores, which only rank results within this query and
+        collection; each result's cosine similarity to the query is in its
+        metadata under SIMILARITY_METADATA_KEY.
+    """
+    if VECTOR_BACKEND == "local":
+        return get_local_collection(collection_name).search_hybrid(
+            query, vector, k, alpha, fusion, filters, include_vector
+        )
+    
+    client = get_weaviate_client()
+    collection = client.collections.get(collection_name)
+    
+    response = collection.query.hybrid(
+        **_hybrid_query_args(query, vector, k, alpha, fusion, filters)
+    )
+    
+    return _hybrid_results(response, vector, include_vector)
+
+
+async def asearch_hybrid(
+    collection_name: str,
+    query: str,
+    vector: List[float],
+    k: int,
+    alpha: float = HYBRID_ALPHA,
+    fusion: str = HYBRID_FUSION,
+    filters: dict = None,
+    include_vector: bool = False,
+) -> List[Tuple[Document, float]]:
+    """Async search_hybrid() using the event loop's Weaviate client."""
+    if VECTOR_BACKEND == "local":
+        return get_local_collection(collection_name).search_hybrid(
+            query, vector, k, alpha, fusion, filters, include_vector
+        )
+    
+    client = await aget_weaviate_client()
+    collection = client.collections.get(collection_name)
+    
+    response = await collection.query.hybrid(
+        **_hybrid_query_args(query, vector, k, alpha, fusion, filters)
+    )
+    
+    return _hybrid_results(response, vector, include_vector)
+
+
+def _hybrid_query_args(query, vector, k, alpha, fusion, filters) -> dict:
+    """Build the hybrid query arguments shared by the sync and async searches."""
+    return {
+        "query": query,
+        "vector": vector,
+        "alpha": alpha,
+        "fusion_type": get_fusion_type(fusion),
+        "query_properties": ["content"],
+        "limit": k,
+        "filters": build_filter(filters),
+        # Vectors give each hit a similarity comparable across collections
+        "include_vector": True,
+        "return_metadata": MetadataQuery(score=True),
+    }
+
+
+def _hybrid_results(response, vector: List[float], include_vector: bool) -> List[Tuple[Document, float]]:
+    """Convert hybrid hits to (Document, fused score) tuples with their vector similarity."""
+    query = np.asarray(vector, dtype=np.float32)
+    query /= max(float(np.linalg.norm(query)), 1e-12)
+    
+    results = []
+    for obj in response.objects:
+        doc = _object_to_document(obj)
+        if include_vector:
+            stored = doc.metadata.get(VECTOR_METADATA_KEY)
+        else:
+            stored = doc.metadata.pop(VECTOR_METADATA_KEY, None)
+        if stored is not None:
+            stored = np.asarray(stored, dtype=np.float32)
+            doc.metadata[SIMILARITY_METADATA_KEY] = float(
+                stored @ query / max(float(np.linalg.norm(stored)), 1e-12)
+            )
+        results.append((doc, obj.metadata.score or 0.0))
+    return results
+
+
+def add_documents(
+    collection_name: str,
+    documents: list,
+    source: str = None,
+    batch_size: int = INGEST_BATCH_SIZE,
+    concurrency: int = INGEST_CONCURRENCY,
+) -> dict:
+    """
+    Upsert documents into a collection.
+    
+    Object IDs are deterministic, so chunks that are already stored with the
+    same properties are skipped, chunks whose metadata changed are updated
+    in place with their existing vector, and only new chunks (or chunks
+    embedded with another projection) are embedded.
+    
+    Args:
+        collection_name: Target collection
+        documents: Chunked Document objects
+        source: Optional source name overriding each document's own source
+        batch_size: Objects per batch request (0 for dynamic batching)
+        concurrency: Concurrent batch requests
+        
+    Returns:
+        Report dict with inserted, updated, skipped and failed counts
+    """
+    report = {"inserted": 0, "updated": 0, "skipped": 0, "failed": 0}
+    if not documents:
+        return report
+    
+    # Add source metadata and compute IDs, dropping duplicates within the call
+    pending = {}
     for doc in documents:
-        doc.metadata["source"] = source
+        if source:
+            doc.metadata["source"] = source
+        doc.metadata.setdefault("source", "upload")
         doc.metadata["category"] = collection_name
+        pending[document_id(collection_name, doc)] = doc
+    report["skipped"] += len(documents) - len(pending)
     
-    vectorstore.add_documents(documents)
+    if VECTOR_BACKEND == "local":
+        local = get_local_collection(collection_name)
+        existing = {object_id: stored["properties"] for object_id, stored in local.get(list(pending)).items()}
+    else:
+        client = get_weaviate_client()
+        collection = client.collections.get(collection_name)
+        existing = {
+            object_id: stored.properties
+            for object_id, stored in _fetch_existing(collection, list(pending)).items()
+        }
+    
+    to_insert = []
+    to_update = []
+    for object_id, doc in pending.items():
+        properties = _document_properties(doc)
+        stored = existing.get(object_id)
+        # Vectors from another projection must be re-embedded, not kept
+        if stored is None or stored.get("embedding_version", "full") != properties["embedding_version"]:
+            to_insert.append((object_id, doc, properties))
+        elif any(stored.get(key) != value for key, value in properties.items()):
+            to_update.append((object_id, properties))
+        else:
+            report["skipped"] += 1
+    
+    # Only new chunks need embedding; updates keep their stored vector
+    vectors = []
+    if to_insert:
+        vectors = get_embeddings().embed_documents([doc.page_content for _, doc, _ in to_insert])
+    
+    if VECTOR_BACKEND == "local":
+        local.upsert(
+            [(object_id, properties, vector) for (object_id, _, properties), vector in zip(to_insert, vectors)]
+            + [(object_id, properties, None) for object_id, properties in to_update]
+        )
+        report["inserted"] = len(to_insert)
+        report["updated"] = len(to_update)
+        if to_insert or to_update:
+            _notify_write(collection_name)
+        return report
+    
+    stored_vectors = {}
+    if to_update:
+        stored = _fetch_existing(collection, [object_id for object_id, _ in to_update], include_vector=True)
+        stored_vectors = {object_id: obj.vector.get("default") for object_id, obj in stored.items()}
+    
+    with _batch_context(collection, batch_size, concurrency) as batch:
+        for (object_id, _, properties), vector in zip(to_insert, vectors):
+            batch.add_object(properties=properties, uuid=object_id, vector=vector)
+        for object_id, properties in to_update:
+            batch.add_object(properties=properties, uuid=object_id, vector=stored_vectors.get(object_id))
+    
+    failed_ids = {str(obj.object_.uuid) for obj in collection.batch.failed_objects}
+    for obj in collection.batch.failed_objects:
+        logger.error("Failed to add object %s: %s", obj.object_.uuid, obj.message)
+    
+    report["failed"] = len(failed_ids)
+    report["inserted"] = sum(1 for object_id, _, _ in to_insert if object_id not in failed_ids)
+    report["updated"] = sum(1 for object_id, _ in to_update if object_id not in failed_ids)
+    if report["inserted"] or report["updated"]:
+        _notify_write(collection_name)
+    return report
+
+
+def delete_documents(collection_name: str, ids: List[str]) -> int:
+    """Delete objects by ID from a collection, returning how many were removed."""
+    if not ids:
+        return 0
+    
+    if VECTOR_BACKEND == "local":
+        deleted = get_local_collection(collection_name).delete(ids)
+        if deleted:
+            _notify_write(collection_name)
+        return deleted
+    
+    client = get_weaviate_client()
+    if not client.collections.exists(collection_name):
+        return 0
+    collection = client.collections.get(collection_name)
+    
+    deleted = 0
+    for start in range(0, len(ids), _FETCH_BATCH):
+        batch = ids[start:start + _FETCH_BATCH]
+        result = collection.data.delete_many(where=Filter.by_id().contains_any(batch))
+        deleted += result.successful
+    if deleted:
+        _notify_write(collection_name)
+    return deleted
+
+
+def get_ids_by_property(collection_name: str, property_name: str) -> dict:
+    """Map each stored value of a property to the object IDs that carry it."""
+    if VECTOR_BACKEND == "local":
+        return get_local_collection(collection_name).ids_by_property(property_name)
+    
+    client = get_weaviate_client()
+    if not client.collections.exists(collection_name):
+        return {}
+    collection = client.collections.get(collection_name)
+    
+    ids = {}
+    for obj in collection.iterator(return_properties=[property_name]):
+        value = obj.properties.get(property_name)
+        if value is not None:
+            ids.setdefault(value, []).append(str(obj.uuid))
+    return ids
+
+
+def get_all_documents(collection_name: str) -> List[Document]:
+    """Read every stored chunk of a collection with its metadata."""
+    if VECTOR_BACKEND == "local":
+        return get_local_collection(collection_name).all_documents()
+    
+    client = get_weaviate_client()
+    if not client.collections.exists(collection_name):
+        return []
+    collection = client.collections.get(collection_name)
+    return [_object_to_document(obj) for obj in collection.iterator()]
+
+
+def rebuild_stale_collection(collection_name: str) -> int:
+    """
+    Re-embed a collection whose chunks were embedded with another projection.
+    
+    The collection is recreated, since the vector dimension may change. With
+    the embedding cache enabled, all chunks are embedded before anything is
+    deleted, so a failing embedding call leaves the old collection in place.
+    
+    Returns:
+        Number of chunks re-embedded (0 if the collection was up to date)
+    """
+    documents = get_all_documents(collection_name)
+    current = embedding_version()
+    if all(doc.metadata.get("embedding_version", "full") == current for doc in documents):
+        return 0
+    
+    # Warm the embedding cache; add_documents() then embeds from it
+    if EMBEDDING_CACHE_ENABLED:
+        get_embeddings().embed_documents([doc.page_content for doc in documents])
+    delete_collection(collection_name)
+    init_collections()
+    add_documents(collection_name, documents)
+    return len(documents)
+
+
+def get_all_vectors(collection_name: str) -> Tuple[List[str], np.ndarray]:
+    """
+    Read every stored vector of a collection, e.g. for offline evaluation.
+    
+    Returns:
+        (object IDs, float32 matrix with one row per ID)
+    """
+    if VECTOR_BACKEND == "local":
+        return get_local_collection(collection_name).all_vectors()
+    
+    client = get_weaviate_client()
+    if not client.collections.exists(collection_name):
+        return [], np.zeros((0, 0), dtype=np.float32)
+    collection = client.collections.get(collection_name)
+    
+    ids, vectors = [], []
+    for obj in collection.iterator(include_vector=True, return_properties=[]):
+        ids.append(str(obj.uuid))
+        vectors.append(obj.vector["default"])
+    return ids, np.asarray(vectors, dtype=np.float32)
 
 
 def delete_collection(collection_name: str):
     """Delete a collection and all its data."""
+    if VECTOR_BACKEND == "local":
+        local = get_local_collection(collection_name)
+        if local.exists():
+            local.drop()
+            _notify_write(collection_name)
+        return
+    
     client = get_weaviate_client()
     if client.collections.exists(collection_name):
         client.collections.delete(collection_name)
+        _notify_write(collection_name)
 
 
 def get_collection_count(collection_name: str) -> int:
     """Get the number of documents in a collection."""
+    if VECTOR_BACKEND == "local":
+        return get_local_collection(collection_name).count()
+    
     client = get_weaviate_client()
     if not client.collections.exists(collection_name):
         return 0
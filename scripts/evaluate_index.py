@@ -0,0 +1,217 @@
+"""Measure how index compression affects search results.
+
+Runs a set of golden queries against each collection and reports recall@k
+of the compressed search against exact full-precision search, so a setting
+can be checked before it is switched on.
+
+    python scripts/evaluate_index.py quantization
+    python scripts/evaluate_index.py quantization --queries golden.txt --k 10
+    python scripts/evaluate_index.py dimensions --dimensions 512 256 128
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import (
+    DATA_DIR,
+    TOP_K_RESULTS,
+    COLLECTION_INVENTORY,
+    COLLECTION_KNOWLEDGE,
+    COLLECTION_POLICIES,
+)
+from rag.embeddings import embed_queries, get_embeddings, get_full_embeddings
+from rag.projection import Projection
+from rag.quantization import QUANTIZERS
+from rag.vectorstore import get_all_documents, get_all_vectors
+
+RESCORE_FACTORS = [1, 2, 4, 8, 16]
+
+
+def load_golden_queries(path: str = None) -> List[str]:
+    """
+    Load evaluation queries: one per line in a .txt file or a JSON list of
+    strings. Defaults to the FAQ questions of the sample knowledge base.
+    """
+    if path:
+        text = Path(path).read_text(encoding="utf-8")
+        if path.endswith(".json"):
+            return [str(query) for query in json.loads(text)]
+        return [line.strip() for line in text.splitlines() if line.strip()]
+
+    with open(DATA_DIR / "knowledge.json", "r", encoding="utf-8") as f:
+        return [faq["question"] for faq in json.load(f).get("faqs", [])]
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best scores per row, best first."""
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+def recall_at_k(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Mean fraction of each query's exact top-k found by the approximate search."""
+    hits = [len(set(e) & set(a)) / len(e) for e, a in zip(expected.tolist(), actual.tolist())]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def evaluate_quantization(vectors: np.ndarray, queries: np.ndarray, k: int) -> List[dict]:
+    """Recall@k and code size of each quantizer at several rescore factors."""
+    exact = top_k(queries @ vectors.T, k)
+    rows = []
+    for name, quantizer_class in QUANTIZERS.items():
+        quantizer = quantizer_class().fit(vectors)
+        codes = quantizer.encode(vectors)
+        for factor in RESCORE_FACTORS:
+            start = time.perf_counter()
+            results = []
+            for query in queries:
+                coarse = quantizer.scores(codes, query)
+                pool = top_k(coarse[np.newaxis, :], k * factor)[0]
+                rescored = vectors[pool] @ query
+                results.append(pool[top_k(rescored[np.newaxis, :], k)[0]])
+            elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+            rows.append({
+                "quantization": name,
+                "rescore_factor": factor,
+                "recall": recall_at_k(exact, np.array(results)),
+                "code_bytes": codes.nbytes,
+                "ms_per_query": elapsed_ms,
+            })
+    return rows
+
+
+def evaluate_dimensions(
+    corpus: dict,
+    queries: np.ndarray,
+    k: int,
+    dimensions: List[int],
+) -> dict:
+    """
+    Recall@k of truncated and PCA-projected embeddings against full dimension.
+
+    Args:
+        corpus: {collection: full-dimension chunk vectors}
+        queries: Full-dimension query vectors
+        k: Results per query
+        dimensions: Reduced dimensions to try
+
+    Returns:
+        {collection: rows with reduction, dimension and recall}
+    """
+    # PCA is fitted over the whole corpus, as ingestion does
+    everything = np.vstack(list(corpus.values()))
+    projections = []
+    for dimension in dimensions:
+        projections.append(Projection.truncate(dimension))
+        try:
+            projections.append(Projection.fit_pca(everything, dimension))
+        except ValueError as e:
+            print(f"  Skipping PCA to {dimension}: {e}")
+
+    results = {}
+    for collection_name, vectors in corpus.items():
+        exact = top_k(queries @ vectors.T, k)
+        results[collection_name] = [
+            {
+                "reduction": projection.kind,
+                "dimension": projection.dimension,
+                "recall": recall_at_k(
+                    exact,
+                    top_k(projection.apply(queries) @ projection.apply(vectors).T, k),
+                ),
+            }
+            for projection in projections
+        ]
+    return results
+
+
+def report_quantization(queries: List[str], collections: List[str], k: int):
+    """Print quantization recall for the stored vectors of each collection."""
+    query_vectors = normalize(np.asarray(embed_queries(get_embeddings(), queries), dtype=np.float32))
+    print(f"{len(queries)} golden queries, recall@{k} against exact search\n")
+
+    for collection_name in collections:
+        _, vectors = get_all_vectors(collection_name)
+        if not len(vectors):
+            print(f"{collection_name}: empty, skipped\n")
+            continue
+        vectors = normalize(vectors)
+        print(f"{collection_name}: {len(vectors)} vectors, {vectors.nbytes / 1024:.0f} KiB at float32")
+
+        for row in evaluate_quantization(vectors, query_vectors, k):
+            print(
+                f"  {row['quantization']:<7} x{row['rescore_factor']:<3} "
+                f"recall {row['recall']:.3f}  codes {row['code_bytes'] / 1024:.0f} KiB  "
+                f"{row['ms_per_query']:.2f} ms/query"
+            )
+        print()
+
+
+def report_dimensions(queries: List[str], collections: List[str], k: int, dimensions: List[int]):
+    """Print dimension-reduction recall, re-embedding stored chunks at full dimension."""
+    # Compare against full-dimension embeddings, whatever is stored now
+    embeddings = get_full_embeddings()
+    query_vectors = normalize(np.asarray(embed_queries(embeddings, queries), dtype=np.float32))
+    print(f"{len(queries)} golden queries, recall@{k} against full dimension\n")
+
+    corpus = {}
+    for collection_name in collections:
+        texts = [doc.page_content for doc in get_all_documents(collection_name)]
+        if texts:
+            corpus[collection_name] = normalize(np.asarray(embeddings.embed_documents(texts), dtype=np.float32))
+    if not corpus:
+        print("No stored chunks to evaluate.")
+        return
+
+    for collection_name, rows in evaluate_dimensions(corpus, query_vectors, k, dimensions).items():
+        vectors = corpus[collection_name]
+        print(f"{collection_name}: {len(vectors)} chunks at {vectors.shape[1]} dimensions")
+        for row in rows:
+            print(f"  {row['reduction']:<8} {row['dimension']:>4}  recall {row['recall']:.3f}")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure recall of compressed vector search")
+    parser.add_argument("mode", choices=["quantization", "dimensions"], help="What to evaluate")
+    parser.add_argument("--queries", help="Golden queries (.txt, one per line, or .json list)")
+    parser.add_argument("--k", type=int, default=TOP_K_RESULTS, help="Results per query")
+    parser.add_argument(
+        "--collections",
+        nargs="+",
+        default=[COLLECTION_INVENTORY, COLLECTION_KNOWLEDGE, COLLECTION_POLICIES],
+    )
+    parser.add_argument(
+        "--dimensions",
+        nargs="+",
+        type=int,
+        default=[512, 256, 128],
+        help="Reduced dimensions to compare (dimensions mode)",
+    )
+    args = parser.parse_args()
+
+    queries = load_golden_queries(args.queries)
+    if args.mode == "dimensions":
+        report_dimensions(queries, args.collections, args.k, args.dimensions)
+    else:
+        report_quantization(queries, args.collections, args.k)
+
+
+if __name__ == "__main__":
+    main()
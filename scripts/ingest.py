@@ -1,68 +1,211 @@
 """Data ingestion script for populating the vector store."""
 
+import argparse
+import json
 import sys
 from pathlib import Path
+from typing import List
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from langchain_core.documents import Document
+
 from app.config import (
     DATA_DIR,
     COLLECTION_INVENTORY,
     COLLECTION_KNOWLEDGE,
     COLLECTION_POLICIES,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_REDUCTION,
+    REDUCED_DIMENSION,
+    PROJECTION_PATH,
 )
-from data.loader import load_json
+from data.ingest import build_inventory_documents, ingest_source
+from data.loader import load_inventory_records, inventory_record_to_document
+from data.manifest import IngestManifest
 from data.processor import process_documents
-from rag.vectorstore import init_collections, add_documents, get_collection_count
+from rag.vectorstore import (
+    init_collections,
+    get_all_documents,
+    get_collection_count,
+    get_ids_by_property,
+    rebuild_stale_collection,
+)
+from rag.embeddings import get_embedding_cache, get_embeddings, get_full_embeddings
+from rag.faq_index import build_faq_index
+from rag.inventory_table import update_inventory_table
+from rag.projection import Projection, embedding_version
+from rag.router import build_router
+
+
+def format_report(report: dict) -> str:
+    """Format an ingest report for printing."""
+    if report.get("status") == "unchanged":
+        return "unchanged, skipped"
+    if report.get("dry_run"):
+        return (
+            f"{len(report['added'])} new, {len(report['changed'])} changed, "
+            f"{len(report['removed'])} to delete, "
+            f"{len(report['unchanged'])} unchanged "
+            f"(~{report['embedding_calls']} embedding calls)"
+        )
+    return (
+        f"{report['inserted']} inserted, {report['updated']} updated, "
+        f"{report['skipped']} unchanged, {report['deleted']} deleted, "
+        f"{report['failed']} failed"
+    )
+
+
+def build_faq_documents(file_bytes: bytes) -> List[Document]:
+    """Build FAQ chunks from knowledge.json contents."""
+    data = json.loads(file_bytes.decode("utf-8"))
+    faq_docs = [
+        Document(
+            page_content=f"Q: {faq['question']}\nA: {faq['answer']}",
+            metadata={"source": "faqs", "type": "faq"}
+        )
+        for faq in data.get("faqs", [])
+    ]
+    return process_documents(faq_docs, COLLECTION_KNOWLEDGE, "knowledge.json")
+
+
+def build_policy_documents(file_bytes: bytes) -> List[Document]:
+    """Build policy chunks from knowledge.json contents."""
+    data = json.loads(file_bytes.decode("utf-8"))
+    policy_docs = [
+        Document(
+            page_content=f"{policy['title']}\n\n{policy['content']}",
+            metadata={"source": "policies", "type": "policy"}
+        )
+        for policy in data.get("policies", [])
+    ]
+    return process_documents(policy_docs, COLLECTION_POLICIES, "knowledge.json")
+
+
+def build_sample_router():
+    """Build query router prototypes from the sample inventory and knowledge base."""
+    inventory_texts, faq_questions, policy_titles = [], [], []
+
+    inventory_path = DATA_DIR / "inventory.json"
+    if inventory_path.exists():
+        records = load_inventory_records(file_path=str(inventory_path))
+        inventory_texts = [inventory_record_to_document(r).page_content for r in records]
+
+    knowledge_path = DATA_DIR / "knowledge.json"
+    if knowledge_path.exists():
+        with open(knowledge_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        faq_questions = [faq["question"] for faq in data.get("faqs", [])]
+        policy_titles = [policy["title"] for policy in data.get("policies", [])]
+
+    router = build_router(inventory_texts, faq_questions, policy_titles, get_embeddings())
+    print(f"  Router prototypes: {', '.join(router.categories)} (temperature {router.temperature})")
+
+
+def build_sample_faq_index():
+    """Build the FAQ fast-path index from the sample knowledge base."""
+    knowledge_path = DATA_DIR / "knowledge.json"
+    if not knowledge_path.exists():
+        return
+
+    with open(knowledge_path, "r", encoding="utf-8") as f:
+        faqs = json.load(f).get("faqs", [])
+
+    index = build_faq_index(faqs, get_embeddings(), source="knowledge.json")
+    print(f"  FAQ index: {len(index.questions)} questions")
 
 
-def ingest_sample_data():
+def build_sample_inventory_table():
+    """
+    Update the structured-answer inventory table from the sample inventory.
+
+    Vehicles added by sync_inventory.py or UI uploads stay in the table as
+    long as they are still in the vector store.
+    """
+    inventory_path = DATA_DIR / "inventory.json"
+    if not inventory_path.exists():
+        return
+
+    records = load_inventory_records(file_path=str(inventory_path))
+    table = update_inventory_table(records, get_ids_by_property(COLLECTION_INVENTORY, "vin"))
+    print(f"  Inventory table: {len(table)} vehicles")
+
+
+def update_embedding_projection(refit: bool = False):
+    """Fit the PCA projection if needed, then re-embed collections embedded with another one."""
+    collections = [COLLECTION_INVENTORY, COLLECTION_KNOWLEDGE, COLLECTION_POLICIES]
+
+    if EMBEDDING_REDUCTION == "pca" and (refit or not Path(PROJECTION_PATH).exists()):
+        # Fit over full-dimension embeddings of the whole corpus (mostly cache hits)
+        texts = [doc.page_content for name in collections for doc in get_all_documents(name)]
+        try:
+            vectors = get_full_embeddings().embed_documents(texts)
+            projection = Projection.fit_pca(vectors, REDUCED_DIMENSION)
+        except ValueError as e:
+            print(f"  PCA projection not fitted, keeping full dimensions: {e}")
+        else:
+            projection.save()
+            print(f"  Fitted projection {projection.version} over {len(texts)} chunks")
+
+    for name in collections:
+        count = rebuild_stale_collection(name)
+        if count:
+            print(f"  {name}: re-embedded {count} chunks as {embedding_version()}")
+
+
+def ingest_sample_data(dry_run: bool = False, full: bool = False, fit_projection: bool = False):
     """Ingest sample data into the vector store."""
-    print("Initializing collections...")
-    init_collections()
-    
+    manifest = IngestManifest()
+
+    if not dry_run:
+        print("Initializing collections...")
+        init_collections()
+
     # Load inventory
     print("\nLoading inventory data...")
     inventory_path = DATA_DIR / "inventory.json"
     if inventory_path.exists():
-        docs = load_json(str(inventory_path))
-        processed = process_documents(docs, COLLECTION_INVENTORY, "inventory.json")
-        add_documents(COLLECTION_INVENTORY, processed)
-        print(f"  Added {len(processed)} inventory documents")
-    
+        report = ingest_source(
+            COLLECTION_INVENTORY, "inventory.json", inventory_path.read_bytes(),
+            build_inventory_documents, manifest, dry_run=dry_run, full=full,
+        )
+        print(f"  Inventory: {format_report(report)}")
+
     # Load knowledge (FAQs + Policies)
     print("\nLoading knowledge base...")
     knowledge_path = DATA_DIR / "knowledge.json"
     if knowledge_path.exists():
-        import json
-        with open(knowledge_path, "r") as f:
-            data = json.load(f)
-        
-        # Process FAQs
-        faq_docs = []
-        for faq in data.get("faqs", []):
-            from langchain_core.documents import Document
-            faq_docs.append(Document(
-                page_content=f"Q: {faq['question']}\nA: {faq['answer']}",
-                metadata={"source": "faqs", "type": "faq"}
-            ))
-        processed_faqs = process_documents(faq_docs, COLLECTION_KNOWLEDGE, "knowledge.json")
-        add_documents(COLLECTION_KNOWLEDGE, processed_faqs)
-        print(f"  Added {len(processed_faqs)} FAQ documents")
-        
-        # Process Policies
-        policy_docs = []
-        for policy in data.get("policies", []):
-            from langchain_core.documents import Document
-            policy_docs.append(Document(
-                page_content=f"{policy['title']}\n\n{policy['content']}",
-                metadata={"source": "policies", "type": "policy"}
-            ))
-        processed_policies = process_documents(policy_docs, COLLECTION_POLICIES, "knowledge.json")
-        add_documents(COLLECTION_POLICIES, processed_policies)
-        print(f"  Added {len(processed_policies)} policy documents")
-    
+        knowledge_bytes = knowledge_path.read_bytes()
+
+        report = ingest_source(
+            COLLECTION_KNOWLEDGE, "knowledge.json", knowledge_bytes,
+            build_faq_documents, manifest, dry_run=dry_run, full=full,
+        )
+        print(f"  FAQs: {format_report(report)}")
+
+        report = ingest_source(
+            COLLECTION_POLICIES, "knowledge.json", knowledge_bytes,
+            build_policy_documents, manifest, dry_run=dry_run, full=full,
+        )
+        print(f"  Policies: {format_report(report)}")
+
+    if dry_run:
+        print("\nDry run: no changes were written.")
+        return
+
+    print("\nChecking embedding projection...")
+    update_embedding_projection(refit=fit_projection)
+
+    print("\nBuilding query router...")
+    build_sample_router()
+
+    print("\nBuilding FAQ index...")
+    build_sample_faq_index()
+
+    print("\nBuilding inventory table...")
+    build_sample_inventory_table()
+
     # Print summary
     print("\n" + "=" * 50)
     print("Ingestion Complete!")
@@ -71,6 +214,20 @@ def ingest_sample_data():
     print(f"  Knowledge: {get_collection_count(COLLECTION_KNOWLEDGE)} documents")
     print(f"  Policies: {get_collection_count(COLLECTION_POLICIES)} documents")
 
+    if EMBEDDING_CACHE_ENABLED:
+        stats = get_embedding_cache().stats()
+        print(f"  Embedding cache: {stats['hits']} hits, {stats['misses']} misses")
+
 
 if __name__ == "__main__":
-    ingest_sample_data()
+    parser = argparse.ArgumentParser(description="Ingest sample data into the vector store")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would change without writing")
+    parser.add_argument("--full", action="store_true", help="Reprocess sources even if unchanged")
+    parser.add_argument(
+        "--fit-projection",
+        action="store_true",
+        help="Refit the PCA embedding projection over the corpus (EMBEDDING_REDUCTION=pca)",
+    )
+    args = parser.parse_args()
+
+    ingest_sample_data(dry_run=args.dry_run, full=args.full, fit_projection=args.fit_projection)
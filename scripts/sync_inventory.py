@@ -0,0 +1,121 @@
+"""Sync an inventory feed into the vector store by VIN."""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import COLLECTION_INVENTORY
+from data.loader import load_inventory_records, inventory_record_to_document
+from data.processor import process_documents
+from rag.inventory_table import update_inventory_table
+from rag.vectorstore import (
+    init_collections,
+    add_documents,
+    delete_documents,
+    document_id,
+    get_ids_by_property,
+)
+
+
+def sync_inventory(
+    records: List[dict],
+    source_name: str = "inventory_feed",
+    partial: bool = False,
+    dry_run: bool = False,
+) -> dict:
+    """
+    Diff an inventory feed against the stored vehicles by VIN and apply it.
+
+    Vehicles whose descriptive text changed are re-embedded. Changes to
+    price, status or mileage only rewrite the stored properties and keep the
+    existing vector. VINs missing from a full feed are deleted.
+
+    Args:
+        records: Vehicle records, each with a ``vin``
+        source_name: Source name recorded on the vehicles
+        partial: Feed only contains changed vehicles; don't delete missing VINs
+        dry_run: Only compute the diff, don't write anything
+
+    Returns:
+        Report dict with per-category VIN counts and write results
+    """
+    stored = get_ids_by_property(COLLECTION_INVENTORY, "vin")
+
+    docs = [inventory_record_to_document(record) for record in records]
+    chunks = process_documents(docs, COLLECTION_INVENTORY, source_name)
+
+    feed_ids = {}
+    for chunk in chunks:
+        feed_ids.setdefault(chunk.metadata["vin"], set()).add(document_id(COLLECTION_INVENTORY, chunk))
+
+    # Classify each VIN; stale IDs are old versions of re-embedded vehicles
+    new_vins, reembed_vins, same_vins, stale_ids = [], [], [], []
+    for vin, ids in feed_ids.items():
+        previous = set(stored.get(vin, []))
+        if not previous:
+            new_vins.append(vin)
+        elif previous == ids:
+            same_vins.append(vin)
+        else:
+            reembed_vins.append(vin)
+            stale_ids.extend(previous - ids)
+
+    removed_vins = [] if partial else [vin for vin in stored if vin not in feed_ids]
+    removed_ids = [object_id for vin in removed_vins for object_id in stored[vin]]
+
+    report = {
+        "new": len(new_vins),
+        "reembedded": len(reembed_vins),
+        "in_place": len(same_vins),
+        "removed": len(removed_vins),
+    }
+    if dry_run:
+        return {**report, "dry_run": True, "embedding_calls": len(new_vins) + len(reembed_vins)}
+
+    write_report = add_documents(COLLECTION_INVENTORY, chunks)
+    write_report["deleted"] = delete_documents(COLLECTION_INVENTORY, stale_ids + removed_ids)
+
+    # Keep the structured-answer table in step with the vector store
+    update_inventory_table(records, get_ids_by_property(COLLECTION_INVENTORY, "vin"))
+    return {**report, **write_report}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync an inventory feed (JSON or CSV) by VIN")
+    parser.add_argument("feed", help="Path to the inventory feed")
+    parser.add_argument("--partial", action="store_true", help="Feed contains only changed vehicles")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would change without writing")
+    args = parser.parse_args()
+
+    records = load_inventory_records(file_path=args.feed)
+    if not args.dry_run:
+        init_collections()
+
+    report = sync_inventory(
+        records,
+        source_name=Path(args.feed).name,
+        partial=args.partial,
+        dry_run=args.dry_run,
+    )
+
+    print(f"Synced {len(records)} vehicles from {args.feed}")
+    print(f"  New VINs: {report['new']}")
+    print(f"  Re-embedded (description changed): {report['reembedded']}")
+    print(f"  Unchanged text (price/status/mileage updated in place): {report['in_place']}")
+    print(f"  Removed VINs: {report['removed']}")
+    if report.get("dry_run"):
+        print(f"  Estimated embedding calls: {report['embedding_calls']}")
+        print("\nDry run: no changes were written.")
+    else:
+        print(
+            f"  Writes: {report['inserted']} inserted, {report['updated']} updated, "
+            f"{report['skipped']} unchanged, {report['deleted']} deleted, {report['failed']} failed"
+        )
+
+
+if __name__ == "__main__":
+    main()
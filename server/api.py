@@ -0,0 +1,224 @@
+"""Headless HTTP API for the RAG workflow.
+
+Run with ``python -m server.api`` or ``uvicorn server.api:app --workers N``.
+Each worker process compiles the workflow once and serves many concurrent
+queries on its event loop through the async workflow path.
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import List, Literal
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from langchain_core.messages import AIMessage, HumanMessage
+from pydantic import BaseModel
+
+from app.clients import get_registry
+from app.config import (
+    EMBEDDING_CACHE_ENABLED,
+    VECTOR_BACKEND,
+    API_HOST,
+    API_PORT,
+    API_WORKERS,
+    API_MAX_CONCURRENCY,
+    API_QUEUE_TIMEOUT_SECONDS,
+)
+from graph.workflow import get_workflow, arun_query, arun_query_stream
+from rag.answer_cache import get_answer_cache
+from rag.embeddings import get_embedding_cache
+from rag.vectorstore import aget_weaviate_client
+from tools.search_cache import get_web_search_cache
+from tools.web_search import get_speculative_stats
+
+logger = logging.getLogger(__name__)
+
+
+class ChatMessage(BaseModel):
+    role: Literal["user", "assistant"]
+    content: str
+
+
+class QueryRequest(BaseModel):
+    query: str
+    messages: List[ChatMessage] = []
+
+
+def _to_langchain(messages: List[ChatMessage]) -> list:
+    """Convert API chat history into LangChain messages."""
+    return [
+        HumanMessage(content=m.content) if m.role == "user" else AIMessage(content=m.content)
+        for m in messages
+    ]
+
+
+def _from_langchain(messages: list) -> List[dict]:
+    """Convert LangChain messages into API chat history."""
+    return [
+        {"role": "user" if isinstance(m, HumanMessage) else "assistant", "content": m.content}
+        for m in messages
+    ]
+
+
+def _result_payload(result: dict, request_id: str) -> dict:
+    """Build the JSON body for a finished query."""
+    return {
+        "request_id": request_id,
+        "response": result["response"],
+        "sources": result["sources"],
+        "used_web_search": result["used_web_search"],
+        "query_type": result["query_type"],
+        "messages": _from_langchain(result["messages"]),
+        "trace": result.get("trace", {}),
+    }
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the shared workflow before taking traffic
+    get_workflow()
+    app.state.slots = asyncio.Semaphore(API_MAX_CONCURRENCY)
+    yield
+    await get_registry().aclose_loop_clients()
+
+
+app = FastAPI(title="Car Dealership RAG API", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    """Attach a request ID (client-supplied or generated) to every request."""
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    request.state.request_id = request_id
+    response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
+async def _acquire_slot(request: Request):
+    """Wait for a free query slot, or fail with 503 if the worker is saturated."""
+    try:
+        await asyncio.wait_for(request.app.state.slots.acquire(), API_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Server busy, try again later")
+
+
+@app.post("/query")
+async def query(body: QueryRequest, request: Request):
+    """Answer a question and return the full result as JSON."""
+    request_id = request.state.request_id
+    await _acquire_slot(request)
+    try:
+        result = await arun_query(body.query, _to_langchain(body.messages))
+    except Exception:
+        logger.exception("Query %s failed", request_id)
+        raise HTTPException(status_code=500, detail="Query failed")
+    finally:
+        request.app.state.slots.release()
+
+    return _result_payload(result, request_id)
+
+
+@app.post("/query/stream")
+async def query_stream(body: QueryRequest, request: Request):
+    """
+    Answer a question as server-sent events.
+
+    Emits ``token`` events with ``{"content": ...}`` while the answer is
+    generated, then one ``final`` event with the same body as /query, or an
+    ``error`` event if the query fails.
+    """
+    request_id = request.state.request_id
+    await _acquire_slot(request)
+    released = False
+
+    def release_slot():
+        nonlocal released
+        if not released:
+            released = True
+            request.app.state.slots.release()
+
+    async def events():
+        # The slot is held until the stream finishes or the client disconnects
+        try:
+            async for event in arun_query_stream(body.query, _to_langchain(body.messages)):
+                if event["type"] == "token":
+                    yield _sse("token", {"content": event["content"]})
+                else:
+                    yield _sse("final", _result_payload(event, request_id))
+        except Exception:
+            logger.exception("Streaming query %s failed", request_id)
+            yield _sse("error", {"request_id": request_id, "detail": "Query failed"})
+        finally:
+            release_slot()
+
+    # If the client disconnects before the body starts, the generator's
+    # finally never runs; the background task releases the slot instead
+    try:
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            background=BackgroundTask(release_slot),
+        )
+    except Exception:
+        release_slot()
+        raise
+
+
+@app.get("/health")
+async def health():
+    """Liveness probe: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: Weaviate is reachable and ready to serve queries."""
+    if VECTOR_BACKEND == "local":
+        # The index is read in-process; there is no server to wait for
+        return {"status": "ready", "vector_backend": "local"}
+    
+    try:
+        client = await aget_weaviate_client()
+        if await client.is_ready():
+            return {"status": "ready", "weaviate": "ready"}
+        detail = "not ready"
+    except Exception as e:
+        detail = str(e)
+
+    return JSONResponse(
+        status_code=503,
+        content={"status": "unavailable", "weaviate": detail},
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    """Cache hit rates and client counters for this worker process."""
+    return {
+        "answer_cache": get_answer_cache().stats(),
+        "web_search_cache": get_web_search_cache().stats(),
+        "embedding_cache": get_embedding_cache().stats() if EMBEDDING_CACHE_ENABLED else None,
+        "speculative_web_search": get_speculative_stats(),
+        "clients": get_registry().stats(),
+    }
+
+
+if __name__ == "__main__":
+    uvicorn.run("server.api:app", host=API_HOST, port=API_PORT, workers=API_WORKERS)
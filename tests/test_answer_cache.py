@@ -0,0 +1,89 @@
+"""Tests for the semantic answer cache."""
+
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+from rag import vectorstore
+from rag.answer_cache import SemanticAnswerCache
+
+ROOT = Path(__file__).parent.parent
+
+
+def make_cache(**kwargs) -> SemanticAnswerCache:
+    options = {"threshold": 0.95, "ttl_seconds": 3600, "web_ttl_seconds": 60, "max_entries": 10}
+    options.update(kwargs)
+    return SemanticAnswerCache(**options)
+
+
+def answer(text: str) -> dict:
+    return {"response": text, "used_web_search": False}
+
+
+def test_hit_and_miss():
+    cache = make_cache()
+    cache.store([1.0, 0.0, 0.0], answer("return policy"), ["Policies"])
+
+    hit = cache.lookup([0.99, 0.05, 0.0])
+    assert hit["response"] == "return policy"
+    assert hit["similarity"] > 0.95
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_constraints_must_match():
+    cache = make_cache()
+    cache.store([1.0, 0.0], answer("under 30k"), ["Inventory"], {"price": {"lte": 30000}})
+
+    assert cache.lookup([1.0, 0.0], {"price": {"lte": 40000}}) is None
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.lookup([1.0, 0.0], {"price": {"lte": 30000}})["response"] == "under 30k"
+
+
+def test_evicts_least_recently_used():
+    cache = make_cache(max_entries=2)
+    cache.store([1.0, 0.0, 0.0], answer("a"), ["Policies"])
+    cache.store([0.0, 1.0, 0.0], answer("b"), ["Policies"])
+    cache.lookup([1.0, 0.0, 0.0])
+    cache.store([0.0, 0.0, 1.0], answer("c"), ["Policies"])
+
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.lookup([1.0, 0.0, 0.0])["response"] == "a"
+    assert cache.lookup([0.0, 0.0, 1.0])["response"] == "c"
+
+
+def test_invalidate_collection():
+    cache = make_cache()
+    cache.store([1.0, 0.0], answer("inventory"), ["Inventory"])
+    cache.store([0.0, 1.0], answer("policy"), ["Policies"])
+
+    cache.invalidate_collection("Inventory")
+
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.lookup([0.0, 1.0])["response"] == "policy"
+
+
+def test_write_from_another_process_invalidates(tmp_path, monkeypatch):
+    monkeypatch.setattr(vectorstore, "WRITE_STAMP_DIR", tmp_path / "write_stamps")
+    cache = make_cache(write_stamp=vectorstore.read_write_stamp)
+    cache.store([1.0, 0.0], answer("price is $30,000"), ["Inventory"])
+    cache.store([0.0, 1.0], answer("policy"), ["Policies"])
+    assert cache.lookup([1.0, 0.0]) is not None
+
+    # A separate process deletes a vehicle from the local index
+    script = textwrap.dedent("""
+        from rag.local_index import get_local_collection
+        from rag.vectorstore import delete_documents
+
+        get_local_collection("Inventory").upsert([("car-1", {"content": "Honda"}, [1.0, 0.0])])
+        assert delete_documents("Inventory", ["car-1"]) == 1
+    """)
+    env = {**os.environ, "CACHE_DIR": str(tmp_path), "VECTOR_BACKEND": "local", "PYTHONPATH": str(ROOT)}
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, check=True)
+
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.lookup([0.0, 1.0])["response"] == "policy"
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,145 @@
+"""Tests for the HTTP API's concurrency limits and error handling."""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage, HumanMessage
+
+from server import api
+
+RESULT = {
+    "response": "We have 3 SUVs.",
+    "sources": [],
+    "used_web_search": False,
+    "query_type": "inventory",
+    "messages": [HumanMessage(content="How many SUVs?"), AIMessage(content="We have 3 SUVs.")],
+    "trace": {},
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "get_workflow", lambda: None)
+    monkeypatch.setattr(api, "API_QUEUE_TIMEOUT_SECONDS", 0.05)
+    with TestClient(api.app) as test_client:
+        yield test_client
+
+
+def free_slots() -> int:
+    return api.app.state.slots._value
+
+
+def test_query_returns_result_and_releases_slot(client, monkeypatch):
+    async def run(query, messages):
+        return RESULT
+
+    monkeypatch.setattr(api, "arun_query", run)
+    before = free_slots()
+
+    response = client.post("/query", json={"query": "How many SUVs?"}, headers={"X-Request-ID": "req-1"})
+
+    assert response.status_code == 200
+    assert response.json()["response"] == "We have 3 SUVs."
+    assert response.json()["request_id"] == "req-1"
+    assert free_slots() == before
+
+
+def test_query_returns_503_when_saturated(client):
+    api.app.state.slots = asyncio.Semaphore(0)
+
+    response = client.post("/query", json={"query": "How many SUVs?"})
+
+    assert response.status_code == 503
+
+
+def test_query_failure_hides_details(client, monkeypatch):
+    async def fail(query, messages):
+        raise RuntimeError("connection to weaviate:8080 refused")
+
+    monkeypatch.setattr(api, "arun_query", fail)
+    before = free_slots()
+
+    response = client.post("/query", json={"query": "How many SUVs?"})
+
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Query failed"
+    assert free_slots() == before
+
+
+def test_stream_emits_tokens_then_final(client, monkeypatch):
+    async def stream(query, messages):
+        yield {"type": "token", "content": "We have "}
+        yield {"type": "token", "content": "3 SUVs."}
+        yield {"type": "final", **RESULT}
+
+    monkeypatch.setattr(api, "arun_query_stream", stream)
+    before = free_slots()
+
+    response = client.post("/query/stream", json={"query": "How many SUVs?"})
+
+    events = [line.split(": ", 1)[1] for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events == ["token", "token", "final"]
+    assert free_slots() == before
+
+
+def test_stream_error_hides_details(client, monkeypatch):
+    async def stream(query, messages):
+        yield {"type": "token", "content": "We"}
+        raise RuntimeError("secret stack detail")
+
+    monkeypatch.setattr(api, "arun_query_stream", stream)
+    before = free_slots()
+
+    response = client.post("/query/stream", json={"query": "How many SUVs?"})
+
+    assert "event: error" in response.text
+    assert "secret" not in response.text
+    assert free_slots() == before
+
+
+def test_stream_releases_slot_when_client_disconnects(monkeypatch):
+    async def stream(query, messages):
+        yield {"type": "token", "content": "We"}
+        await asyncio.sleep(30)
+        yield {"type": "final", **RESULT}
+
+    monkeypatch.setattr(api, "arun_query_stream", stream)
+
+    async def disconnect_mid_stream() -> int:
+        api.app.state.slots = asyncio.Semaphore(2)
+        first_chunk = asyncio.Event()
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": json.dumps({"query": "hi"}).encode(), "more_body": False}
+            await first_chunk.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                first_chunk.set()
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/query/stream",
+            "raw_path": b"/query/stream",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"content-type", b"application/json")],
+            "client": ("test", 1),
+            "server": ("test", 80),
+            "state": {},
+        }
+        await asyncio.wait_for(api.app(scope, receive, send), timeout=5)
+        return api.app.state.slots._value
+
+    assert asyncio.run(disconnect_mid_stream()) == 2
@@ -0,0 +1,71 @@
+"""Tests for token-budgeted context assembly."""
+
+from langchain_core.documents import Document
+
+from rag.context import build_context, estimate_tokens, merge_adjacent
+
+OVERLAP = "the warranty covers the powertrain for five years or sixty thousand miles"
+
+
+def chunk(text: str, index: int, source: str = "policies.pdf") -> Document:
+    return Document(page_content=text, metadata={"category": "policies", "source": source, "chunk_index": index})
+
+
+def test_merges_neighbouring_chunks_on_their_overlap():
+    results = [
+        (chunk(f"Warranty terms: {OVERLAP}", 0), 0.7),
+        (chunk(f"{OVERLAP}. Roadside assistance is included.", 1), 0.9),
+    ]
+
+    passages, merged = merge_adjacent(results)
+
+    assert merged == 1
+    assert len(passages) == 1
+    doc, score = passages[0]
+    assert doc.page_content == f"Warranty terms: {OVERLAP}. Roadside assistance is included."
+    assert score == 0.9
+
+
+def test_does_not_merge_without_overlap_or_across_sources():
+    results = [
+        (chunk("Returns are accepted within seven days of purchase.", 0), 0.8),
+        (chunk("Financing is available through our partner banks.", 1), 0.7),
+        (chunk(f"{OVERLAP}. Roadside assistance is included.", 2, source="other.pdf"), 0.6),
+    ]
+
+    passages, merged = merge_adjacent(results)
+
+    assert merged == 0
+    assert len(passages) == 3
+
+
+def test_drops_near_duplicates_from_other_sources():
+    text = "All certified pre-owned vehicles get a 172-point inspection and a one year warranty."
+    results = [(chunk(text, 0, "faq.json"), 0.9), (chunk(text + " Ask us!", 0, "brochure.pdf"), 0.8)]
+
+    docs, stats = build_context(results, token_budget=0, dedup_threshold=0.9)
+
+    assert [doc.metadata["source"] for doc in docs] == ["faq.json"]
+    assert stats["duplicates"] == 1
+
+
+def test_packs_best_passages_into_budget():
+    results = [
+        (chunk("a " * 100, 0, "low.pdf"), 0.2),
+        (chunk("b " * 100, 0, "high.pdf"), 0.9),
+        (chunk("c " * 100, 0, "mid.pdf"), 0.5),
+    ]
+
+    docs, stats = build_context(results, token_budget=110, dedup_threshold=0.9)
+
+    assert [doc.metadata["source"] for doc in docs] == ["high.pdf", "mid.pdf"]
+    assert sum(estimate_tokens(doc.page_content) for doc in docs) <= 110
+    assert stats["dropped"] == 1
+
+
+def test_truncates_best_passage_that_alone_exceeds_budget():
+    docs, stats = build_context([(chunk("word " * 400, 0), 0.9)], token_budget=50, dedup_threshold=0.9)
+
+    assert len(docs) == 1
+    assert estimate_tokens(docs[0].page_content) <= 50
+    assert stats["truncated"] == 1
@@ -0,0 +1,85 @@
+"""Tests for the disk-backed embedding cache."""
+
+import itertools
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from rag import embeddings as embeddings_module
+from rag.embeddings import CachedEmbeddings, EmbeddingCache
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic 4-dimensional embeddings that record every text sent to the model."""
+
+    def __init__(self):
+        self.calls: List[List[str]] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(text)), float(i), 1.0, 0.0] for i, text in enumerate(texts)]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls.append([text])
+        return [float(len(text)), 0.0, 0.0, 1.0]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Strictly increasing timestamps, so recency never ties."""
+    ticks = itertools.count(1)
+    monkeypatch.setattr(embeddings_module, "time", SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def make_embeddings(tmp_path, max_bytes: int = 1 << 20):
+    model = CountingEmbeddings()
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite3", max_bytes=max_bytes)
+    return model, CachedEmbeddings(model, "test-model", cache)
+
+
+def test_documents_are_embedded_once(tmp_path):
+    model, cached = make_embeddings(tmp_path)
+
+    first = cached.embed_documents(["alpha", "beta", "alpha"])
+    second = cached.embed_documents(["beta", "gamma"])
+
+    assert model.calls == [["alpha", "beta"], ["gamma"]]
+    assert first[0] == first[2]
+    assert second[0] == first[1]
+    stats = cached.cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 3, 3)
+
+
+def test_queries_and_documents_are_cached_separately(tmp_path):
+    model, cached = make_embeddings(tmp_path)
+
+    cached.embed_documents(["alpha"])
+    cached.embed_query("alpha")
+    cached.embed_query("alpha")
+
+    assert model.calls == [["alpha"], ["alpha"]]
+
+
+def test_cache_survives_reopening(tmp_path):
+    model, cached = make_embeddings(tmp_path)
+    vector = cached.embed_query("how much is the RAV4")
+
+    reopened = CachedEmbeddings(model, "test-model", EmbeddingCache(tmp_path / "embeddings.sqlite3", 1 << 20))
+
+    assert reopened.embed_query("how much is the RAV4") == vector
+    assert len(model.calls) == 1
+
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    # Each 4-dimensional float32 vector takes 16 bytes
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite3", max_bytes=40)
+    cache.put_many({"a": [1.0] * 4})
+    cache.put_many({"b": [2.0] * 4})
+    cache.get_many(["a"])
+    cache.put_many({"c": [3.0] * 4})
+
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size_bytes"] == 32
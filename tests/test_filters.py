@@ -0,0 +1,50 @@
+"""Tests for inventory constraint extraction."""
+
+import pytest
+
+from rag.filters import extract_inventory_constraints
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("SUVs under $40,000", {"price": {"lte": 40000}, "type": {"contains": "SUV"}}),
+        ("something under 35k", {"price": {"lte": 35000}}),
+        ("my budget of 25000", {"price": {"lte": 25000}}),
+        ("cars priced between 20000 and 30000", {"price": {"gte": 20000, "lte": 30000}}),
+        ("2023 or newer, under 30k miles", {"year": {"gte": 2023}, "mileage": {"lte": 30000}}),
+    ],
+)
+def test_price_and_mileage(query, expected):
+    assert extract_inventory_constraints(query) == expected
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("Any sedans over 2020?", {"year": {"gte": 2021}, "type": {"contains": "Sedan"}}),
+        ("trucks from 2019", {"year": {"gte": 2019}, "type": {"contains": "Truck"}}),
+        ("anything below 2015", {"year": {"lte": 2014}}),
+    ],
+)
+def test_years_are_not_prices(query, expected):
+    assert extract_inventory_constraints(query) == expected
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "Can I return a car within 30 days?",
+        "Do you have anything with at least 300 horsepower?",
+        "I need more than 7 seats",
+        "What kind of gas mileage can I expect?",
+        "Does it have electric windows?",
+    ],
+)
+def test_no_spurious_constraints(query):
+    assert extract_inventory_constraints(query) == {}
+
+
+def test_standalone_fuel_terms():
+    assert extract_inventory_constraints("gas SUVs")["fuel_type"] == {"eq": "Gasoline"}
+    assert extract_inventory_constraints("any electric cars?") == {"fuel_type": {"eq": "Electric"}}
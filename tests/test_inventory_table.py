@@ -0,0 +1,86 @@
+"""Tests for the structured-answer inventory table."""
+
+import pytest
+
+from rag import inventory_table
+from rag.inventory_table import InventoryTable, parse_inventory_intent, update_inventory_table
+
+RECORDS = [
+    {"vin": "V1", "make": "Honda", "model": "Accord", "year": 2024, "type": "Sedan",
+     "fuel_type": "Gasoline", "price": 29000, "mileage": 10, "status": "Available"},
+    {"vin": "V2", "make": "Toyota", "model": "RAV4", "year": 2023, "type": "SUV",
+     "fuel_type": "Hybrid", "price": 34000, "mileage": 12000, "status": "Available"},
+    {"vin": "V3", "make": "Ford", "model": "F-150", "year": 2022, "type": "Truck",
+     "fuel_type": "Gasoline", "price": 41000, "mileage": 25000, "status": "Available"},
+]
+
+
+@pytest.fixture
+def table_path(tmp_path, monkeypatch):
+    path = tmp_path / "inventory_table.npz"
+    monkeypatch.setattr(inventory_table, "INVENTORY_TABLE_PATH", path)
+    monkeypatch.setattr(inventory_table, "_table", None)
+    return path
+
+
+def vins(table: InventoryTable) -> list:
+    return sorted(row["vin"] for row in table.to_records())
+
+
+def test_update_keeps_vehicles_still_in_store(table_path):
+    update_inventory_table(RECORDS[:2], ["V1", "V2"])
+    # Another writer (e.g. a full ingest of a different feed) adds V3
+    table = update_inventory_table(RECORDS[2:], ["V1", "V2", "V3"])
+
+    assert vins(table) == ["V1", "V2", "V3"]
+    assert vins(InventoryTable.load(table_path)) == ["V1", "V2", "V3"]
+
+
+def test_update_drops_vehicles_removed_from_store(table_path):
+    update_inventory_table(RECORDS, ["V1", "V2", "V3"])
+    changed = {**RECORDS[0], "price": 27500}
+    table = update_inventory_table([changed], ["V1", "V3"])
+
+    assert vins(table) == ["V1", "V3"]
+    assert table.row(0)["price"] == 27500
+
+
+def test_update_ignores_records_not_stored(table_path):
+    table = update_inventory_table(RECORDS, ["V2"])
+
+    assert vins(table) == ["V2"]
+
+
+MAKES = ["Ford", "Honda", "Toyota"]
+MODELS = ["Accord", "F-150", "RAV4"]
+
+
+@pytest.mark.parametrize(
+    "query, op, filters",
+    [
+        ("How many SUVs do you have?", "count", {"type": {"contains": "SUV"}}),
+        ("What is your least expensive SUV?", "min", {"type": {"contains": "SUV"}}),
+        ("Cheapest Accord?", "min", {"model": {"eq": "Accord"}}),
+        ("List all available Toyotas", "list", {"status": {"eq": "Available"}, "make": {"eq": "Toyota"}}),
+    ],
+)
+def test_parses_structured_questions(query, op, filters):
+    intent = parse_inventory_intent(query, MAKES, MODELS)
+    assert intent["op"] == op
+    assert intent["filters"] == filters
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "Do you have the latest model Tesla?",
+        "What's the cheapest Corolla you have?",
+        "which cars are cheapest to insure?",
+        "What's the cheapest car to finance?",
+        "cheapest lease deal on an SUV",
+        "How many seats does the Honda Accord have?",
+        "How many 2024 Fords are there?",
+    ],
+)
+def test_declines_questions_the_table_cannot_answer(query):
+    assert parse_inventory_intent(query, MAKES, MODELS) is None
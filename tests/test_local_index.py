@@ -0,0 +1,91 @@
+"""Tests for the memory-mapped local vector index."""
+
+import os
+
+import numpy as np
+import pytest
+
+from rag.local_index import SIMILARITY_METADATA_KEY, LocalCollection
+
+CARS = [
+    ("car-1", {"content": "2024 Honda Accord sedan", "make": "Honda", "price": 29000.0}, [1.0, 0.0, 0.0]),
+    ("car-2", {"content": "2023 Toyota RAV4 hybrid SUV", "make": "Toyota", "price": 34000.0}, [0.0, 1.0, 0.0]),
+    ("car-3", {"content": "2022 Ford F-150 truck", "make": "Ford", "price": 41000.0}, [0.0, 0.0, 1.0]),
+]
+
+
+@pytest.fixture
+def collection(tmp_path):
+    local = LocalCollection(tmp_path / "Inventory", quantization="none")
+    local.upsert(CARS)
+    return local
+
+
+def test_upsert_and_search(collection):
+    results = collection.search([0.1, 0.9, 0.0], k=2)
+
+    assert [doc.metadata["make"] for doc, _ in results] == ["Toyota", "Honda"]
+    assert results[0][1] == pytest.approx(0.9 / np.linalg.norm([0.1, 0.9]))
+    assert collection.count() == 3
+
+
+def test_update_keeps_vector_and_delete_removes(collection):
+    collection.upsert([("car-1", {**CARS[0][1], "price": 27500.0}, None)])
+    assert collection.get(["car-1"])["car-1"]["properties"]["price"] == 27500.0
+    assert collection.search([1.0, 0.0, 0.0], k=1)[0][0].metadata["price"] == 27500.0
+
+    assert collection.delete(["car-2", "missing"]) == 1
+    assert sorted(collection.ids_by_property("make")) == ["Ford", "Honda"]
+
+
+def test_reopen_reads_saved_index(collection, tmp_path):
+    collection.delete(["car-3"])
+
+    reopened = LocalCollection(tmp_path / "Inventory", quantization="none")
+
+    assert reopened.count() == 2
+    assert reopened.search([0.0, 0.0, 1.0], k=3)[0][0].metadata["make"] in ("Honda", "Toyota")
+    assert sorted(doc.metadata["make"] for doc in reopened.all_documents()) == ["Honda", "Toyota"]
+
+
+def test_other_process_writes_are_picked_up(collection, tmp_path):
+    other = LocalCollection(tmp_path / "Inventory", quantization="none")
+    other.delete(["car-1"])
+
+    assert collection.count() == 2
+
+
+def test_writer_sees_its_own_write_with_unchanged_mtime(collection, monkeypatch):
+    # Simulate a filesystem with coarse timestamps: the sidecar mtime doesn't move
+    stat = collection._sidecar.stat()
+    replace = os.replace
+
+    def replace_keeping_mtime(src, dst):
+        replace(src, dst)
+        os.utime(dst, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    monkeypatch.setattr(os, "replace", replace_keeping_mtime)
+    collection.delete(["car-1"])
+
+    assert collection.count() == 2
+    assert "car-1" not in collection.get(["car-1"])
+
+
+def test_filters_and_hybrid_similarity(collection):
+    results = collection.search_hybrid(
+        "ford truck", [0.0, 0.0, 1.0], k=3, alpha=0.5, fusion="relative_score",
+        filters={"price": {"gte": 30000}},
+    )
+
+    assert [doc.metadata["make"] for doc, _ in results] == ["Ford", "Toyota"]
+    assert results[0][0].metadata[SIMILARITY_METADATA_KEY] == pytest.approx(1.0)
+
+
+def test_old_files_outlive_one_write(collection):
+    def vector_files():
+        return sorted(path.name for path in collection.directory.glob("vectors-*.npy"))
+
+    collection.delete(["car-1"])
+    assert len(vector_files()) == 2
+    collection.delete(["car-2"])
+    assert len(vector_files()) == 2
@@ -0,0 +1,83 @@
+"""Tests for embedding dimension reduction and its versioning."""
+
+import numpy as np
+import pytest
+
+from rag import projection
+from rag.projection import Projection, embedding_version, get_projection
+
+
+def vectors(n: int = 64, dim: int = 32, seed: int = 3) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    """Point the projection at tmp_path; returns a setter for the reduction mode."""
+    monkeypatch.setattr(projection, "PROJECTION_PATH", tmp_path / "projection.npz")
+    monkeypatch.setattr(projection, "REDUCED_DIMENSION", 8)
+    monkeypatch.setattr(projection, "_pca", None)
+    monkeypatch.setattr(projection, "_pca_mtime", None)
+
+    def use(reduction: str):
+        monkeypatch.setattr(projection, "EMBEDDING_REDUCTION", reduction)
+
+    return use
+
+
+def test_truncate_keeps_leading_dimensions_normalized():
+    reduced = Projection.truncate(4).apply(vectors(n=3))
+
+    assert reduced.shape == (3, 4)
+    np.testing.assert_allclose(np.linalg.norm(reduced, axis=1), 1.0, rtol=1e-5)
+    np.testing.assert_allclose(reduced[0], vectors(n=3)[0, :4] / np.linalg.norm(vectors(n=3)[0, :4]), rtol=1e-5)
+
+
+def test_pca_needs_enough_vectors():
+    with pytest.raises(ValueError):
+        Projection.fit_pca(vectors(n=4), 8)
+
+
+def test_pca_version_changes_with_fit():
+    first = Projection.fit_pca(vectors(seed=3), 8)
+    again = Projection.fit_pca(vectors(seed=3), 8)
+    other = Projection.fit_pca(vectors(seed=4), 8)
+
+    assert first.version == again.version
+    assert first.version != other.version
+    assert first.version.startswith("pca-8-")
+    assert Projection.truncate(8).version == "truncate-8"
+
+
+def test_saved_projection_round_trip(tmp_path):
+    fitted = Projection.fit_pca(vectors(), 8)
+    fitted.save(tmp_path / "projection.npz")
+
+    loaded = Projection.load(tmp_path / "projection.npz")
+
+    assert loaded.version == fitted.version
+    np.testing.assert_allclose(loaded.apply(vectors(n=2)), fitted.apply(vectors(n=2)))
+
+
+def test_embedding_version_follows_settings(settings):
+    settings("none")
+    assert embedding_version() == "full"
+
+    settings("truncate")
+    assert embedding_version() == "truncate-8"
+
+    # PCA stays at full dimension until a projection has been fitted
+    settings("pca")
+    assert get_projection() is None
+    assert embedding_version() == "full"
+
+    fitted = Projection.fit_pca(vectors(), 8)
+    fitted.save(projection.PROJECTION_PATH)
+    assert embedding_version() == fitted.version
+
+
+def test_projection_of_other_dimension_is_ignored(settings):
+    settings("pca")
+    Projection.fit_pca(vectors(), 4).save(projection.PROJECTION_PATH)
+
+    assert get_projection() is None
@@ -0,0 +1,85 @@
+"""Tests for quantized local vector search."""
+
+import numpy as np
+import pytest
+
+from rag.local_index import LocalCollection
+from rag.quantization import BinaryQuantizer, Int8Quantizer, get_quantizer, load_quantizer
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)).astype(np.float32)
+
+
+def corpus(n: int = 400, dim: int = 128, seed: int = 7) -> np.ndarray:
+    """Clustered unit vectors, shaped like topic-grouped chunk embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = normalize(rng.normal(size=(20, dim)))
+    return normalize(centers[rng.integers(0, 20, n)] + 0.6 * normalize(rng.normal(size=(n, dim))))
+
+
+def queries_near(vectors: np.ndarray, n: int = 20, seed: int = 11) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return normalize(vectors[:n] + 0.3 * normalize(rng.normal(size=(n, vectors.shape[1]))))
+
+
+def recall(found: list, exact: list) -> float:
+    return len(set(found) & set(exact)) / len(exact)
+
+
+@pytest.mark.parametrize("quantizer_class, min_correlation", [(Int8Quantizer, 0.99), (BinaryQuantizer, 0.8)])
+def test_code_scores_track_cosine(quantizer_class, min_correlation):
+    vectors = corpus()
+    query = queries_near(vectors)[0]
+    quantizer = quantizer_class().fit(vectors)
+
+    approximate = quantizer.scores(quantizer.encode(vectors), query)
+
+    assert np.corrcoef(approximate, vectors @ query)[0, 1] > min_correlation
+
+
+def test_codes_are_smaller():
+    vectors = corpus()
+
+    assert Int8Quantizer().fit(vectors).encode(vectors).nbytes * 4 == vectors.nbytes
+    assert BinaryQuantizer().fit(vectors).encode(vectors).nbytes * 32 == vectors.nbytes
+
+
+@pytest.mark.parametrize("name", ["int8", "binary"])
+def test_saved_params_rebuild_quantizer(name):
+    vectors = corpus()
+    quantizer = get_quantizer(name)().fit(vectors)
+    codes = quantizer.encode(vectors)
+
+    loaded = load_quantizer(name, quantizer.params())
+
+    np.testing.assert_allclose(loaded.scores(codes, vectors[1]), quantizer.scores(codes, vectors[1]))
+
+
+def test_unknown_quantization_is_rejected():
+    assert get_quantizer("none") is None
+    with pytest.raises(ValueError):
+        get_quantizer("pq")
+
+
+@pytest.mark.parametrize("quantization", ["int8", "binary"])
+def test_rescored_search_recall_against_exact(tmp_path, quantization):
+    vectors = corpus()
+    ids = [f"doc-{i}" for i in range(len(vectors))]
+    objects = [(object_id, {"content": object_id}, vector.tolist()) for object_id, vector in zip(ids, vectors)]
+    exact = LocalCollection(tmp_path / "exact", quantization="none")
+    quantized = LocalCollection(tmp_path / quantization, quantization=quantization, rescore_factor=8)
+    exact.upsert(objects)
+    quantized.upsert(objects)
+
+    queries = queries_near(vectors)
+    recalls = []
+    for query in queries:
+        expected = [doc.page_content for doc, _ in exact.search(query.tolist(), k=5)]
+        found = quantized.search(query.tolist(), k=5)
+        recalls.append(recall([doc.page_content for doc, _ in found], expected))
+        # Rescoring returns exact cosine similarities, not code estimates
+        for doc, score in found:
+            assert score == pytest.approx(float(vectors[ids.index(doc.page_content)] @ query), abs=1e-5)
+
+    assert np.mean(recalls) >= 0.95
@@ -0,0 +1,67 @@
+"""Tests for MMR and lexical reranking."""
+
+import numpy as np
+from langchain_core.documents import Document
+
+from rag.local_index import VECTOR_METADATA_KEY
+from rag.rerank import lexical_overlap, mmr_rerank
+
+QUERY = [1.0, 0.0, 0.0]
+
+
+def candidate(text: str, vector: list, score: float = 0.5) -> tuple:
+    return Document(page_content=text, metadata={VECTOR_METADATA_KEY: vector}), score
+
+
+def texts(results: list) -> list:
+    return [doc.page_content for doc, _ in results]
+
+
+def candidates() -> list:
+    # Three near-copies of one vehicle and one different, slightly less relevant one
+    return [
+        candidate("Accord chunk 1", [0.95, 0.31, 0.0], 0.9),
+        candidate("Accord chunk 2", [0.95, 0.30, 0.0], 0.89),
+        candidate("Accord chunk 3", [0.95, 0.29, 0.0], 0.88),
+        candidate("Camry", [0.85, 0.0, 0.53], 0.8),
+    ]
+
+
+def test_lambda_one_keeps_relevance_order():
+    assert texts(mmr_rerank("sedan", QUERY, candidates(), k=3, mmr_lambda=1.0)) == [
+        "Accord chunk 3", "Accord chunk 2", "Accord chunk 1",
+    ]
+
+
+def test_diversity_skips_near_copies():
+    reranked = mmr_rerank("sedan", QUERY, candidates(), k=2, mmr_lambda=0.5)
+
+    assert "Camry" in texts(reranked)
+
+
+def test_keeps_scores_and_strips_vectors():
+    reranked = mmr_rerank("sedan", QUERY, candidates(), k=4, mmr_lambda=0.5)
+
+    assert sorted(score for _, score in reranked) == [0.8, 0.88, 0.89, 0.9]
+    assert all(VECTOR_METADATA_KEY not in doc.metadata for doc, _ in reranked)
+
+
+def test_candidates_without_vectors_come_last():
+    results = [(Document(page_content="no vector"), 0.99)] + candidates()[:1]
+
+    assert texts(mmr_rerank("sedan", QUERY, results, k=2, mmr_lambda=0.5)) == ["Accord chunk 1", "no vector"]
+
+
+def test_lexical_overlap_boosts_exact_terms():
+    docs = [Document(page_content="Honda Accord Sport trim"), Document(page_content="Toyota Camry")]
+
+    np.testing.assert_allclose(lexical_overlap("the Accord Sport", docs), [1.0, 0.0])
+
+    def results():
+        # mmr_rerank() strips the vectors, so every call gets fresh candidates
+        return [candidate("Toyota Camry", [0.9, 0.44, 0.0]), candidate("Honda Accord Sport trim", [0.85, 0.53, 0.0])]
+
+    assert texts(mmr_rerank("Accord Sport", QUERY, results(), k=1, mmr_lambda=1.0)) == ["Toyota Camry"]
+    assert texts(mmr_rerank("Accord Sport", QUERY, results(), k=1, mmr_lambda=1.0, lexical_weight=0.5)) == [
+        "Honda Accord Sport trim"
+    ]
@@ -0,0 +1,135 @@
+"""Tests for merging and batching retrieval results."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.documents import Document
+
+from app.config import COLLECTION_INVENTORY
+from rag import local_index, retriever, vectorstore
+from rag.retriever import get_retriever, merge_results, retrieval_confidence, retrieve_batch
+from rag.vectorstore import SIMILARITY_METADATA_KEY
+
+
+@pytest.fixture
+def local_backend(tmp_path, monkeypatch):
+    """Use an empty local index under tmp_path and a fixed query embedding."""
+    monkeypatch.setattr(local_index, "LOCAL_INDEX_DIR", tmp_path)
+    monkeypatch.setattr(local_index, "_collections", {})
+    monkeypatch.setattr(vectorstore, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(retriever, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(retriever, "embed_query", lambda query: [1.0, 0.0])
+    return local_index.get_local_collection
+
+
+def hybrid_result(text: str, fused: float, similarity: float) -> tuple:
+    return Document(page_content=text, metadata={SIMILARITY_METADATA_KEY: similarity}), fused
+
+
+def test_merge_orders_collections_by_similarity():
+    # A collection with one weak hit gets the top fused score of its query
+    results = [
+        hybrid_result("only policy hit", 1.0, 0.41),
+        hybrid_result("inventory best", 0.9, 0.83),
+        hybrid_result("inventory second", 0.5, 0.79),
+    ]
+
+    merged = merge_results(results, k=2)
+
+    assert [doc.page_content for doc, _ in merged] == ["inventory best", "inventory second"]
+    assert [score for _, score in merged] == [0.83, 0.79]
+    assert abs(retrieval_confidence(merged) - 0.81) < 1e-9
+
+
+def test_merge_uses_vector_scores_without_metadata():
+    results = [(Document(page_content="a"), 0.2), (Document(page_content="b"), 0.6)]
+
+    assert [doc.page_content for doc, _ in merge_results(results, k=5)] == ["b", "a"]
+
+
+def test_get_retriever_supports_local_backend(local_backend):
+    local_backend(COLLECTION_INVENTORY).upsert([
+        ("car-1", {"content": "2024 Honda Accord"}, [1.0, 0.0]),
+        ("car-2", {"content": "2023 Toyota RAV4"}, [0.0, 1.0]),
+    ])
+
+    docs = get_retriever().invoke("Honda Accord")
+
+    assert docs[0].page_content == "2024 Honda Accord"
+    assert get_retriever(COLLECTION_INVENTORY).invoke("Accord")[0].page_content == "2024 Honda Accord"
+
+
+class FakeSearches:
+    """Stand-in for _timed_search(): slow or failing by query text, tracking concurrency."""
+
+    def __init__(self, slow_seconds: float = 0.5):
+        self.slow_seconds = slow_seconds
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, name, query, query_vector, k, mode, filters=None):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            if query.startswith("slow"):
+                time.sleep(self.slow_seconds)
+            if query.startswith("fail"):
+                raise RuntimeError("collection unavailable")
+            doc = Document(page_content=f"{name}: {query}", metadata={SIMILARITY_METADATA_KEY: 0.8})
+            return [(doc, 0.5)], 1.0, None, 1
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+@pytest.fixture
+def batch(monkeypatch):
+    """retrieve_batch() over fake searches on a two-thread batch pool."""
+    searches = FakeSearches()
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(retriever, "RETRIEVAL_BATCH_WORKERS", 2)
+    monkeypatch.setattr(retriever, "_batch_executor", executor)
+    monkeypatch.setattr(retriever, "get_embeddings", lambda: None)
+    monkeypatch.setattr(retriever, "embed_queries", lambda embeddings, texts: [[1.0, 0.0] for _ in texts])
+    monkeypatch.setattr(retriever, "_timed_search", searches)
+    yield searches
+    executor.shutdown(wait=True)
+
+
+def test_batch_returns_results_in_query_order(batch):
+    queries = [f"query {i}" for i in range(5)]
+
+    entries = retrieve_batch(queries, collections=["Inventory", "Policies"])
+
+    assert [entry["query"] for entry in entries] == queries
+    for entry in entries:
+        assert sorted(doc.page_content for doc, _ in entry["results"]) == [
+            f"Inventory: {entry['query']}", f"Policies: {entry['query']}",
+        ]
+        assert {status["status"] for status in entry["trace"].values()} == {"ok"}
+    assert batch.max_running <= 2
+
+
+def test_batch_reports_timeouts_and_errors_with_partial_results(batch):
+    entries = retrieve_batch(["slow one", "fail two", "fast three"], collections=["Inventory"], timeout=0.2)
+
+    assert [entry["trace"]["Inventory"]["status"] for entry in entries] == ["timeout", "error", "ok"]
+    assert [len(entry["results"]) for entry in entries] == [0, 0, 1]
+    assert entries[0]["timings"]["search_ms"] is None
+
+
+def test_batch_deadlines_start_when_a_thread_is_free(batch):
+    # Both threads are held by timed-out searches for 0.5s; the fast searches
+    # queued behind them must not spend their 0.3s waiting for a thread
+    queries = ["slow a", "slow b", "fast c", "fast d", "fast e"]
+
+    entries = retrieve_batch(queries, collections=["Inventory"], timeout=0.3)
+
+    assert [entry["trace"]["Inventory"]["status"] for entry in entries] == [
+        "timeout", "timeout", "ok", "ok", "ok",
+    ]
+    assert batch.max_running <= 2
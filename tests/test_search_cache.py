@@ -0,0 +1,114 @@
+"""Tests for the web search result cache."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.documents import Document
+
+from tools.search_cache import WebSearchCache
+
+DOCS = [Document(page_content="2025 EV tax credit", metadata={"source": "Web", "url": "https://example.com"})]
+
+
+def test_key_ignores_case_whitespace_and_punctuation():
+    assert WebSearchCache.make_key("EV  tax credit?", 5) == WebSearchCache.make_key("ev tax credit", 5)
+    assert WebSearchCache.make_key("ev tax credit", 5) != WebSearchCache.make_key("ev tax credit", 3)
+
+
+def test_hit_returns_fresh_documents():
+    cache = WebSearchCache(ttl_seconds=60, max_entries=10)
+    cache.put("k", DOCS)
+
+    first, second = cache.get("k"), cache.get("k")
+
+    assert first == DOCS
+    assert first[0] is not second[0]
+    assert cache.get("other") is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (2, 1)
+
+
+def test_entries_expire_and_evict():
+    cache = WebSearchCache(ttl_seconds=0, max_entries=10)
+    cache.put("k", DOCS)
+    assert cache.get("k") is None
+
+    cache = WebSearchCache(ttl_seconds=60, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, DOCS)
+    assert cache.get("a") is None
+    assert cache.get("c") == DOCS
+
+
+def test_persisted_entries_survive_restart(tmp_path):
+    WebSearchCache(ttl_seconds=60, max_entries=10, path=tmp_path / "web.sqlite3").put("k", DOCS)
+
+    assert WebSearchCache(ttl_seconds=60, max_entries=10, path=tmp_path / "web.sqlite3").get("k") == DOCS
+
+
+def test_concurrent_misses_share_one_search():
+    cache = WebSearchCache(ttl_seconds=60, max_entries=10)
+    calls = []
+    release = threading.Event()
+
+    def search():
+        calls.append(1)
+        release.wait(5)
+        return DOCS
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.get_or_search, "k", search) for _ in range(8)]
+        time.sleep(0.2)
+        release.set()
+        results = [future.result(5) for future in futures]
+
+    assert len(calls) == 1
+    assert all(result == DOCS for result in results)
+    assert cache.stats()["shared"] == 7
+
+
+def test_failed_search_is_not_cached():
+    cache = WebSearchCache(ttl_seconds=60, max_entries=10)
+
+    def failing():
+        raise RuntimeError("Tavily is down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_search("k", failing)
+
+    assert cache.get_or_search("k", lambda: DOCS) == DOCS
+    assert cache.stats()["entries"] == 1
+
+
+def test_async_callers_share_one_search():
+    cache = WebSearchCache(ttl_seconds=60, max_entries=10)
+    calls = []
+
+    async def search():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return DOCS
+
+    async def run():
+        return await asyncio.gather(*(cache.aget_or_search("k", search) for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert all(result == DOCS for result in results)
+
+
+def test_async_failed_search_is_not_cached():
+    cache = WebSearchCache(ttl_seconds=60, max_entries=10)
+
+    async def failing():
+        raise RuntimeError("Tavily is down")
+
+    async def succeeding():
+        return DOCS
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.aget_or_search("k", failing))
+    assert asyncio.run(cache.aget_or_search("k", succeeding)) == DOCS
@@ -0,0 +1,65 @@
+"""Tests for speculative web search during retrieval."""
+
+from concurrent.futures import Future
+
+import pytest
+from langchain_core.documents import Document
+
+from graph import nodes
+from rag.vectorstore import SIMILARITY_METADATA_KEY
+from tools import web_search
+
+
+@pytest.fixture
+def speculation(monkeypatch):
+    """Run retrieve_documents() with a pending web search and canned local results."""
+    future = Future()
+    monkeypatch.setattr(nodes, "start_web_search", lambda query: future)
+    monkeypatch.setattr(web_search, "_speculative_stats", {"launched": 0, "used": 0, "wasted": 0})
+
+    def run(similarity: float, query_type: str = "knowledge") -> dict:
+        doc = Document(page_content="Our return policy is 7 days.", metadata={SIMILARITY_METADATA_KEY: similarity})
+        monkeypatch.setattr(nodes, "retrieve_with_scores", lambda *args, **kwargs: [(doc, similarity)])
+        state = {
+            "query": "can I return a car",
+            "query_embedding": [1.0, 0.0],
+            "query_type": query_type,
+            "route_confidence": 0.4,
+            "speculative_web": True,
+            "trace": {},
+        }
+        return nodes.retrieve_documents(state)
+
+    return future, run
+
+
+def test_should_speculate_only_when_routing_is_unsure(monkeypatch):
+    monkeypatch.setattr(nodes, "SPECULATIVE_WEB_SEARCH", True)
+
+    assert nodes._should_speculate(nodes.ROUTE_CONFIDENCE_THRESHOLD - 0.1)
+    assert not nodes._should_speculate(nodes.ROUTE_CONFIDENCE_THRESHOLD)
+
+
+def test_confident_retrieval_cancels_web_search(speculation):
+    future, run = speculation
+
+    state = run(similarity=nodes.RELEVANCE_THRESHOLD + 0.1)
+
+    assert future.cancelled()
+    assert state["web_results"] is None
+    assert state["trace"]["speculative_web"] == "wasted"
+    assert nodes.check_relevance(state) == "generate"
+    assert web_search.get_speculative_stats() == {"launched": 1, "used": 0, "wasted": 1}
+
+
+def test_unconfident_retrieval_uses_web_search(speculation):
+    future, run = speculation
+    web_docs = [Document(page_content="2025 incentives", metadata={"source": "Web"})]
+    future.set_result(web_docs)
+
+    state = run(similarity=nodes.RELEVANCE_THRESHOLD - 0.2)
+
+    assert state["web_results"] == web_docs
+    assert state["trace"]["speculative_web"] == "used"
+    assert nodes.check_relevance(state) == "web_search"
+    assert web_search.get_speculative_stats() == {"launched": 1, "used": 1, "wasted": 0}
@@ -0,0 +1,232 @@
+"""TTL cache for web search results."""
+
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from app.config import (
+    WEB_CACHE_TTL_SECONDS,
+    WEB_CACHE_MAX_ENTRIES,
+    WEB_CACHE_PERSIST,
+    WEB_CACHE_PATH,
+)
+
+
+def _serialize(documents: List[Document]) -> str:
+    return json.dumps([
+        {"page_content": doc.page_content, "metadata": doc.metadata}
+        for doc in documents
+    ])
+
+
+def _deserialize(payload: str) -> List[Document]:
+    return [Document(**item) for item in json.loads(payload)]
+
+
+class WebSearchCache:
+    """
+    In-memory LRU cache of web search results with a TTL.
+
+    Entries are stored serialized, so every hit returns fresh Document
+    objects. With ``path`` set, entries are also written to SQLite and
+    survive restarts. Concurrent lookups of the same missing key share one
+    search: the first caller runs it and the others wait for its result.
+    Only successful searches are stored.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, path: Optional[Path] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._ainflight: Dict[str, asyncio.Future] = {}
+
+        self._conn = None
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS web_search ("
+                "key TEXT PRIMARY KEY, documents TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(query: str, max_results: int) -> str:
+        """Normalize case, whitespace and trailing punctuation into a cache key."""
+        normalized = re.sub(r"\s+", " ", query.lower()).strip().rstrip("?!. ")
+        return f"{max_results}:{normalized}"
+
+    def get(self, key: str) -> Optional[List[Document]]:
+        """Return unexpired cached results, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT expires_at, documents FROM web_search WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+                    self._entries[key] = entry
+
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return _deserialize(entry[1])
+
+    def put(self, key: str, documents: List[Document]):
+        """Store results for ``ttl_seconds``, evicting the least recently used."""
+        expires_at = time.time() + self.ttl_seconds
+        payload = _serialize(documents)
+        with self._lock:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO web_search (key, documents, expires_at) VALUES (?, ?, ?)",
+                    (key, payload, expires_at),
+                )
+                # Drop expired rows, then the ones expiring soonest past the bound
+                self._conn.execute("DELETE FROM web_search WHERE expires_at <= ?", (time.time(),))
+                self._conn.execute(
+                    "DELETE FROM web_search WHERE key NOT IN ("
+                    "SELECT key FROM web_search ORDER BY expires_at DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                self._conn.commit()
+
+    def get_or_search(self, key: str, search: Callable[[], List[Document]]) -> List[Document]:
+        """
+        Return cached results, or run ``search`` once for all concurrent callers.
+
+        Exceptions raised by ``search`` propagate to every waiting caller and
+        nothing is cached.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            # The previous leader may have finished since the lookup above
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                return _deserialize(entry[1])
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.shared += 1
+
+        if not leader:
+            return _deserialize(future.result())
+
+        try:
+            documents = search()
+            self.put(key, documents)
+            future.set_result(_serialize(documents))
+            return documents
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def aget_or_search(
+        self,
+        key: str,
+        search: Callable[[], Awaitable[List[Document]]],
+    ) -> List[Document]:
+        """Async get_or_search(); callers on the same event loop share one search."""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        future = self._ainflight.get(key)
+        if future is not None and future.get_loop() is loop:
+            self.shared += 1
+            try:
+                return _deserialize(await asyncio.shield(future))
+            except asyncio.CancelledError:
+                # The leading caller was cancelled, not us: search again
+                if not future.cancelled():
+                    raise
+                return await self.aget_or_search(key, search)
+
+        future = self._ainflight[key] = loop.create_future()
+        try:
+            documents = await search()
+            self.put(key, documents)
+            future.set_result(_serialize(documents))
+            return documents
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved if no caller was waiting on it
+            future.exception()
+            raise
+        finally:
+            if self._ainflight.get(key) is future:
+                del self._ainflight[key]
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the number of in-memory entries."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared": self.shared,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def clear(self):
+        """Remove all cached results."""
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM web_search")
+                self._conn.commit()
+
+
+# Global cache instance
+_cache: Optional[WebSearchCache] = None
+
+
+def get_web_search_cache() -> WebSearchCache:
+    """Get or create the process-wide web search cache."""
+    global _cache
+    if _cache is None:
+        _cache = WebSearchCache(
+            ttl_seconds=WEB_CACHE_TTL_SECONDS,
+            max_entries=WEB_CACHE_MAX_ENTRIES,
+            path=WEB_CACHE_PATH if WEB_CACHE_PERSIST else None,
+        )
+    return _cache
@@ -1,17 +1,37 @@
 """Tavily web search tool integration."""
 
-from tavily import TavilyClient
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from tavily import AsyncTavilyClient, TavilyClient
 from langchain_core.documents import Document
-from typing import List
+from typing import List, Optional
 
-from app.config import TAVILY_API_KEY
+from app.clients import get_registry
+from app.config import TAVILY_API_KEY, WEB_CACHE_ENABLED, WEB_SEARCH_TIMEOUT_SECONDS
+from tools.search_cache import WebSearchCache, get_web_search_cache
+
+# Background pool for speculative searches started alongside retrieval
+_executor: Optional[ThreadPoolExecutor] = None
+
+# Speculative searches launched, whose results were used, and that were discarded
+_speculative_stats = {"launched": 0, "used": 0, "wasted": 0}
+_stats_lock = threading.Lock()
 
 
 def get_tavily_client() -> TavilyClient:
-    """Get Tavily client instance."""
+    """Get the shared Tavily client instance."""
+    if not TAVILY_API_KEY:
+        raise ValueError("TAVILY_API_KEY not set in environment variables")
+    return get_registry().get("tavily", lambda: TavilyClient(api_key=TAVILY_API_KEY))
+
+
+def get_async_tavily_client() -> AsyncTavilyClient:
+    """Get the async Tavily client for the running event loop."""
     if not TAVILY_API_KEY:
         raise ValueError("TAVILY_API_KEY not set in environment variables")
-    return TavilyClient(api_key=TAVILY_API_KEY)
+    return get_registry().get_for_loop("tavily_async", lambda: AsyncTavilyClient(api_key=TAVILY_API_KEY))
 
 
 def web_search(query: str, max_results: int = 5) -> List[Document]:
@@ -27,48 +47,135 @@ def web_search(query: str, max_results: int = 5) -> List[Document]:
     """
     client = get_tavily_client()
     
-    # Add automotive context to query for better results
-    enhanced_query = f"car dealership automotive {query}"
+    def search() -> List[Document]:
+        return _search_tavily(client, query, max_results)
     
     try:
-        response = client.search(
-            query=enhanced_query,
-            search_depth="advanced",
-            max_results=max_results,
-            include_answer=True
-        )
-        
-        documents = []
+        if WEB_CACHE_ENABLED:
+            key = WebSearchCache.make_key(query, max_results)
+            return get_web_search_cache().get_or_search(key, search)
+        return search()
         
-        # Add the AI-generated answer as first document if available
-        if response.get("answer"):
-            documents.append(Document(
-                page_content=response["answer"],
-                metadata={
-                    "source": "Tavily AI Summary",
-                    "category": "web_search",
-                    "url": "AI-generated summary"
-                }
-            ))
-        
-        # Add individual search results
-        for result in response.get("results", []):
-            documents.append(Document(
-                page_content=result.get("content", ""),
-                metadata={
-                    "source": result.get("title", "Web Result"),
-                    "category": "web_search",
-                    "url": result.get("url", "")
-                }
-            ))
-        
-        return documents
+    except Exception as e:
+        return [_error_document(e)]
+
+
+async def aweb_search(query: str, max_results: int = 5) -> List[Document]:
+    """Async web_search() using the event loop's Tavily client."""
+    client = get_async_tavily_client()
+    
+    async def search() -> List[Document]:
+        return await _asearch_tavily(client, query, max_results)
+    
+    try:
+        if WEB_CACHE_ENABLED:
+            key = WebSearchCache.make_key(query, max_results)
+            return await get_web_search_cache().aget_or_search(key, search)
+        return await search()
         
     except Exception as e:
-        return [Document(
-            page_content=f"Web search failed: {str(e)}",
-            metadata={"source": "error", "category": "web_search"}
-        )]
+        return [_error_document(e)]
+
+
+def _search_tavily(client: TavilyClient, query: str, max_results: int) -> List[Document]:
+    """Query Tavily; raises on failure so errors are never cached."""
+    # Add automotive context to query for better results
+    enhanced_query = f"car dealership automotive {query}"
+    
+    response = client.search(
+        query=enhanced_query,
+        search_depth="advanced",
+        max_results=max_results,
+        include_answer=True
+    )
+    return _response_to_documents(response)
+
+
+async def _asearch_tavily(client: AsyncTavilyClient, query: str, max_results: int) -> List[Document]:
+    """Async _search_tavily()."""
+    enhanced_query = f"car dealership automotive {query}"
+    
+    response = await client.search(
+        query=enhanced_query,
+        search_depth="advanced",
+        max_results=max_results,
+        include_answer=True
+    )
+    return _response_to_documents(response)
+
+
+def _response_to_documents(response: dict) -> List[Document]:
+    """Convert a Tavily search response into Documents."""
+    documents = []
+    
+    # Add the AI-generated answer as first document if available
+    if response.get("answer"):
+        documents.append(Document(
+            page_content=response["answer"],
+            metadata={
+                "source": "Tavily AI Summary",
+                "category": "web_search",
+                "url": "AI-generated summary"
+            }
+        ))
+    
+    # Add individual search results
+    for result in response.get("results", []):
+        documents.append(Document(
+            page_content=result.get("content", ""),
+            metadata={
+                "source": result.get("title", "Web Result"),
+                "category": "web_search",
+                "url": result.get("url", "")
+            }
+        ))
+    
+    return documents
+
+
+def _error_document(error: Exception) -> Document:
+    """Build the placeholder Document returned when a search fails."""
+    return Document(
+        page_content=f"Web search failed: {str(error)}",
+        metadata={"source": "error", "category": "web_search"}
+    )
+
+
+def start_web_search(query: str, max_results: int = 5) -> Future:
+    """Run web_search() in the background and return its future."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="web-search")
+    return _executor.submit(web_search, query, max_results)
+
+
+def wait_web_search(future: Future, timeout: float = WEB_SEARCH_TIMEOUT_SECONDS) -> List[Document]:
+    """Result of start_web_search(), or an error Document after ``timeout`` seconds."""
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        return [_error_document(TimeoutError(f"no response after {timeout:g}s"))]
+
+
+async def await_web_search(task: asyncio.Task, timeout: float = WEB_SEARCH_TIMEOUT_SECONDS) -> List[Document]:
+    """Async wait_web_search() for an aweb_search() task."""
+    try:
+        return await asyncio.wait_for(task, timeout)
+    except asyncio.TimeoutError:
+        return [_error_document(TimeoutError(f"no response after {timeout:g}s"))]
+
+
+def record_speculative(outcome: str):
+    """Count a speculative search event: "launched", "used" or "wasted"."""
+    with _stats_lock:
+        _speculative_stats[outcome] += 1
+
+
+def get_speculative_stats() -> dict:
+    """Return speculative search counts since the process started."""
+    with _stats_lock:
+        return dict(_speculative_stats)
 
 
 def format_web_results(documents: List[Document]) -> str: